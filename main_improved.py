@@ -13,19 +13,25 @@ import shutil
 import subprocess
 import argparse
 import time
-from scripts import (
-    download_video,
-    transcribe_video,
-    create_viral_segments,
-    cut_segments,
-    edit_video,
-    transcribe_cuts,
-    adjust_subtitles,
-    burn_subtitles,
-    save_json,
-    organize_output,
-    translate_json,
-)
+from scripts.lazy_import import lazy_module
+
+# Etapas importadas sob demanda: --burn-only / workflow 3 não carregam torch, whisperx, cv2...
+# (scripts/import_benchmark.py verifica isso)
+download_video = lazy_module("scripts.download_video")
+transcribe_video = lazy_module("scripts.transcribe_video")
+create_viral_segments = lazy_module("scripts.create_viral_segments")
+cut_segments = lazy_module("scripts.cut_segments")
+edit_video = lazy_module("scripts.edit_video")
+transcribe_cuts = lazy_module("scripts.transcribe_cuts")
+adjust_subtitles = lazy_module("scripts.adjust_subtitles")
+burn_subtitles = lazy_module("scripts.burn_subtitles")
+save_json = lazy_module("scripts.save_json")
+organize_output = lazy_module("scripts.organize_output")
+translate_json = lazy_module("scripts.translate_json")
+transcript_store = lazy_module("scripts.transcript_store")
+source_cache = lazy_module("scripts.source_cache")
+source_ranges = lazy_module("scripts.source_ranges")
+pipeline = lazy_module("scripts.pipeline")
 from i18n.i18n import I18nAuto
 
 # Inicializa sistema de tradução
@@ -110,10 +116,11 @@ def main():
     parser.add_argument("--max-duration", type=int, default=90, help="Maximum segment duration (seconds)")
     parser.add_argument("--model", default="large-v3-turbo", help="Whisper model to use")
     
-    parser.add_argument("--ai-backend", choices=["manual", "gemini", "g4f", "local"], help="AI backend for viral analysis")
-    parser.add_argument("--api-key", help="Gemini API Key (required if ai-backend is gemini)")
+    parser.add_argument("--ai-backend", choices=["manual", "gemini", "g4f", "local", "openai"], help="AI backend for viral analysis")
+    parser.add_argument("--api-key", help="Gemini API Key (required if ai-backend is gemini) or key for the OpenAI-compatible server")
     
-    parser.add_argument("--chunk-size", help="Override Chunk Size")
+    parser.add_argument("--chunk-size", help="Optional cap on chunk size in characters (default: fill the model context, see context_tokens in api_config.json)")
+    parser.add_argument("--prescore-top-k", type=int, default=None, help="Locally pre-rank transcript windows and send only the top K (with context) to the AI")
     parser.add_argument("--ai-model-name", help="Override AI Model Name")
 
     parser.add_argument("--project-path", help="Path to existing project folder (overrides URL/Latest)")
@@ -135,9 +142,25 @@ def main():
     parser.add_argument("--active-speaker-motion-sensitivity", type=float, default=0.05, help="Motion sensitivity multiplier (default: 0.05)")
     parser.add_argument("--active-speaker-decay", type=float, default=2.0, help="Activity score decay rate (default: 2.0)")
     parser.add_argument("--skip-prompts", action="store_true", help="Skip interactive prompts and use defaults/existing files")
-    parser.add_argument("--video-quality", choices=["best", "1080p", "720p", "480p"], default="best", help="Video download quality")
+    parser.add_argument("--video-quality", choices=["auto", "best", "1080p", "720p", "480p"], default="auto", help="Video download quality. 'auto' picks the smallest resolution that still fills the 1080px output for the chosen face mode")
+    parser.add_argument("--download-fragments", type=int, default=4, help="Fragments downloaded in parallel for HLS/DASH sources (default: 4)")
+    parser.add_argument("--download-rate-limit", type=str, default=None, help="Bandwidth cap for the whole node, e.g. 50M or 500K bytes/s, shared fairly between running downloads (default: $VIRALCUTTER_DOWNLOAD_RATE_LIMIT or unlimited)")
     parser.add_argument("--skip-youtube-subs", action="store_true", help="Skip downloading YouTube subtitles")
+    parser.add_argument("--no-audio-first", action="store_true", help="Download the merged video before transcribing instead of transcribing the audio stream while the video downloads")
+    parser.add_argument("--range-download", action="store_true", help="Select segments from the YouTube subtitles (or an audio-only download) and download only the selected windows of the video")
+    parser.add_argument("--range-padding", type=float, default=5.0, help="Seconds of padding around each window for --range-download (default: 5.0)")
+    parser.add_argument("--no-source-cache", action="store_true", help="Do not reuse or store downloads/transcripts in the shared source cache (cache/sources)")
+    parser.add_argument("--source-cache-gb", type=float, default=50, help="Disk budget of the shared source cache in GB; least recently used sources are evicted (default: 50)")
     parser.add_argument("--translate-target", help="Target language code for subtitle translation (e.g. 'pt', 'en').")
+    parser.add_argument("--lazy-align", action="store_true", help="Skip word alignment during transcription and align only the selected segment windows before cutting")
+    parser.add_argument("--align-padding", type=float, default=3.0, help="Seconds of padding around each segment for lazy alignment (default: 3.0)")
+    parser.add_argument("--stream-transcribe", action="store_true", help="Transcribe in silence-bounded windows with constant memory and resume support")
+    parser.add_argument("--stream-window", type=float, default=600, help="Target window length in seconds for --stream-transcribe (default: 600)")
+    parser.add_argument("--recalibrate-cpu", action="store_true", help="Re-run the CPU calibration benchmark (compute type, batch size, threads) before transcribing")
+    parser.add_argument("--skip-silence", action="store_true", help="Energy-based VAD pre-pass: transcribe only speech spans and map timestamps back")
+    parser.add_argument("--export-transcript", help="Comma-separated transcript formats to export from the transcript store (srt,tsv,json)")
+    parser.add_argument("--rerun", help="Comma-separated pipeline stages to run even if their inputs did not change (ranges,align,video,source_cache,cut,edit,translate,adjust,burn or 'all')")
+    parser.add_argument("--pipeline-workers", type=int, default=4, help="Independent pipeline stages run concurrently in up to this many threads (default: 4)")
 
     args = parser.parse_args()
     
@@ -312,7 +335,8 @@ def main():
                 print(i18n("2. G4F (Free / Experimental)"))
                 print(i18n("3. Local (GGUF via llama.cpp)"))
                 print(i18n("4. Manual (Copy/Paste Prompt)"))
-                choice = input(i18n("Choose (1-4): ")).strip()
+                print(i18n("5. OpenAI-compatible server (llama.cpp server, vLLM, Ollama...)"))
+                choice = input(i18n("Choose (1-5): ")).strip()
                 
                 if choice == "1":
                     ai_backend = "gemini"
@@ -346,6 +370,9 @@ def main():
                         except:
                              print(i18n("Invalid input. Using first model."))
                              args.ai_model_name = models[0]
+
+                elif choice == "5":
+                    ai_backend = "openai"
                              
                 else:
                     ai_backend = "manual"
@@ -402,8 +429,32 @@ def main():
              print(i18n("Using dynamic intervals: 1s for 2-face, ~0.16s for 1-face."))
 
 
+    # Range download: só faz sentido quando o vídeo ainda vai ser baixado
+    range_mode = bool(args.range_download and url and not input_video and workflow_choice != "3")
+    # Áudio primeiro: transcrição roda enquanto o stream de vídeo baixa em segundo plano
+    video_job = None
+    audio_input = None
+    video_quality = args.video_quality
+
     # Pipeline Execution
     try:
+        # 0. Cache de fontes: mesmo vídeo (id da plataforma ou hash do conteúdo) em outro projeto
+        # traz mídia, áudio decodificado e transcrição por hardlink, sem baixar/transcrever de novo
+        source_key = None
+        if not args.no_source_cache and workflow_choice != "3" and not range_mode:
+            try:
+                if not input_video and url:
+                    source_key = source_cache.url_key(download_video.get_video_info(url))
+                    if source_key:
+                        source_cache.restore(source_key, download_video.get_project_folder(url), model=args.model)
+                elif input_video and os.path.exists(input_video):
+                    digest = source_cache.content_hash(input_video)
+                    source_key = source_cache.find_by_content(digest) or f"sha256-{digest}"
+                    source_cache.restore(source_key, os.path.dirname(input_video), model=args.model)
+            except Exception as e:
+                print(i18n("Source cache unavailable: {}").format(e))
+                source_key = None
+
         # 1. Download & Project Setup
         print(f"DEBUG: Checking input_video state. input_video={input_video}")
         
@@ -414,7 +465,26 @@ def main():
                 
             print(i18n("Starting download..."))
             download_subs = not args.skip_youtube_subs
-            download_result = download_video.download(url, download_subs=download_subs, quality=args.video_quality)
+            download_video.configure_downloads(args.download_fragments, args.download_rate_limit)
+            video_quality = download_video.resolve_quality(args.video_quality, url, face_mode, args.no_face_mode)
+            if range_mode:
+                # Legenda (ou só o áudio) agora; vídeo só das janelas escolhidas, depois da seleção
+                print(i18n("Range download: fetching subtitles first, the video only for the selected segments."))
+                if download_subs:
+                    project_folder, sub_path = download_video.download_subtitles(url)
+                else:
+                    project_folder, sub_path = download_video.get_project_folder(url), None
+                if sub_path is None:
+                    print(i18n("No subtitles available. Downloading audio only for transcription..."))
+                    download_result = (download_video.download_audio(url, project_folder), project_folder)
+                else:
+                    download_result = (None, project_folder)
+            elif not args.no_audio_first and workflow_choice != "3":
+                audio_input, project_folder, video_job = download_video.download_audio_first(url, download_subs=download_subs, quality=video_quality)
+                # input.mp4 só existe depois do merge; até lá as etapas de áudio usam o stream de áudio
+                download_result = (os.path.join(project_folder, "input.mp4"), project_folder)
+            else:
+                download_result = download_video.download(url, download_subs=download_subs, quality=video_quality)
             
             if isinstance(download_result, tuple):
                 input_video, project_folder = download_result
@@ -437,10 +507,30 @@ def main():
             # We assume transcription exists (SRT/JSON) or we won't need it for 'adjust_subtitles' if it uses 'subs/*.json' which are created by 'cut_segments'
             # Actually 'adjust_subtitles' reads from 'project_folder/subs'.
             # viral_segments = True # Removed to avoid overwritting dict loaded earlier
+        elif range_mode and input_video is None:
+            print(i18n("Using YouTube subtitles as transcript (range download)..."))
+            transcribe_video.store_provided_subtitles(project_folder)
         else:
             print(i18n("Transcribing with model {}...").format(args.model))
             # Se skip config, args.model é default
-            srt_file, tsv_file = transcribe_video.transcribe(input_video, args.model, project_folder=project_folder)
+            transcribe_video.transcribe(audio_input or input_video, args.model, project_folder=project_folder, lazy_align=args.lazy_align or range_mode,
+                                        streaming=args.stream_transcribe, stream_window=args.stream_window,
+                                        recalibrate_cpu=args.recalibrate_cpu, skip_silence=args.skip_silence)
+
+        if args.export_transcript:
+            for fmt in [f.strip().lower() for f in args.export_transcript.split(',') if f.strip()]:
+                try:
+                    transcript_store.export(project_folder, fmt, force=True)
+                except Exception as e:
+                    print(i18n("Could not export transcript as {}: {}").format(fmt, e))
+
+        # Transcrição pronta: já guarda no cache de fontes (o vídeo entra depois, se ainda estiver baixando)
+        if source_key and workflow_choice != "3":
+            try:
+                source_cache.store(source_key, project_folder, model=args.model, url=url,
+                                   title=os.path.basename(project_folder), max_gb=args.source_cache_gb)
+            except Exception as e:
+                print(i18n("Could not update the source cache: {}").format(e))
  
         # 3. Create Viral Segments
         if workflow_choice != "3":
@@ -477,7 +567,8 @@ def main():
                         api_key=api_key,
                         project_folder=project_folder,
                         chunk_size_arg=args.chunk_size,
-                        model_name_arg=args.ai_model_name
+                        model_name_arg=args.ai_model_name,
+                        prescore_top_k=args.prescore_top_k
                     )
                 
                 if not viral_segments or not viral_segments.get("segments"):
@@ -516,72 +607,7 @@ def main():
                           print(i18n("Failed to align raw segments: {}").format(e))
                           # If alignment fails, it might crash later, but we tried. 
 
-        # 4. Cut Segments
-        # Se workflow for 3, pulamos corte
         if workflow_choice == "3":
-            print(i18n("Workflow 3 (Subtitles Only): Skipping Cut and Edit."))
-            # Deduzir cuts folder apenas para log
-            cuts_folder = os.path.join(project_folder, "cuts")
-        else:
-            cuts_folder = os.path.join(project_folder, "cuts")
-            skip_cutting = False
-            
-            if os.path.exists(cuts_folder) and os.listdir(cuts_folder):
-                print(i18n("\nExisting cuts found in: {}").format(cuts_folder))
-                if args.skip_prompts:
-                    cut_again_resp = 'no'
-                else:
-                    cut_again_resp = input(i18n("Cuts already exist. Cut again? (yes/no) [default: no]: ")).strip().lower()
-                
-                # Default is no (skip) if they just press enter or say no
-                if cut_again_resp not in ['y', 'yes']:
-                    skip_cutting = True
-            
-            if skip_cutting:
-                print(i18n("Skipping Video Rendering (using existing cuts), but updating Subtitle JSONs..."))
-            else:
-                print(i18n("Cutting segments..."))
-
-            cut_segments.cut(viral_segments, project_folder=project_folder, skip_video=skip_cutting)
-        
-        # 5. Workflow Check
-        if workflow_choice == "2":
-            print(i18n("Cut Only selected. Skipping Face Crop and Subtitles."))
-            print(i18n(f"Process completed! Check your results in: {project_folder}"))
-            sys.exit(0)
-
-        # 5. Edit Video (Face Crop)
-        if workflow_choice != "3":
-            print(i18n("Editing video with {} (Mode: {})...").format(face_model, face_mode))
-            
-            # Parse dead zone safely
-            try:
-                dead_zone_val = float(args.face_dead_zone)
-            except:
-                dead_zone_val = 40.0
-                
-            edit_video.edit(
-                project_folder=project_folder, 
-                face_model=face_model, 
-                face_mode=face_mode, 
-                detection_period=detection_intervals,
-                filter_threshold=args.face_filter_threshold,
-                two_face_threshold=args.face_two_threshold,
-                confidence_threshold=args.face_confidence_threshold,
-                dead_zone=dead_zone_val,
-                focus_active_speaker=args.focus_active_speaker,
-                active_speaker_mar=args.active_speaker_mar,
-                active_speaker_score_diff=args.active_speaker_score_diff,
-                include_motion=args.include_motion,
-                active_speaker_motion_deadzone=args.active_speaker_motion_threshold,
-                active_speaker_motion_sensitivity=args.active_speaker_motion_sensitivity,
-                active_speaker_decay=args.active_speaker_decay,
-                segments_data=viral_segments.get("segments", []) if viral_segments else None,
-                no_face_mode=args.no_face_mode
-            )
-
-
-        else:
             print(i18n("Workflow 3: Skipping Face Crop."))
             # Rename existing files if viral_segments available (since edit_video didn't run)
             if viral_segments and "segments" in viral_segments:
@@ -621,31 +647,124 @@ def main():
                          os.rename(old_tl_path, new_tl_path)
                          print(f"Renamed (Workflow 3): {old_tl_name} -> {new_base_name}_timeline.json")
 
-        # 6. Subtitles
-        burn_subtitles_option = True 
-        if burn_subtitles_option:
-            print(i18n("Processing subtitles..."))
-            # transcribe_cuts removido: JSON de legenda já é gerado no corte
-            # transcribe_cuts.transcribe(project_folder=project_folder)
-            
-            # --- Translation Integration ---
-            if args.translate_target and args.translate_target.lower() != "none":
-                 print(i18n("Translating subtitles to: {}").format(args.translate_target))
-                 import asyncio
-                 try:
-                    asyncio.run(translate_json.translate_project_subs(project_folder, args.translate_target))
-                 except Exception as e:
-                    print(i18n("Translation failed: {}").format(e))
-            # -------------------------------
+        # 3.55 em diante: DAG de etapas (scripts/pipeline.py). Cada etapa declara entradas e
+        # saídas; numa nova execução só rodam as etapas cujas entradas (hash de conteúdo) ou
+        # parâmetros mudaram, e etapas independentes rodam em paralelo.
+        has_segments = bool(viral_segments and viral_segments.get("segments"))
+        segments_file = "viral_segments.txt"
+        transcript_dir = transcript_store.STORE_DIRNAME
+        cuts_folder = os.path.join(project_folder, "cuts")
+        align_source = audio_input or input_video
+
+        def segment_windows():
+            windows = []
+            for seg in viral_segments["segments"]:
+                try:
+                    windows.append(cut_segments.segment_window(seg))
+                except Exception as e:
+                    print(i18n("Could not read segment times for alignment: {}").format(e))
+            return windows
+
+        # 3.55. Range Download (só as janelas escolhidas + padding)
+        def run_ranges(changed):
+            # Padding do download >= padding do alinhamento: as janelas alinhadas cabem nos trechos
+            download_video.download_ranges(url, project_folder, segment_windows(),
+                                           padding=max(args.range_padding, args.align_padding),
+                                           quality=video_quality)
+
+        # 3.6. Lazy Alignment (word timestamps only inside the selected windows)
+        def run_align(changed):
+            print(i18n("Aligning only the selected segment windows..."))
+            transcribe_video.align_windows(align_source, project_folder, segment_windows(), padding=args.align_padding)
+
+        # Vídeo em segundo plano: daqui em diante (corte) o input.mp4 é necessário
+        def run_video(changed):
+            nonlocal input_video, video_job
+            if video_job is not None:
+                try:
+                    input_video = video_job.result()
+                except Exception as e:
+                    print(i18n("Background video download failed ({}). Downloading the full video...").format(e))
+                    input_video, _ = download_video.download(url, download_subs=False, quality=video_quality)
+                video_job = None
+
+        # Falha ao guardar no cache é deliberadamente não fatal: o cache só economiza
+        # download/transcrição de projetos futuros e, relançando, o pipeline pararia antes
+        # do corte. A etapa fica como feita; guarda de novo quando input.mp4 ou o transcript
+        # mudarem (ou com --rerun source_cache).
+        def run_source_cache(changed):
+            try:
+                source_cache.store(source_key, project_folder, model=args.model, url=url,
+                                   title=os.path.basename(project_folder), max_gb=args.source_cache_gb)
+            except Exception as e:
+                print(i18n("Could not update the source cache: {}").format(e))
 
-            sub_config = get_subtitle_config(args.subtitle_config)
-            
+        # 4. Cut Segments
+        # Sem o antigo "Cuts already exist. Cut again?": o DAG decide. O corte roda de novo
+        # quando os segmentos ou o vídeo mudam; use --rerun cut para forçar.
+        def run_cut(changed):
+            # Só o transcript mudou (ex: alinhamento novo): os cortes continuam válidos, refaz só os JSONs de legenda
+            skip_cutting = (bool(changed) and set(changed) <= {transcript_dir}
+                            and os.path.exists(cuts_folder) and bool(os.listdir(cuts_folder)))
+            if skip_cutting:
+                print(i18n("Skipping Video Rendering (using existing cuts), but updating Subtitle JSONs..."))
+            else:
+                print(i18n("Cutting segments..."))
+            cut_segments.cut(viral_segments, project_folder=project_folder, skip_video=skip_cutting)
 
-            
+        # Parse dead zone safely
+        try:
+            dead_zone_val = float(args.face_dead_zone)
+        except:
+            dead_zone_val = 40.0
+        face_params = {
+            "face_model": face_model,
+            "face_mode": face_mode,
+            "detection_period": detection_intervals,
+            "filter_threshold": args.face_filter_threshold,
+            "two_face_threshold": args.face_two_threshold,
+            "confidence_threshold": args.face_confidence_threshold,
+            "dead_zone": dead_zone_val,
+            "focus_active_speaker": args.focus_active_speaker,
+            "active_speaker_mar": args.active_speaker_mar,
+            "active_speaker_score_diff": args.active_speaker_score_diff,
+            "include_motion": args.include_motion,
+            "active_speaker_motion_deadzone": args.active_speaker_motion_threshold,
+            "active_speaker_motion_sensitivity": args.active_speaker_motion_sensitivity,
+            "active_speaker_decay": args.active_speaker_decay,
+            "no_face_mode": args.no_face_mode,
+        }
+
+        # 5. Edit Video (Face Crop)
+        def run_edit(changed):
+            print(i18n("Editing video with {} (Mode: {})...").format(face_model, face_mode))
+            edit_video.edit(
+                project_folder=project_folder,
+                segments_data=viral_segments.get("segments", []) if viral_segments else None,
+                **face_params
+            )
+
+        # 6. Subtitles
+        # transcribe_cuts removido: JSON de legenda já é gerado no corte
+        burn_subtitles_option = True
+        sub_config = get_subtitle_config(args.subtitle_config)
+        translate_target = args.translate_target if args.translate_target and args.translate_target.lower() != "none" else None
+
+        def run_translate(changed):
+            print(i18n("Translating subtitles to: {}").format(translate_target))
+            import asyncio
+            try:
+                asyncio.run(translate_json.translate_project_subs(project_folder, translate_target))
+            except Exception as e:
+                print(i18n("Translation failed: {}").format(e))
+                # Relança: engolir o erro marcaria a tradução como feita e ela não rodaria de novo
+                raise
+
+        def run_adjust(changed):
+            print(i18n("Processing subtitles..."))
             # Passa o dicionário desempacotado como argumentos, mais o project_folder
             try:
                 adjust_subtitles.adjust(project_folder=project_folder, **sub_config)
-                burn_subtitles.burn(project_folder=project_folder)
             except FileNotFoundError as fnf_error:
                 print(i18n("\n[ERROR] Subtitle processing failed: {}").format(str(fnf_error)))
                 print(i18n("Tip: If you are using Workflow 3 (Subtitles Only), ensure the 'subs' folder exists and contains valid JSON files."))
@@ -653,9 +772,61 @@ def main():
             except Exception as e:
                 print(i18n("\n[ERROR] Unexpected error during subtitle processing: {}").format(str(e)))
                 raise e
-        else:
+
+        def run_burn(changed):
+            try:
+                burn_subtitles.burn(project_folder=project_folder)
+            except Exception as e:
+                print(i18n("\n[ERROR] Unexpected error during subtitle processing: {}").format(str(e)))
+                raise e
+
+        store = transcript_store.open_store(project_folder) if workflow_choice != "3" else None
+        needs_align = has_segments and store is not None and store.alignment != "full"
+        if store is not None:
+            store.close()  # o alinhamento reescreve o store; no Windows o mmap aberto bloquearia a troca
+        video_inputs = [source_ranges.RANGES_DIR] if range_mode else ["input.mp4"]
+        stages = [
+            pipeline.Stage("ranges", run_ranges, inputs=[segments_file], outputs=[source_ranges.RANGES_DIR],
+                           params={"padding": max(args.range_padding, args.align_padding), "quality": video_quality},
+                           enabled=range_mode and has_segments),
+            pipeline.Stage("align", run_align, inputs=[segments_file, transcript_dir] + ([source_ranges.RANGES_DIR] if range_mode else []),
+                           outputs=[transcript_dir], params={"padding": args.align_padding}, enabled=needs_align),
+            pipeline.Stage("video", run_video, outputs=["input.mp4"],
+                           enabled=workflow_choice != "3" and not range_mode),
+            pipeline.Stage("source_cache", run_source_cache, inputs=["input.mp4", transcript_dir],
+                           enabled=bool(source_key) and workflow_choice != "3"),
+            pipeline.Stage("cut", run_cut, inputs=[segments_file, transcript_dir] + video_inputs,
+                           outputs=["cuts", "subs"], enabled=workflow_choice != "3"),
+            pipeline.Stage("edit", run_edit, inputs=["cuts", segments_file], params=face_params,
+                           outputs=["final", "face_modes.json", "subs"], enabled=workflow_choice not in ("2", "3")),
+            pipeline.Stage("translate", run_translate, inputs=["subs"], outputs=["subs"],
+                           params={"target": translate_target}, enabled=bool(translate_target) and workflow_choice != "2"),
+            pipeline.Stage("adjust", run_adjust, inputs=["subs", "final", "face_modes.json"], outputs=["subs_ass"],
+                           params=sub_config, enabled=workflow_choice != "2"),
+            pipeline.Stage("burn", run_burn, inputs=["subs_ass", "final"], outputs=["burned_sub"],
+                           enabled=burn_subtitles_option and workflow_choice != "2"),
+        ]
+        if workflow_choice == "3":
+            print(i18n("Workflow 3 (Subtitles Only): Skipping Cut and Edit."))
+        if not burn_subtitles_option:
             print(i18n("Subtitle burning skipped."))
 
+        force = {s.strip() for s in (args.rerun or "").split(",") if s.strip()}
+        if video_job is not None:
+            force.add("video")  # o download em segundo plano precisa ser aguardado
+        try:
+            pipeline.run(stages, project_folder, max_workers=args.pipeline_workers, force=force)
+        except pipeline.UnknownStageError as e:
+            print(i18n("[ERROR] Unknown stage(s) in --rerun: {}. Valid stages: {}, all").format(
+                ", ".join(e.unknown), ", ".join(e.valid)))
+            sys.exit(1)
+
+        # 5. Workflow Check
+        if workflow_choice == "2":
+            print(i18n("Cut Only selected. Skipping Face Crop and Subtitles."))
+            print(i18n(f"Process completed! Check your results in: {project_folder}"))
+            sys.exit(0)
+
         # Organização Final (Opcional, pois agora já está tudo em project_folder)
         # organize_output.organize(project_folder=project_folder)
         
@@ -668,6 +839,8 @@ def main():
                     used_ai_model = api_config.get("gemini", {}).get("model", "default")
                 elif ai_backend == "g4f":
                     used_ai_model = api_config.get("g4f", {}).get("model", "default")
+                elif ai_backend == "openai":
+                    used_ai_model = api_config.get("openai", {}).get("model", "default")
             
             # Ensure sub_config exists
             current_sub_config = sub_config if 'sub_config' in locals() else get_subtitle_config(args.subtitle_config)
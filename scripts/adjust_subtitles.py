@@ -1,6 +1,13 @@
 import json
 import re
 import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scripts import cut_files
+
+# Bump when the ASS generation logic changes so cached outputs get rebuilt.
+ASS_CACHE_VERSION = 1
+ASS_CACHE_FILE = ".ass_cache.json"
 
 def format_time_ass(time_seconds):
     hours = int(time_seconds // 3600)
@@ -9,6 +16,92 @@ def format_time_ass(time_seconds):
     centiseconds = int((time_seconds % 1) * 100)
     return f"{hours:01}:{minutes:02}:{seconds:02}.{centiseconds:02}"
 
+def get_face_mode_key(filename):
+    """
+    Returns (face_modes key, index) for a subtitle JSON filename.
+    Index comes from 'outputXXX' (legacy) or 'XXX_Title' names.
+    """
+    base_name = os.path.splitext(filename)[0]
+    idx = None
+
+    match_output = re.search(r"output(\d+)", filename)
+    match_index = re.search(r"^(\d{3})_", filename)
+
+    if match_output:
+        idx = int(match_output.group(1))
+    elif match_index:
+        idx = int(match_index.group(1))
+
+    if idx is not None:
+        return f"output{str(idx).zfill(3)}", idx
+    return base_name, idx
+
+def find_timeline_path(input_path, project_folder):
+    """
+    Locates the face timeline JSON that belongs to a subtitle JSON, or None.
+    """
+    filename = os.path.basename(input_path)
+    base_name = os.path.splitext(filename)[0]
+
+    # Try renamed timeline first (e.g. 000_Title_timeline.json)
+    # Subtitle is 000_Title_processed.json -> 000_Title_timeline.json
+    renamed_timeline_name = base_name.replace("_processed", "") + "_timeline.json"
+    renamed_timeline_path = os.path.join(project_folder, "final", renamed_timeline_name)
+    if os.path.exists(renamed_timeline_path):
+        return renamed_timeline_path
+
+    # Fallback to temp timeline if idx known
+    _, idx = get_face_mode_key(filename)
+    if idx is not None:
+        temp_timeline = os.path.join(project_folder, "final", f"temp_video_no_audio_{idx}_timeline.json")
+        if os.path.exists(temp_timeline):
+            return temp_timeline
+    return None
+
+def _hash_file(path, hasher):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+
+def compute_ass_hash(input_path, project_folder, style_params, face_mode=None):
+    """
+    Hash of everything that affects a generated ASS file:
+    subtitle JSON, face timeline JSON, style parameters and static face mode.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"v{ASS_CACHE_VERSION}".encode())
+    _hash_file(input_path, hasher)
+
+    timeline_path = find_timeline_path(input_path, project_folder)
+    hasher.update(b"|timeline|")
+    if timeline_path:
+        _hash_file(timeline_path, hasher)
+
+    hasher.update(b"|style|")
+    hasher.update(json.dumps(style_params, sort_keys=True, default=str).encode("utf-8"))
+    hasher.update(f"|face_mode|{face_mode}".encode("utf-8"))
+    return hasher.hexdigest()
+
+def load_ass_cache(output_dir):
+    cache_path = os.path.join(output_dir, ASS_CACHE_FILE)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[WARN] Could not read ASS cache ({e}). Rebuilding all.")
+    return {}
+
+def save_ass_cache(output_dir, cache):
+    cache_path = os.path.join(output_dir, ASS_CACHE_FILE)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"[WARN] Could not save ASS cache: {e}")
+
 def generate_ass_from_file(input_path, output_path, project_folder, 
                            base_color, base_size, highlight_size, highlight_color, 
                            words_per_block, gap_limit, mode, vertical_position, alignment, 
@@ -19,49 +112,20 @@ def generate_ass_from_file(input_path, output_path, project_folder,
     Generates a single ASS file from a JSON input.
     """
     
-    # 1. Load Timeline Data (if exists)
     # 1. Load Timeline Data (if exists)
     filename = os.path.basename(input_path)
-    base_name = os.path.splitext(filename)[0]
-
-    # Try renamed timeline first (e.g. 000_Title_timeline.json)
-    # Subtitle is 000_Title_processed.json -> 000_Title_timeline.json
-    renamed_timeline_name = base_name.replace("_processed", "") + "_timeline.json"
-    renamed_timeline_path = os.path.join(project_folder, "final", renamed_timeline_name)
+    key, idx = get_face_mode_key(filename)
 
     timeline_data = None
-    idx = None
-
-    if os.path.exists(renamed_timeline_path):
+    timeline_path = find_timeline_path(input_path, project_folder)
+    if timeline_path:
         try:
-             with open(renamed_timeline_path, "r") as tf:
+             with open(timeline_path, "r") as tf:
                  timeline_data = json.load(tf)
         except: pass
-    
-    # Check for Index (outputXXX or XXX_Title)
-    match_output = re.search(r"output(\d+)", filename)
-    match_index = re.search(r"^(\d{3})_", filename)
-
-    if match_output:
-        idx = int(match_output.group(1))
-    elif match_index:
-        idx = int(match_index.group(1))
-
-    # Fallback to temp timeline if not already loaded and idx known
-    if not timeline_data and idx is not None:
-         csv_timeline = os.path.join(project_folder, "final", f"temp_video_no_audio_{idx}_timeline.json")
-         if os.path.exists(csv_timeline):
-             try:
-                 with open(csv_timeline, "r") as tf:
-                     timeline_data = json.load(tf)
-             except: pass
 
     # 2. Determine Style Overrides (Face Mode)
     # Determine static alignment (fallback)
-    key = base_name
-    if idx is not None:
-        key = f"output{str(idx).zfill(3)}"
-    
     current_alignment = alignment
     current_vertical_position = vertical_position
     
@@ -72,14 +136,13 @@ def generate_ass_from_file(input_path, output_path, project_folder,
 
     # 3. Load JSON
     try:
-        with open(input_path, "r", encoding="utf-8") as file:
-            json_data = json.load(file)
+        json_data = cut_files.read_cut(input_path)
         
         segments_count = len(json_data.get('segments', []))
         print(f"[DEBUG] Loaded {input_path}: Found {segments_count} segments.")
     except Exception as e:
         print(f"[ERROR] Loading JSON {input_path}: {e}")
-        return
+        return False
 
     # 4. Generate Content
     header_ass = f"""[Script Info]
@@ -216,9 +279,10 @@ def generate_ass_from_file(input_path, output_path, project_folder,
         print(f"[WARN] No dialogue lines written for {input_path}")
     else:
         print(f"[DEBUG] Wrote {total_lines_written} lines to {output_path}")
+    return True
 
 
-def adjust(base_color, base_size, highlight_size, highlight_color, words_per_block, gap_limit, mode, vertical_position, alignment, font, outline_color, shadow_color, bold, italic, underline, strikeout, border_style, outline_thickness, shadow_size, uppercase=False, project_folder="tmp", **kwargs):
+def adjust(base_color, base_size, highlight_size, highlight_color, words_per_block, gap_limit, mode, vertical_position, alignment, font, outline_color, shadow_color, bold, italic, underline, strikeout, border_style, outline_thickness, shadow_size, uppercase=False, project_folder="tmp", force=False, max_workers=None, **kwargs):
     
     # Input and Output Directories
     input_dir = os.path.join(project_folder, "subs")
@@ -240,25 +304,83 @@ def adjust(base_color, base_size, highlight_size, highlight_color, words_per_blo
         except Exception as e:
             print(f"Could not load face modes: {e}")
 
-    # Process all JSON files in input directory
     # Process all JSON files in input directory
     if not os.path.exists(input_dir):
         print(f"[ERROR] Subtitle folder missing: {input_dir}")
         raise FileNotFoundError(f"Subtitle folder missing at {input_dir}. Ensure transcription completed successfully.")
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".json"):
-            input_path = os.path.join(input_dir, filename)
-            output_filename = os.path.splitext(filename)[0] + ".ass"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            generate_ass_from_file(input_path, output_path, project_folder, 
-                           base_color, base_size, highlight_size, highlight_color, 
-                           words_per_block, gap_limit, mode, vertical_position, alignment, 
-                           font, outline_color, shadow_color, bold, italic, underline, 
-                           strikeout, border_style, outline_thickness, shadow_size, uppercase,
-                           face_modes, remove_punctuation)
+    style_args = (base_color, base_size, highlight_size, highlight_color,
+                  words_per_block, gap_limit, mode, vertical_position, alignment,
+                  font, outline_color, shadow_color, bold, italic, underline,
+                  strikeout, border_style, outline_thickness, shadow_size, uppercase)
+    style_params = list(style_args) + [remove_punctuation]
 
-            print(f"Processed file: {filename} -> {output_filename}")
+    cache = {} if force else load_ass_cache(output_dir)
+    new_cache = {}
+    jobs = []
+
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.endswith(".json"):
+            continue
+        input_path = os.path.join(input_dir, filename)
+        output_filename = os.path.splitext(filename)[0] + ".ass"
+        output_path = os.path.join(output_dir, output_filename)
+
+        key, _ = get_face_mode_key(filename)
+        try:
+            digest = compute_ass_hash(input_path, project_folder, style_params, face_modes.get(key))
+        except Exception as e:
+            print(f"[WARN] Could not hash {filename}: {e}")
+            digest = None
+
+        if digest and cache.get(output_filename) == digest and os.path.exists(output_path):
+            print(f"Unchanged, skipping: {filename}")
+            new_cache[output_filename] = digest
+            continue
 
-    print("All JSON files processed and converted to ASS.")
\ No newline at end of file
+        jobs.append((filename, input_path, output_path, output_filename, digest))
+
+    if not jobs:
+        save_ass_cache(output_dir, new_cache)
+        print("All ASS files are up to date.")
+        return
+
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    def job_args(input_path, output_path):
+        return (input_path, output_path, project_folder) + style_args + (face_modes, remove_punctuation)
+
+    if max_workers <= 1 or len(jobs) == 1:
+        for filename, input_path, output_path, output_filename, digest in jobs:
+            if generate_ass_from_file(*job_args(input_path, output_path)) and digest:
+                new_cache[output_filename] = digest
+            print(f"Processed file: {filename} -> {output_filename}")
+    else:
+        print(f"Compiling {len(jobs)} ASS files with {max_workers} workers...")
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(generate_ass_from_file, *job_args(input_path, output_path)): (filename, output_filename, digest)
+                    for filename, input_path, output_path, output_filename, digest in jobs
+                }
+                for future in as_completed(futures):
+                    filename, output_filename, digest = futures[future]
+                    try:
+                        if future.result() and digest:
+                            new_cache[output_filename] = digest
+                        print(f"Processed file: {filename} -> {output_filename}")
+                    except Exception as e:
+                        print(f"[ERROR] Failed to generate {output_filename}: {e}")
+        except Exception as e:
+            # Process pools can fail in restricted environments (e.g. no fork/spawn); run sequentially
+            print(f"[WARN] Process pool unavailable ({e}). Processing sequentially...")
+            for filename, input_path, output_path, output_filename, digest in jobs:
+                if output_filename in new_cache:
+                    continue
+                if generate_ass_from_file(*job_args(input_path, output_path)) and digest:
+                    new_cache[output_filename] = digest
+                print(f"Processed file: {filename} -> {output_filename}")
+
+    save_ass_cache(output_dir, new_cache)
+    print("All JSON files processed and converted to ASS.")
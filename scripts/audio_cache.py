@@ -0,0 +1,96 @@
+import os
+import json
+import subprocess
+import numpy as np
+
+# Cache do áudio decodificado do projeto.
+#
+# VIRALS/<projeto>/audio.f32   -> PCM float32 mono 16 kHz (mesmo formato do whisperx.load_audio)
+# VIRALS/<projeto>/audio.json  -> origem (caminho, tamanho, mtime), sample rate e nº de amostras
+#
+# O input.mp4 é decodificado uma única vez; transcrição, alinhamento, streaming e
+# análises de áudio abrem o arquivo com mmap e recortam por tempo sem copiar.
+
+SAMPLE_RATE = 16000
+AUDIO_FILE = "audio.f32"
+META_FILE = "audio.json"
+
+def _paths(project_folder):
+    return os.path.join(project_folder, AUDIO_FILE), os.path.join(project_folder, META_FILE)
+
+def _source_info(input_file):
+    st = os.stat(input_file)
+    return {"source": os.path.abspath(input_file), "size": st.st_size, "mtime": st.st_mtime}
+
+def is_valid(project_folder, input_file=None):
+    """True se o cache existe, está completo e (se input_file for dado) corresponde a ele."""
+    audio_path, meta_path = _paths(project_folder)
+    if not (os.path.exists(audio_path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return False
+    if os.path.getsize(audio_path) != meta.get("samples", -1) * 4:
+        return False
+    if input_file is not None and os.path.exists(input_file):
+        info = _source_info(input_file)
+        if meta.get("size") != info["size"] or meta.get("mtime") != info["mtime"]:
+            return False
+    return True
+
+def ensure_audio(input_file, project_folder=None):
+    """Decodifica input_file para audio.f32 se o cache não existir ou estiver desatualizado."""
+    project_folder = project_folder or os.path.dirname(input_file) or "."
+    audio_path, meta_path = _paths(project_folder)
+    if is_valid(project_folder, input_file):
+        return audio_path
+
+    print(f"Decodificando áudio para cache: {audio_path}")
+    tmp_path = audio_path + ".tmp"
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-hide_banner",
+        "-i", input_file,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le", tmp_path,
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+    meta = _source_info(input_file)
+    meta.update({"sample_rate": SAMPLE_RATE, "samples": os.path.getsize(tmp_path) // 4})
+    os.replace(tmp_path, audio_path)
+    # audio.json também via temporário: pode ser hardlink compartilhado com o cache de fontes
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    return audio_path
+
+def open_audio(project_folder, input_file=None):
+    """
+    Abre o cache com mmap (somente leitura). None se não existir ou, com input_file,
+    se foi decodificado de outra fonte (ex: input.m4a do modo áudio primeiro).
+    """
+    if not is_valid(project_folder, input_file):
+        return None
+    audio_path, _ = _paths(project_folder)
+    if os.path.getsize(audio_path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(audio_path, dtype=np.float32, mode="r")
+
+def load_audio(input_file, project_folder=None):
+    """
+    Substituto de whisperx.load_audio(): decodifica uma vez e devolve o memmap.
+    """
+    project_folder = project_folder or os.path.dirname(input_file) or "."
+    ensure_audio(input_file, project_folder)
+    return open_audio(project_folder, input_file)
+
+def audio_slice(audio, start, end=None):
+    """Recorte [start, end] em segundos. É uma view do memmap (não copia)."""
+    first = max(0, int(round(start * SAMPLE_RATE)))
+    last = len(audio) if end is None else min(len(audio), int(round(end * SAMPLE_RATE)))
+    return audio[first:max(first, last)]
+
+def duration(audio):
+    return len(audio) / SAMPLE_RATE
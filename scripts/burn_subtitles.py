@@ -49,7 +49,14 @@ def burn_video_file(video_path, subtitle_path, output_path):
     except Exception as e:
         return False, str(e)
 
-def burn(project_folder="tmp"):
+def is_up_to_date(output_path, *sources):
+    """True if output_path exists and is newer than every source file."""
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return False
+    output_mtime = os.path.getmtime(output_path)
+    return all(output_mtime >= os.path.getmtime(src) for src in sources if os.path.exists(src))
+
+def burn(project_folder="tmp", force=False):
     # Converter para absoluto para não ter erro no filtro do ffmpeg
     if project_folder and not os.path.isabs(project_folder):
         project_folder_abs = os.path.abspath(project_folder)
@@ -96,9 +103,15 @@ def burn(project_folder="tmp"):
             if os.path.exists(subtitle_file):
                 # Define o caminho de saída para o vídeo com legendas
                 output_file = os.path.join(output_folder, f"{video_name}_subtitled.mp4")
+                video_path = os.path.join(videos_folder, video_file)
+
+                # adjust_subtitles só reescreve o .ass quando algo mudou, então o mtime basta aqui
+                if not force and is_up_to_date(output_file, video_path, subtitle_file):
+                    print(f"Up to date, skipping: {video_name}")
+                    continue
 
                 print(f"Burning: {video_name}...")
-                success, msg = burn_video_file(os.path.join(videos_folder, video_file), subtitle_file, output_file)
+                success, msg = burn_video_file(video_path, subtitle_file, output_file)
                 if success:
                     print(f"Done: {output_file}")
                 else:
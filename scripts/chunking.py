@@ -0,0 +1,96 @@
+import os
+
+# Chunking do transcript por tokens para a seleção de segmentos.
+#
+# Em vez de janelas fixas de caracteres, empacota segmentos inteiros do transcript
+# até o orçamento de tokens do modelo (contexto - template do prompt - resposta).
+# A sobreposição entre chunks é por tempo (segundos), não por caracteres.
+
+# llama_cpp e tiktoken só são importados quando o contador de tokens é pedido.
+
+# Contexto / reserva de resposta por backend (tokens). Podem ser sobrescritos em api_config.json.
+DEFAULT_CONTEXT = {"gemini": 1048576, "g4f": 16000, "local": 8192, "openai": 8192, "manual": 32000}
+DEFAULT_OUTPUT_RESERVE = {"gemini": 8192, "g4f": 4096, "local": 4096, "openai": 4096, "manual": 4096}
+DEFAULT_OVERLAP_SECONDS = 30
+# Margem de segurança para a aproximação de tokens
+SAFETY = 0.9
+
+def approx_tokens(text):
+    """Aproximação rápida: ~4 caracteres por token (mínimo 1)."""
+    return max(1, (len(text) + 3) // 4)
+
+def get_token_counter(ai_mode, model_name=None, model_path=None):
+    """
+    Retorna uma função text -> nº de tokens.
+    local: tokenizer do próprio GGUF (carregado com vocab_only, sem pesos).
+    g4f/openai: tiktoken se instalado. Senão (e para Gemini): aproximação local.
+    """
+    if ai_mode == "local" and model_path and os.path.exists(model_path):
+        try:
+            from llama_cpp import Llama
+            vocab = Llama(model_path=model_path, vocab_only=True, verbose=False)
+            return lambda text: len(vocab.tokenize(text.encode("utf-8"), add_bos=False))
+        except Exception as e:
+            print(f"[WARN] Tokenizer do modelo local indisponível ({e}). Usando aproximação.")
+
+    if ai_mode in ("g4f", "openai"):
+        try:
+            import tiktoken
+        except ImportError:
+            tiktoken = None
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.encoding_for_model(model_name or "gpt-4o-mini")
+            except Exception:
+                encoding = tiktoken.get_encoding("o200k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+    return approx_tokens
+
+def token_budget(ai_mode, template_tokens, backend_config=None, char_cap=None):
+    """
+    Tokens disponíveis para o transcript em cada chunk.
+    char_cap: chunk_size legado (caracteres) vira um teto de ~chars/4 tokens.
+    """
+    backend_config = backend_config or {}
+    context = int(backend_config.get("context_tokens") or DEFAULT_CONTEXT.get(ai_mode, 8192))
+    reserve = int(backend_config.get("max_output_tokens") or DEFAULT_OUTPUT_RESERVE.get(ai_mode, 4096))
+    budget = int((context - reserve) * SAFETY) - template_tokens
+    if char_cap:
+        budget = min(budget, int(char_cap) // 4)
+    return max(256, budget)
+
+def pack_segments(segments, count_tokens, budget, overlap_seconds=DEFAULT_OVERLAP_SECONDS, tag_tokens=4):
+    """
+    Agrupa segmentos inteiros em chunks de até `budget` tokens.
+    Cada chunk seguinte recomeça no primeiro segmento que inicia até
+    `overlap_seconds` antes do fim do chunk anterior.
+    Retorna lista de (first, last) com last exclusivo.
+    """
+    if not segments:
+        return []
+
+    # Custo de cada segmento: texto + tag de tempo "(XXs) " que o preprocess pode inserir
+    costs = [count_tokens(seg.get("text", "").strip() + " ") + tag_tokens for seg in segments]
+
+    ranges = []
+    first = 0
+    n = len(segments)
+    while first < n:
+        total = 0
+        last = first
+        while last < n and (last == first or total + costs[last] <= budget):
+            total += costs[last]
+            last += 1
+        ranges.append((first, last))
+        if last >= n:
+            break
+
+        # Sobreposição por tempo, sempre avançando pelo menos um segmento
+        overlap_start = segments[last - 1].get("end", 0) - overlap_seconds
+        next_first = last
+        while next_first - 1 > first and segments[next_first - 1].get("start", 0) >= overlap_start:
+            next_first -= 1
+        # Nunca repete mais que metade do chunk anterior
+        first = max(first + 1, first + (last - first) // 2, next_first)
+    return ranges
@@ -4,34 +4,27 @@ import re
 import sys
 import time
 import ast
-import io
+from bisect import bisect_left, bisect_right
+from scripts import llm_dispatch, llm_cache, llm_backends, json_stream, chunking
+from scripts.lazy_import import lazy_module
+
+# numpy só entra quando o transcript / pré-ranking são de fato usados
+transcript_store = lazy_module("scripts.transcript_store")
+prescore = lazy_module("scripts.prescore")
 
 # Configura stdout para evitar erros de encoding no Windows (substitui caracteres inválidos por ?)
-if sys.stdout and hasattr(sys.stdout, 'buffer'):
+if sys.stdout and hasattr(sys.stdout, 'reconfigure'):
     try:
-        # Mantém encoding original mas ignora erros (substitui por ?)
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding=sys.stdout.encoding or 'utf-8', errors='replace', line_buffering=True)
+        # Mantém encoding original mas ignora erros (substitui por ?).
+        # reconfigure() em vez de um novo TextIOWrapper: o wrapper antigo, ao ser coletado,
+        # fechava o buffer compartilhado (quebrava quem importa o módulo, como os testes)
+        sys.stdout.reconfigure(errors='replace', line_buffering=True)
     except:
         pass
 
-# Tenta importar bibliotecas de IA opcionalmente
-try:
-    import google.generativeai as genai
-    HAS_GEMINI = True
-except ImportError:
-    HAS_GEMINI = False
-
-try:
-    import g4f
-    HAS_G4F = True
-except ImportError:
-    HAS_G4F = False
-
-try:
-    from llama_cpp import Llama
-    HAS_LLAMA_CPP = True
-except ImportError:
-    HAS_LLAMA_CPP = False
+# Contexto do modelo local (llama.cpp) e limite da resposta
+LOCAL_N_CTX = 8192
+LOCAL_MAX_TOKENS = 4096
 
 def clean_json_response(response_text):
     """
@@ -197,94 +190,27 @@ def preprocess_transcript_for_ai(segments):
     return full_text.strip()
 
 def call_gemini(prompt, api_key, model_name='gemini-2.5-flash-lite-preview-09-2025'):
-    if not HAS_GEMINI:
-        raise ImportError("A biblioteca 'google-generativeai' não está instalada. Instale com: pip install google-generativeai")
-    
-    genai.configure(api_key=api_key)
-    # Usando modelo definido na config ou o padrão
-    model = genai.GenerativeModel(model_name) 
-    
-    max_retries = 5
-    base_wait = 30
-
-    for attempt in range(max_retries):
-        try:
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            error_str = str(e)
-            if "429" in error_str or "Quota exceeded" in error_str:
-                wait_time = base_wait * (attempt + 1)
-                
-                match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
-                if match:
-                    wait_time = float(match.group(1)) + 5.0
-                
-                print(f"[429] Quota Exceeded. Waiting {wait_time:.2f}s before retry {attempt+1}/{max_retries}...", flush=True)
-                time.sleep(wait_time)
-                continue
-            else:
-                print(f"Erro na API do Gemini: {e}")
-                return "{}"
-    
-    print("Falha após max retries no Gemini.")
-    return "{}"
+    return llm_backends.call_with_retry(llm_backends.GeminiBackend(api_key, model_name=model_name), prompt)
 
 def call_g4f(prompt, model_name="gpt-4o-mini"):
-    if not HAS_G4F:
-        raise ImportError("A biblioteca 'g4f' não está instalada. Instale com: pip install g4f")
-    
-    max_retries = 3
-    base_wait = 5
-    
-    for attempt in range(max_retries):
-        try:
-            response = g4f.ChatCompletion.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            
-            if isinstance(response, dict):
-                if 'error' in response:
-                    raise Exception(f"API Error: {response['error']}")
-                if 'choices' in response and isinstance(response['choices'], list):
-                    if len(response['choices']) > 0:
-                         content = response['choices'][0].get('message', {}).get('content', '')
-                         if content:
-                             return content
-                if not response:
-                     raise ValueError("Empty Dict response")
-
-                return json.dumps(response)
-
-            if not response:
-                print(f"[WARN] G4F retornou resposta vazia. Tentativa {attempt+1}/{max_retries}")
-                time.sleep(base_wait)
-                continue
-            
-            if isinstance(response, str):
-                return response
-
-            try:
-                return json.dumps(response, ensure_ascii=False)
-            except:
-                return str(response)
-            
-        except Exception as e:
-            print(f"[WARN] Erro na API do G4F (Tentativa {attempt+1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                wait_time = base_wait * (2 ** attempt)
-                time.sleep(wait_time)
-            
-    print(f"Falha crítica após {max_retries} tentativas no G4F.")
-    return "{}"
+    return llm_backends.call_with_retry(llm_backends.G4FBackend(model_name=model_name), prompt)
 
 def load_transcript(project_folder):
-    """Parses input.tsv or input.srt from the project folder."""
+    """Loads segment-level transcript from the transcript store, or parses input.tsv / input.srt."""
     input_tsv = os.path.join(project_folder, 'input.tsv')
     input_srt = os.path.join(project_folder, 'input.srt')
 
     transcript_segments = []
+
+    # Transcript store (canonical, no parsing needed)
+    store = transcript_store.open_store(project_folder)
+    if store is not None:
+        transcript_segments = [
+            {'start': seg['start'], 'end': seg['end'], 'text': seg['text'].strip()}
+            for seg in store.iter_segments(with_words=False)
+        ]
+        if transcript_segments:
+            return transcript_segments
     
     # Try to load TSV first (more reliable time)
     if os.path.exists(input_tsv):
@@ -328,6 +254,71 @@ def load_transcript(project_folder):
     
     return transcript_segments
 
+_NORMALIZE_RE = re.compile(r'[^\w\s]')
+
+def normalize_text(text):
+    """Minúsculas, sem pontuação e com espaços colapsados (usado no matching)."""
+    return " ".join(_NORMALIZE_RE.sub('', (text or '').lower()).split())
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_search_index(transcript_segments):
+    """
+    Índice do transcript montado uma vez por execução:
+    inícios ordenados (bisect), texto normalizado e trigramas de cada segmento.
+    """
+    return {
+        'starts': [s['start'] for s in transcript_segments],
+        'texts': [normalize_text(s['text']) for s in transcript_segments],
+        'trigrams': [_trigrams(normalize_text(s['text'])) for s in transcript_segments],
+    }
+
+def closest_segment(index, ref_time):
+    """Índice do segmento com início mais próximo de ref_time (empate: o primeiro)."""
+    starts = index['starts']
+    if not starts:
+        return 0
+    i = bisect_left(starts, ref_time)
+    if i == 0:
+        return 0
+    if i >= len(starts):
+        return len(starts) - 1
+    # Primeiro segmento com esse início (vários podem ter o mesmo start)
+    before = bisect_left(starts, starts[i - 1])
+    return before if ref_time - starts[i - 1] <= starts[i] - ref_time else i
+
+# No fuzzy, segmentos com menos que isso do tamanho do alvo são ignorados:
+# "You see." tem poucos trigramas e quase todos aparecem em qualquer frase parecida
+MIN_LENGTH_RATIO = 0.5
+
+def find_text(index, target, first, last, min_score=0.7):
+    """
+    Procura target (já normalizado) nos segmentos [first, last).
+    1º: primeiro segmento que contém / está contido no alvo (comportamento original).
+    2º: maior fração dos trigramas do alvo presentes no segmento (tolera erros de
+    transcrição / da IA). Retorna o índice ou -1.
+    """
+    if not target:
+        return -1
+    texts = index['texts']
+    for i in range(first, last):
+        if target in texts[i] or (texts[i] and texts[i] in target):
+            return i
+
+    target_grams = _trigrams(target)
+    best, best_score = -1, 0.0
+    for i in range(first, last):
+        grams = index['trigrams'][i]
+        if not grams or len(texts[i]) < len(target) * MIN_LENGTH_RATIO:
+            continue
+        # Normalizado pelo alvo: um segmento curto não pontua alto só por ter poucos trigramas
+        score = len(target_grams & grams) / len(target_grams)
+        if score >= min_score and score > best_score:
+            best, best_score = i, score
+    return best
+
 def process_segments(raw_segments, transcript_segments, min_duration, max_duration, output_count=None):
     """
     Aligns raw AI segments (with reference tags) to actual transcript timestamps.
@@ -348,6 +339,9 @@ def process_segments(raw_segments, transcript_segments, min_duration, max_durati
     processed_segments = []
     
     print(f"[DEBUG] Matching {len(all_segments)} raw segments to timestamps...")
+
+    index = build_search_index(transcript_segments)
+    n_segments = len(transcript_segments)
     
     for seg in all_segments:
         try:
@@ -365,61 +359,33 @@ def process_segments(raw_segments, transcript_segments, min_duration, max_durati
                 ref_time_val = 0
                 
             # Find segment index closest to ref_time
-            start_idx = 0
-            min_diff = 999999
-            for i, s in enumerate(transcript_segments):
-                diff = abs(s['start'] - ref_time_val)
-                if diff < min_diff:
-                    min_diff = diff
-                    start_idx = i
-                if s['start'] > ref_time_val + 10: 
-                    break
+            start_idx = closest_segment(index, ref_time_val)
             
             # Backtrack
             start_idx = max(0, start_idx - 5)
             
             # 2. Find Exact Start Text
-            start_text_target = seg.get('start_text', '').lower().strip()
-            # Normalize
-            start_text_target = re.sub(r'[^\w\s]', '', start_text_target)
+            start_text_target = normalize_text(seg.get('start_text', ''))
             
             final_start_time = -1
-            match_start_idx = -1
-            
-            # Search window
-            search_limit = min(len(transcript_segments), start_idx + 50)
-            
-            for i in range(start_idx, search_limit):
-                s_text = transcript_segments[i]['text'].lower()
-                s_text = re.sub(r'[^\w\s]', '', s_text)
-                
-                # Check for partial match
-                if start_text_target and (start_text_target in s_text or s_text in start_text_target):
-                    final_start_time = transcript_segments[i]['start']
-                    match_start_idx = i
-                    break
+            match_start_idx = find_text(index, start_text_target, start_idx, min(n_segments, start_idx + 50))
+            if match_start_idx != -1:
+                final_start_time = transcript_segments[match_start_idx]['start']
             
             # Fallback
             if final_start_time == -1:
-                final_start_time = transcript_segments[start_idx]['start'] if start_idx < len(transcript_segments) else ref_time_val
+                final_start_time = transcript_segments[start_idx]['start'] if start_idx < n_segments else ref_time_val
                 match_start_idx = start_idx
 
             # 3. Find End Text
-            end_text_target = seg.get('end_text', '').lower().strip()
-            end_text_target = re.sub(r'[^\w\s]', '', end_text_target)
+            end_text_target = normalize_text(seg.get('end_text', ''))
             
             final_end_time = -1
             
             if match_start_idx != -1:
-                search_end_limit = min(len(transcript_segments), match_start_idx + 200)
-                
-                for i in range(match_start_idx, search_end_limit):
-                    s_text = transcript_segments[i]['text'].lower()
-                    s_text = re.sub(r'[^\w\s]', '', s_text)
-                    
-                    if end_text_target and (end_text_target in s_text or s_text in end_text_target):
-                         final_end_time = transcript_segments[i]['end']
-                         break
+                end_idx = find_text(index, end_text_target, match_start_idx, min(n_segments, match_start_idx + 200))
+                if end_idx != -1:
+                    final_end_time = transcript_segments[end_idx]['end']
             
             # Fallback End Time
             if final_end_time == -1:
@@ -456,14 +422,20 @@ def process_segments(raw_segments, transcript_segments, min_duration, max_durati
             continue
 
     # Deduplication
+    # Intervalos aceitos ficam ordenados por início; só os que começam em
+    # (s1 - maior duração aceita, e1) podem cruzar o candidato.
     unique_segments = []
+    accepted_starts = []
+    accepted = []
+    longest = 0.0
     processed_segments.sort(key=lambda x: int(x.get('score', 0)), reverse=True)
     
     for candidate in processed_segments:
         is_dup = False
-        for existing in unique_segments:
-            s1, e1 = candidate['start_time'], candidate['end_time']
-            # Simple float equality isn't safe, but max/min handles it
+        s1, e1 = candidate['start_time'], candidate['end_time']
+        lo = bisect_left(accepted_starts, s1 - longest)
+        hi = bisect_left(accepted_starts, e1)
+        for existing in accepted[lo:hi]:
             s2, e2 = existing['start_time'], existing['end_time']
             
             overlap_start = max(s1, s2)
@@ -477,6 +449,10 @@ def process_segments(raw_segments, transcript_segments, min_duration, max_durati
                     break
         if not is_dup:
             unique_segments.append(candidate)
+            pos = bisect_right(accepted_starts, s1)
+            accepted_starts.insert(pos, s1)
+            accepted.insert(pos, candidate)
+            longest = max(longest, e1 - s1)
 
     all_segments = unique_segments
     print(f"[DEBUG] Finished processing. {len(all_segments)} segments valid.")
@@ -498,7 +474,14 @@ def process_segments(raw_segments, transcript_segments, min_duration, max_durati
     return final_result
 
 
-def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, ai_mode="manual", api_key=None, project_folder="tmp", chunk_size_arg=None, model_name_arg=None):
+def resolve_local_model(base_dir, model_name):
+    """Caminho do GGUF: models/<nome> ou um caminho direto."""
+    model_path = os.path.join(base_dir, 'models', model_name)
+    if not os.path.exists(model_path) and os.path.exists(model_name):
+        return model_name
+    return model_path
+
+def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, ai_mode="manual", api_key=None, project_folder="tmp", chunk_size_arg=None, model_name_arg=None, use_cache=True, prescore_top_k=None):
     quantidade_de_virals = num_segments
 
     # 1. Load Transcript
@@ -518,11 +501,23 @@ def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, ai_mode
         "gemini": {
             "api_key": "",
             "model": "gemini-2.5-flash-lite-preview-09-2025",
-            "chunk_size": 15000
+            "rpm": 15,
+            "tpm": 250000,
+            "max_concurrency": 4
         },
         "g4f": {
             "model": "gpt-4o-mini",
-            "chunk_size": 2000
+            "rpm": 10,
+            "tpm": 0,
+            "max_concurrency": 3
+        },
+        "openai": {
+            "base_url": "http://127.0.0.1:8080/v1",
+            "model": "default",
+            "api_key": "",
+            "rpm": 0,
+            "tpm": 0,
+            "max_concurrency": 4
         }
     }
 
@@ -532,29 +527,34 @@ def create(num_segments, viral_mode, themes, tempo_minimo, tempo_maximo, ai_mode
                 loaded_config = json.load(f)
                 if "gemini" in loaded_config: config["gemini"].update(loaded_config["gemini"])
                 if "g4f" in loaded_config: config["g4f"].update(loaded_config["g4f"])
+                if "openai" in loaded_config: config["openai"].update(loaded_config["openai"])
                 if "selected_api" in loaded_config: config["selected_api"] = loaded_config["selected_api"]
+                if "llm_cache_mb" in loaded_config: config["llm_cache_mb"] = loaded_config["llm_cache_mb"]
         except Exception as e:
             print(f"Erro ao ler api_config.json: {e}")
 
     # Config Vars
-    current_chunk_size = 15000
+    cache_max_mb = config.get("llm_cache_mb", llm_cache.DEFAULT_MAX_MB)
     model_name = ""
+    # chunk_size (caracteres) só limita os chunks se foi definido de propósito (--chunk-size
+    # ou no api_config.json); sem ele, o tamanho sai só do orçamento de tokens do modelo
+    backend_chunk = config[ai_mode].get("chunk_size") if ai_mode in ("gemini", "g4f", "openai") else None
+    current_chunk_size = chunk_size_arg if chunk_size_arg and int(chunk_size_arg) > 0 else (backend_chunk or None)
     
     if ai_mode == "gemini":
-        cfg_chunk = config["gemini"].get("chunk_size", 15000)
-        current_chunk_size = chunk_size_arg if chunk_size_arg and int(chunk_size_arg) > 0 else cfg_chunk
         cfg_model = config["gemini"].get("model", "gemini-2.5-flash-lite-preview-09-2025")
         model_name = model_name_arg if model_name_arg else cfg_model
         if not api_key: api_key = config["gemini"].get("api_key", "")
             
     elif ai_mode == "g4f":
-        cfg_chunk = config["g4f"].get("chunk_size", 2000)
-        current_chunk_size = chunk_size_arg if chunk_size_arg and int(chunk_size_arg) > 0 else cfg_chunk
         cfg_model = config["g4f"].get("model", "gpt-4o-mini")
         model_name = model_name_arg if model_name_arg else cfg_model
 
+    elif ai_mode == "openai":
+        model_name = model_name_arg if model_name_arg else config["openai"].get("model", "default")
+        if not api_key: api_key = config["openai"].get("api_key", "")
+
     elif ai_mode == "local":
-        current_chunk_size = chunk_size_arg if chunk_size_arg and int(chunk_size_arg) > 0 else 3000
         model_name = model_name_arg if model_name_arg else ""
 
     system_prompt_template = ""
@@ -589,51 +589,18 @@ OUTPUT JSON ONLY:
             }
         '''
 
-    # Chunking
-    chunk_size = int(current_chunk_size)
-    overlap_size = max(1000, int(chunk_size * 0.1))
-    
-    chunks = []
-    start = 0
-    content_len = len(content)
-
-    print(f"[DEBUG] Chunking content (Size: {content_len}) with Chunk Size: {chunk_size} and Overlap: {overlap_size}")
-
-    while start < content_len:
-        end = min(start + chunk_size, content_len)
-        if end < content_len:
-            last_space = content.rfind(' ', start, end)
-            if last_space != -1 and last_space > start:
-                end = last_space
-        chunk_text = content[start:end]
-        if chunk_text.strip():
-            chunks.append(chunk_text)
-        if end >= content_len:
-            break
-        next_start = max(start + 1, end - overlap_size)
-        safe_space = content.rfind(' ', start, next_start)
-        if safe_space != -1:
-            start = safe_space + 1
-        else:
-            start = next_start
-
     if viral_mode:
         virality_instruction = f"""analyze the segment for potential virality and identify {quantidade_de_virals} most viral segments from the transcript"""
     else:
         virality_instruction = f"""analyze the segment for potential virality and identify {quantidade_de_virals} the best parts based on the list of themes {themes}."""
 
-    output_texts = []
-    for i, chunk in enumerate(chunks):
-        context_instruction = ""
-        if len(chunks) > 1:
-            context_instruction = f"Part {i+1} of {len(chunks)}. "
-        
+    def render_prompt(chunk, context_instruction, min_duration, max_duration):
         try:
-            prompt = system_prompt_template.format(
+            return system_prompt_template.format(
                 context_instruction=context_instruction,
                 virality_instruction=virality_instruction,
-                min_duration=tempo_minimo,
-                max_duration=tempo_maximo,
+                min_duration=min_duration,
+                max_duration=max_duration,
                 transcript_chunk=chunk,
                 json_template=json_template,
                 amount=quantidade_de_virals
@@ -642,13 +609,59 @@ OUTPUT JSON ONLY:
             prompt = system_prompt_template
             prompt = prompt.replace("{context_instruction}", context_instruction)
             prompt = prompt.replace("{virality_instruction}", virality_instruction)
-            prompt = prompt.replace("{min_duration}", str(tempo_minimo))
-            prompt = prompt.replace("{max_duration}", str(tempo_maximo))
+            prompt = prompt.replace("{min_duration}", str(min_duration))
+            prompt = prompt.replace("{max_duration}", str(max_duration))
             prompt = prompt.replace("{transcript_chunk}", chunk)
             prompt = prompt.replace("{json_template}", json_template)
             prompt = prompt.replace("{amount}", str(quantidade_de_virals))
+            return prompt
+
+    # Chunking por tokens: segmentos inteiros até o orçamento de contexto do modelo,
+    # descontando o template do prompt e a resposta. Sobreposição por tempo.
+    local_model_path = resolve_local_model(base_dir, model_name) if ai_mode == "local" else None
+    count_tokens = chunking.get_token_counter(ai_mode, model_name, local_model_path)
+    if ai_mode in ("gemini", "g4f", "openai"):
+        backend_cfg = config[ai_mode]
+    else:
+        backend_cfg = {"context_tokens": LOCAL_N_CTX, "max_output_tokens": LOCAL_MAX_TOKENS}
+    template_tokens = count_tokens(render_prompt("", "Part 99 of 99. ", tempo_minimo, tempo_maximo))
+    budget = chunking.token_budget(ai_mode, template_tokens, backend_cfg, char_cap=current_chunk_size)
+    overlap_seconds = backend_cfg.get("chunk_overlap_seconds", chunking.DEFAULT_OVERLAP_SECONDS)
+    llm_segments = transcript_segments
+    if prescore_top_k:
+        # Pré-ranking local: só as top-K janelas (com contexto) vão para a IA
+        selected = prescore.select_windows(transcript_segments, tempo_minimo, tempo_maximo, int(prescore_top_k),
+                                           themes=None if viral_mode else themes, project_folder=project_folder)
+        llm_segments = [seg for first, last in selected for seg in transcript_segments[first:last]]
+        kept = sum(seg['end'] - seg['start'] for seg in llm_segments)
+        total = sum(seg['end'] - seg['start'] for seg in transcript_segments)
+        print(f"[PRESCORE] {len(selected)} trechos selecionados: {kept:.0f}s de {total:.0f}s de fala enviados para a IA.")
+
+    ranges = chunking.pack_segments(llm_segments, count_tokens, budget, overlap_seconds=overlap_seconds)
+    chunks = [preprocess_transcript_for_ai(llm_segments[a:b]) for a, b in ranges]
+
+    print(f"[DEBUG] Chunking {len(transcript_segments)} segments by tokens (budget: {budget}, template: {template_tokens}, overlap: {overlap_seconds}s) -> {len(chunks)} chunks")
 
-        output_texts.append(prompt)
+    output_texts = []
+    cache_keys = []
+    for i, chunk in enumerate(chunks):
+        context_instruction = ""
+        if len(chunks) > 1:
+            context_instruction = f"Part {i+1} of {len(chunks)}. "
+
+        if ai_mode == "local" and context_instruction:
+            # Local: tudo antes do transcript precisa ser idêntico entre chunks (prefixo reaproveitado
+            # no KV cache do llama.cpp), então o "Part X of N" vai para o final do prompt.
+            render = lambda min_d, max_d: render_prompt(chunk, "", min_d, max_d) + f"\n\n({context_instruction.strip()})"
+        else:
+            render = lambda min_d, max_d: render_prompt(chunk, context_instruction, min_d, max_d)
+        
+        output_texts.append(render(tempo_minimo, tempo_maximo))
+
+        # Chave do cache: prompt completo + modelo, com min/max duration como placeholders.
+        # Esses limites são reaplicados em process_segments, então mudá-los reaproveita as respostas.
+        key_prompt = render("{min_duration}", "{max_duration}")
+        cache_keys.append(llm_cache.cache_key(model_name, key_prompt, backend=ai_mode))
 
     try:
         full_prompt_path = os.path.join(project_folder, "prompt_full.txt")
@@ -670,35 +683,58 @@ OUTPUT JSON ONLY:
 
     print(f"Processando {len(output_texts)} chunks usando modo: {ai_mode.upper()}")
 
-    local_llm_instance = None
-    if ai_mode == "local":
-        if not HAS_LLAMA_CPP:
-            print("Error: llama-cpp-python not installed. Please install it to use Local mode.")
+    # Respostas já conhecidas (mesmo prompt + modelo) não chamam a IA de novo
+    cached_responses = [None] * len(output_texts)
+    if use_cache and ai_mode != "manual":
+        cached_responses = [llm_cache.get(key) for key in cache_keys]
+        hits = sum(1 for r in cached_responses if r is not None)
+        if hits:
+            print(f"[CACHE] {hits}/{len(output_texts)} chunks com resposta em cache.")
+    pending = [i for i, r in enumerate(cached_responses) if r is None]
+
+    # Backend da IA (mesma interface para Gemini, G4F, llama.cpp local e servidores OpenAI-compatíveis)
+    backend = None
+    if ai_mode != "manual" and pending:
+        if ai_mode == "local" and not os.path.exists(local_model_path):
+            print(f"Error: Model not found at {local_model_path}")
             return {"segments": []}
-            
-        models_dir = os.path.join(base_dir, 'models')
-        model_path = os.path.join(models_dir, model_name)
-        if not os.path.exists(model_path):
-             if os.path.exists(model_name):
-                 model_path = model_name
-             else:
-                 print(f"Error: Model not found at {model_path}")
-                 return {"segments": []}
-        
-        print(f"[INFO] Loading Local Model: {os.path.basename(model_path)} (This may take a while)...")
         try:
-            local_llm_instance = Llama(
-                model_path=model_path,
-                n_gpu_layers=-1, 
-                n_ctx=8192,
-                verbose=False
-            )
+            backend = llm_backends.get_backend(ai_mode, config, model_name=model_name, api_key=api_key,
+                                               model_path=local_model_path, n_ctx=LOCAL_N_CTX, max_tokens=LOCAL_MAX_TOKENS)
+        except ImportError as e:
+            print(f"Error: {e}")
+            return {"segments": []}
         except Exception as e:
-            print(f"Failed to load model: {e}")
+            print(f"Failed to load backend {ai_mode}: {e}")
             return {"segments": []}
+        backend.prepare([output_texts[i] for i in pending])
+
+    # Backends concorrentes: todos os chunks em paralelo, limitados por rpm/tpm, respostas na ordem
+    remote_responses = None
+    if backend is not None and backend.concurrent and len(pending) > 1:
+        limits = config[ai_mode]
+        print(f"Enviando {len(pending)} chunks em paralelo para {ai_mode.upper()} (Model: {model_name}, "
+              f"rpm: {limits.get('rpm') or '-'}, tpm: {limits.get('tpm') or '-'}, concorrência: {limits.get('max_concurrency', 4)})...")
+        remote_responses = [None] * len(output_texts)
+
+        def call_remote(p):
+            text, _, partial = llm_backends.stream_response(backend, p)
+            return text, partial
+
+        dispatched = llm_dispatch.run_dispatch(
+            [output_texts[i] for i in pending], call_remote,
+            rpm=limits.get("rpm"), tpm=limits.get("tpm"),
+            max_concurrency=limits.get("max_concurrency", 4),
+            max_retries=backend.max_retries,
+        )
+        for i, response in zip(pending, dispatched):
+            # Erro no dispatch vira "{}" (string); sucesso vem como (texto, parcial)
+            remote_responses[i] = response if isinstance(response, tuple) else ("{}", True)
 
     for i, prompt in enumerate(output_texts):
         response_text = ""
+        # Resposta truncada (stream interrompido) ou falha: usa o que veio, mas não grava no cache
+        partial = False
         manual_prompt_path = os.path.join(project_folder, f"prompt_part_{i+1}.txt")
         try:
             with open(manual_prompt_path, "w", encoding="utf-8") as f:
@@ -706,7 +742,12 @@ OUTPUT JSON ONLY:
         except Exception as e:
             print(f"[ERRO] Falha ao salvar prompt.txt: {e}")
         
-        if ai_mode == "manual":
+        if cached_responses[i] is not None:
+            print(f"[CACHE] Chunk {i+1}: usando resposta em cache.")
+            response_text = cached_responses[i]
+        elif remote_responses is not None:
+            response_text, partial = remote_responses[i]
+        elif ai_mode == "manual":
             print(f"\n[INFO] O prompt foi salvo em: {manual_prompt_path}")
             print("\n" + "="*60)
             print(f"CHUNK {i+1}/{len(output_texts)}")
@@ -739,27 +780,18 @@ OUTPUT JSON ONLY:
                     except:
                         pass
 
-        elif ai_mode == "gemini":
-            print(f"Enviando chunk {i+1} para o Gemini (Model: {model_name})...")
-            response_text = call_gemini(prompt, api_key, model_name=model_name)
-        elif ai_mode == "g4f":
-            print(f"Enviando chunk {i+1} para o G4F (Model: {model_name})...")
-            response_text = call_g4f(prompt, model_name=model_name)
-        elif ai_mode == "local" and local_llm_instance:
-            print(f"Processing chunk {i+1} with Local LLM...")
+        elif backend is not None:
+            print(f"Enviando chunk {i+1} para {ai_mode.upper()} (Model: {model_name or backend.name})...")
+            on_segment = lambda seg: print(f"  [STREAM] Segmento recebido: {seg.get('title', '')}", flush=True)
+            response_text, partial = llm_backends.call_with_retry(backend, prompt, on_segment=on_segment, return_partial=True)
+
+        if partial:
+            print(f"[CACHE] Chunk {i+1}: resposta incompleta, não será gravada no cache.")
+        elif use_cache and ai_mode != "manual" and cached_responses[i] is None:
             try:
-                output = local_llm_instance.create_chat_completion(
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that outputs only JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=4096,
-                    temperature=0.7
-                )
-                response_text = output['choices'][0]['message']['content']
+                llm_cache.put(cache_keys[i], response_text, model_name=model_name, max_mb=cache_max_mb)
             except Exception as e:
-                print(f"Error evaluating local model: {e}")
-                response_text = "{}"
+                print(f"[WARN] Falha ao gravar cache da IA: {e}")
 
         # --- Save RAW Response for Debugging ---
         try:
@@ -772,8 +804,10 @@ OUTPUT JSON ONLY:
 
         # Processar resposta
         try:
-            data = clean_json_response(response_text)
-            chunk_segments = data.get("segments", [])
+            # Parser incremental (tolera resposta truncada); heurísticas antigas como fallback
+            chunk_segments = json_stream.parse_segments(response_text)
+            if not chunk_segments:
+                chunk_segments = clean_json_response(response_text).get("segments", [])
             print(f"Encontrados {len(chunk_segments)} segmentos neste chunk.")
             all_raw_segments.extend(chunk_segments)
         except json.JSONDecodeError:
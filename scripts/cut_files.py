@@ -0,0 +1,28 @@
+import json
+
+# Leitura / escrita dos arquivos de legenda por corte (subs/*.json, subs/*.srt).
+# Fica fora do transcript_store (que depende de numpy) para que o caminho só de
+# legendas (adjust_subtitles, translate_json, editor da webui) continue leve.
+
+def read_cut(json_path):
+    """Lê um JSON de legenda de corte (subs/*_processed.json)."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_cut(json_path, data, indent=2):
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+
+def _srt_time(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+def write_srt_segments(segments, path):
+    """Grava uma lista de segmentos ({'start', 'end', 'text'}) como SRT."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, seg in enumerate(segments, start=1):
+            text = seg["text"].strip().replace("-->", "->")
+            f.write(f"{i}\n{_srt_time(seg['start'])} --> {_srt_time(seg['end'])}\n{text}\n\n")
@@ -1,5 +1,46 @@
 import json
 import os
+from array import array
+from bisect import bisect_left, bisect_right
+from scripts import transcript_store, cut_files
+
+def build_transcript_index(data):
+    """
+    Indexa os segmentos do input.json (WhisperX) uma única vez.
+    Guarda os inícios ordenados e o maior fim acumulado (prefix max) em arrays,
+    permitindo achar por bisect os segmentos que cruzam um intervalo de tempo.
+    """
+    segments = sorted(data.get('segments', []), key=lambda s: s.get('start', 0))
+
+    starts = array('d')
+    max_ends = array('d')
+    running_max = float('-inf')
+    for segment in segments:
+        starts.append(segment.get('start', 0))
+        running_max = max(running_max, segment.get('end', 0))
+        max_ends.append(running_max)
+
+    return {'segments': segments, 'starts': starts, 'max_ends': max_ends}
+
+def slice_index(index, start_time, end_time):
+    """
+    Recorta o trecho [start_time, end_time] usando o índice.
+    Mesmo resultado de process_segments, sem varrer o transcript inteiro.
+    """
+    store = index.get('store')
+    if store is not None:
+        # Store colunar: só os segmentos do intervalo são materializados
+        first, last = store.find_range(start_time, end_time)
+        segments = list(store.iter_segments(first, last))
+        return process_segments({'segments': segments}, start_time, end_time)
+
+    segments = index['segments']
+    # Primeiro segmento cujo fim (acumulado) passa de start_time
+    first = bisect_right(index['max_ends'], start_time)
+    # Segmentos que começam antes de end_time
+    last = bisect_left(index['starts'], end_time)
+
+    return process_segments({'segments': segments[first:last]}, start_time, end_time)
 
 def process_segments(data, start_time, end_time):
     new_segments = []
@@ -43,24 +84,61 @@ def process_segments(data, start_time, end_time):
             
     return {'segments': new_segments}
 
-def cut_json_transcript(input_json_path, output_json_path, start_time, end_time):
+def load_transcript_index(input_json_path):
     """
-    Lê o input.json (WhisperX), recorta o trecho e salva em output_json_path com timestamps ajustados.
+    Abre o transcript uma vez e devolve o índice (ou None se não existir).
+    Usa o transcript store da pasta do projeto; input.json legado é convertido na primeira vez.
     """
+    project_folder = os.path.dirname(input_json_path)
+    base_name = os.path.splitext(os.path.basename(input_json_path))[0]
+    store = transcript_store.open_or_migrate(project_folder, base_name)
+    if store is not None:
+        return {'store': store}
+
     if not os.path.exists(input_json_path):
         print(f"Aviso: {input_json_path} não encontrado. Não foi possível gerar JSON do corte.")
+        return None
+
+    with open(input_json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return build_transcript_index(data)
+
+def cut_json_batch(input_json_path, cuts, index=None):
+    """
+    Recorta vários trechos de uma vez.
+    cuts: lista de (output_json_path, start_time, end_time).
+    O input.json é lido e indexado uma única vez para todos os cortes.
+    Um corte que falha não impede os outros.
+    """
+    if not cuts:
         return
 
+    owned = index is None
     try:
-        with open(input_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        new_data = process_segments(data, start_time, end_time)
-        
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(new_data, f, indent=2, ensure_ascii=False)
-            
-        print(f"JSON de legenda gerado: {output_json_path}")
-        
+        if index is None:
+            index = load_transcript_index(input_json_path)
     except Exception as e:
         print(f"Erro ao cortar JSON: {e}")
+        return
+    if index is None:
+        return
+
+    try:
+        for output_json_path, start_time, end_time in cuts:
+            try:
+                new_data = slice_index(index, start_time, end_time)
+                cut_files.write_cut(output_json_path, new_data)
+
+                print(f"JSON de legenda gerado: {output_json_path}")
+            except Exception as e:
+                print(f"Erro ao cortar JSON ({output_json_path}): {e}")
+    finally:
+        # mmap aberto bloquearia a troca do store no Windows (alinhamento lazy depois do corte)
+        if owned and index.get('store') is not None:
+            index['store'].close()
+
+def cut_json_transcript(input_json_path, output_json_path, start_time, end_time):
+    """
+    Lê o input.json (WhisperX), recorta o trecho e salva em output_json_path com timestamps ajustados.
+    """
+    cut_json_batch(input_json_path, [(output_json_path, start_time, end_time)])
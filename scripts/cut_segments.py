@@ -1,8 +1,57 @@
-from scripts import cut_json
+from scripts import cut_json, source_ranges
 import os
 import subprocess
 import json
 
+def parse_segment_times(segment):
+    """
+    Interpreta start_time/duration de um segmento viral.
+    start_time: int = milissegundos; float = segundos; string = segundos ("12.34") ou "HH:MM:SS".
+    duration: número < 1000 = segundos, >= 1000 = milissegundos; string = segundos
+    (não numérica vira duração 0 e a string é repassada ao ffmpeg como está).
+    Retorna (start_time_seconds, start_time_str, duration_seconds, duration_str).
+    """
+    start_time = segment.get("start_time", "00:00:00")
+    duration = segment.get("duration", 0)
+
+    if isinstance(duration, (int, float)):
+        if duration < 1000:
+            duration_seconds = float(duration)
+        else:
+            duration_seconds = duration / 1000.0
+        duration_str = f"{duration_seconds:.3f}"
+    else:
+        try:
+            duration_seconds = float(duration)
+            duration_str = f"{duration_seconds:.3f}"
+        except ValueError:
+            duration_seconds = 0
+            duration_str = duration
+
+    if isinstance(start_time, int):
+        start_time_seconds = start_time / 1000.0
+        start_time_str = f"{start_time_seconds:.3f}"
+    elif isinstance(start_time, float):
+        start_time_seconds = start_time
+        start_time_str = f"{start_time_seconds:.3f}"
+    else:
+        # String "00:00:00" ou "12.34"
+        try:
+            start_time_seconds = float(start_time)
+            start_time_str = f"{start_time_seconds:.3f}"
+        except:
+            # HH:MM:SS: o ffmpeg aceita como está, o corte do JSON precisa em segundos
+            h, m, s = str(start_time).split(':')
+            start_time_seconds = int(h) * 3600 + int(m) * 60 + float(s)
+            start_time_str = str(start_time)
+
+    return start_time_seconds, start_time_str, duration_seconds, duration_str
+
+def segment_window(segment):
+    """Janela (início, fim) em segundos de um segmento viral."""
+    start_time_seconds, _, duration_seconds, _ = parse_segment_times(segment)
+    return start_time_seconds, start_time_seconds + float(duration_seconds)
+
 def cut(segments, project_folder="tmp", skip_video=False):
 
     def check_nvenc_support():
@@ -22,11 +71,16 @@ def cut(segments, project_folder="tmp", skip_video=False):
 
         # Procurar input_video.mp4 no project_folder ou tmp
         input_file = os.path.join(project_folder, "input.mp4")
+        range_entries = None
         if not os.path.exists(input_file):
             # Tenta fallback legado
             input_file_legacy = os.path.join(project_folder, "input_video.mp4")
             if os.path.exists(input_file_legacy):
                 input_file = input_file_legacy
+            elif source_ranges.has_ranges(project_folder):
+                # --range-download: só os trechos escolhidos foram baixados
+                range_entries = source_ranges.load_manifest(project_folder)
+                print(f"Cutting from {len(range_entries)} downloaded ranges in {project_folder}")
             else:
                 print(f"Input file not found in {project_folder}")
                 return
@@ -43,53 +97,12 @@ def cut(segments, project_folder="tmp", skip_video=False):
         input_json_path = os.path.join(project_folder, "input.json")
 
         segments = response.get("segments", [])
+        # Cortes de JSON acumulados e gravados de uma vez no final (input.json lido uma única vez)
+        json_cuts = []
         for i, segment in enumerate(segments):
             start_time = segment.get("start_time", "00:00:00")
             duration = segment.get("duration", 0)
-
-            # Heurística para duration:
-            if isinstance(duration, (int, float)):
-                if duration < 1000:
-                    duration_seconds = float(duration)
-                else:
-                    duration_seconds = duration / 1000.0
-                duration_str = f"{duration_seconds:.3f}"
-            else:
-                # Tenta converter string (HH:MM:SS ou float str)
-                try:
-                    duration_seconds = float(duration)
-                    duration_str = f"{duration_seconds:.3f}"
-                except ValueError:
-                    # Assumindo formato hh:mm:ss se nao for float
-                     # Implementar parser se necessario, mas assumindo float por enquanto baseado no historico
-                    duration_seconds = 0
-                    duration_str = duration
-            
-            # Heurística para start_time:
-            if isinstance(start_time, (int, float)):
-                if start_time > 10000: # Se for milisegundos grandes? Assumindo segundos ou HHMMSS?
-                   # O código original: if start_time int -> start_time/1000.0.
-                   # Vamos manter a lógica original: int -> milisegundos
-                   pass
-            
-            # Refazendo a logica original exata para seguranca e capturando o float:
-            if isinstance(start_time, int):
-                start_time_seconds = start_time / 1000.0
-                start_time_str = f"{start_time_seconds:.3f}"
-            elif isinstance(start_time, float):
-                 start_time_seconds = start_time
-                 start_time_str = f"{start_time_seconds:.3f}"
-            else:
-                # String "00:00:00" ou "12.34"
-                try:
-                    start_time_seconds = float(start_time)
-                    start_time_str = f"{start_time_seconds:.3f}"
-                except:
-                    # Se for HH:MM:SS, ffmpeg aceita, mas precisamos converter para float para o json cutter
-                    # Função auxiliar simples
-                    h, m, s = str(start_time).split(':')
-                    start_time_seconds = int(h) * 3600 + int(m) * 60 + float(s)
-                    start_time_str = str(start_time)
+            start_time_seconds, start_time_str, duration_seconds, duration_str = parse_segment_times(segment)
 
             # Título para nome de arquivo
             title = segment.get("title", f"Segment_{i}")
@@ -105,14 +118,24 @@ def cut(segments, project_folder="tmp", skip_video=False):
             # print(f"Executing command: {' '.join(command)}")
 
             # VIDEO GENERATION
-            if not skip_video:
+            segment_input, segment_start_str = input_file, start_time_str
+            if range_entries is not None and not skip_video:
+                found = source_ranges.find_range(project_folder, start_time_seconds, start_time_seconds + float(duration_seconds), range_entries)
+                if found is None:
+                    print(f"No downloaded range covers segment {i+1} ({start_time_seconds:.1f}s). Skipping video.")
+                    segment_input = None
+                else:
+                    segment_input, offset = found
+                    segment_start_str = f"{start_time_seconds - offset:.3f}"
+
+            if not skip_video and segment_input:
                 # Comando ffmpeg
                 command = [
                     "ffmpeg",
                     "-y",
                     "-loglevel", "error", "-hide_banner",
-                    "-ss", start_time_str,
-                    "-i", input_file,
+                    "-ss", segment_start_str,
+                    "-i", segment_input,
                     "-t", duration_str,
                     "-c:v", video_codec
                 ]
@@ -151,11 +174,13 @@ def cut(segments, project_folder="tmp", skip_video=False):
             json_output_filename = f"{base_name}_processed.json"
             json_output_path = os.path.join(subs_folder, json_output_filename)
             
-            cut_json.cut_json_transcript(input_json_path, json_output_path, start_time_seconds, end_time_seconds)
+            json_cuts.append((json_output_path, start_time_seconds, end_time_seconds))
             # --------------------
 
             print("\n" + "="*50 + "\n")
 
+        cut_json.cut_json_batch(input_json_path, json_cuts)
+
     # Reading the JSON file if segments not provided (legacy behavior)
     if segments is None:
         json_path = os.path.join(project_folder, 'viral_segments.txt')
@@ -2,6 +2,12 @@ import os
 import re
 import yt_dlp
 import sys
+import math
+import time
+import tempfile
+import threading
+import contextlib
+import subprocess
 from i18n.i18n import I18nAuto
 i18n = I18nAuto()
 
@@ -21,6 +27,35 @@ def sanitize_filename(name):
     cleaned = cleaned.strip()
     return cleaned
 
+# Mapeamento de Qualidade
+QUALITY_MAP = {
+    "best": 'bestvideo+bestaudio/best',
+    "1080p": 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
+    "720p": 'bestvideo[height<=720]+bestaudio/best[height<=720]',
+    "480p": 'bestvideo[height<=480]+bestaudio/best[height<=480]'
+}
+
+# Qualidade "auto": menor resolução da fonte cujo crop ainda entrega 1080px de largura.
+# Baixar 4K para um corte que vira 1080x1920 com padding é banda e decode jogados fora.
+OUTPUT_WIDTH = 1080
+# Upscale que ainda passa sem perda visível no celular (1 rosto: 1422p -> 1440p)
+UPSCALE_TOLERANCE = 1.35
+# Largura do crop em frações da altura de uma fonte 16:9
+CROP_WIDTH_RATIO = {
+    "one_face": 9 / 16,   # recorte 9:16 na altura toda (1 rosto, zoom no centro)
+    "two_faces": 8 / 9,   # cada painel 1080x960 cobre ~metade da largura
+    "padding": 16 / 9,    # frame inteiro redimensionado para 1080 de largura
+}
+# Abaixo disso a detecção de rosto fica instável, mesmo no modo padding
+MIN_AUTO_HEIGHT = 720
+STANDARD_HEIGHTS = [720, 1080, 1440, 2160]
+
+SUBTITLE_LANGS = ['pt.*', 'en.*', 'sp.*'] # Prioritize generic PT, EN, SP
+
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
 def progress_hook(d):
     if d['status'] == 'downloading':
         try:
@@ -31,22 +66,134 @@ def progress_hook(d):
     elif d['status'] == 'finished':
         print(f"[download] Download concluído: {d['filename']}", flush=True)
 
-def download(url, base_root="VIRALS", download_subs=True, quality="best"):
-    # 1. Extrair informações do vídeo para pegar o título
-    # 1. Extrair informações do vídeo para pegar o título
+# --- Rede: fragmentos em paralelo, retomada e limite de banda -------------------------
+# O limite é do nó inteiro: cada download ativo registra um lease em LEASE_DIR (renovado
+# pelo progress hook) e usa limite / downloads ativos, então N jobs dividem o uplink.
+DOWNLOAD_SETTINGS = {
+    "fragments": 4,       # concurrent_fragment_downloads do yt-dlp (HLS/DASH)
+    "rate_limit": None,   # bytes/s para o nó todo (None = sem limite)
+}
+LEASE_DIR = os.path.join(tempfile.gettempdir(), "viralcutter-downloads")
+LEASE_TTL = 30        # lease sem renovação há mais que isso = job morto
+LEASE_REFRESH = 5
+MIN_RATE = 64 * 1024
+
+def parse_rate(value):
+    """Limite tipo 20M, 500K, 1.5M ou bytes -> bytes/s. Vazio/0 -> None."""
+    if value in (None, "", 0, "0"):
+        return None
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value}")
+    factor = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2).upper()]
+    return int(float(match.group(1)) * factor) or None
+
+DOWNLOAD_SETTINGS["rate_limit"] = parse_rate(os.environ.get("VIRALCUTTER_DOWNLOAD_RATE_LIMIT"))
+
+def configure_downloads(fragments=None, rate_limit=None):
+    """Ajusta fragmentos em paralelo e o limite de banda do nó (ex: "50M") para os próximos downloads."""
+    if fragments is not None:
+        DOWNLOAD_SETTINGS["fragments"] = max(1, int(fragments))
+    if rate_limit is not None:
+        DOWNLOAD_SETTINGS["rate_limit"] = parse_rate(rate_limit)
+
+def network_options():
+    return {
+        'concurrent_fragment_downloads': DOWNLOAD_SETTINGS["fragments"],
+        # Retoma .part / .ytdl de uma execução interrompida em vez de começar do zero
+        'continuedl': True,
+        'retries': 10,
+        'fragment_retries': 10,
+        'file_access_retries': 5,
+        # Fragmento perdido = vídeo com buraco; melhor falhar e retomar depois
+        'skip_unavailable_fragments': False,
+    }
+
+class DownloadLease:
+    """
+    Fatia deste download no limite de banda do nó. O ratelimit do yt-dlp vale por
+    conexão e os fragmentos copiam as opções no início de cada stream, então streams
+    fragmentados começam com fatia / fragmentos; num stream HTTP único o hook sobe
+    para a fatia inteira e ela é recalculada a cada LEASE_REFRESH segundos.
+    """
+
+    def __init__(self):
+        self.path = os.path.join(LEASE_DIR, f"{os.getpid()}-{id(self)}.lease")
+        self.ydl = None
+        self.last_refresh = 0
+
+    def __enter__(self):
+        if DOWNLOAD_SETTINGS["rate_limit"]:
+            os.makedirs(LEASE_DIR, exist_ok=True)
+            open(self.path, "w").close()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        return False
+
+    def share(self):
+        now = time.time()
+        active = 0
+        for name in os.listdir(LEASE_DIR):
+            try:
+                if now - os.path.getmtime(os.path.join(LEASE_DIR, name)) < LEASE_TTL:
+                    active += 1
+            except OSError:
+                pass
+        return max(MIN_RATE, DOWNLOAD_SETTINGS["rate_limit"] // max(1, active))
+
+    def attach(self, ydl):
+        if not DOWNLOAD_SETTINGS["rate_limit"]:
+            return
+        self.ydl = ydl
+        ydl.params['ratelimit'] = max(MIN_RATE, self.share() // DOWNLOAD_SETTINGS["fragments"])
+        ydl.add_progress_hook(self._hook)
+
+    def _hook(self, d):
+        if d['status'] == 'finished':
+            # Próximo stream pode ser fragmentado: volta para a fatia por conexão
+            self.ydl.params['ratelimit'] = max(MIN_RATE, self.share() // DOWNLOAD_SETTINGS["fragments"])
+            return
+        now = time.time()
+        if d['status'] != 'downloading' or now - self.last_refresh < LEASE_REFRESH:
+            return
+        self.last_refresh = now
+        try:
+            os.utime(self.path)
+        except OSError:
+            open(self.path, "w").close()
+        share = self.share()
+        if d.get('fragment_index') is None:
+            self.ydl.params['ratelimit'] = share
+        else:
+            self.ydl.params['ratelimit'] = max(MIN_RATE, share // DOWNLOAD_SETTINGS["fragments"])
+
+@contextlib.contextmanager
+def open_ydl(ydl_opts):
+    """YoutubeDL com fragmentos em paralelo, retomada e a fatia do limite de banda do nó."""
+    with DownloadLease() as lease, yt_dlp.YoutubeDL({**ydl_opts, **network_options()}) as ydl:
+        lease.attach(ydl)
+        yield ydl
+
+# info do yt-dlp por URL: título, id e formatos são lidos uma vez por execução
+_INFO_CACHE = {}
+
+def get_video_info(url):
+    """extract_info sem download (com cookies do Chrome, depois sem). None se falhar."""
+    if url in _INFO_CACHE:
+        return _INFO_CACHE[url]
+
     print(i18n("Extracting video information..."))
-    title = None
-    
-    # ... (Keep existing title extraction logic) ...
-    # Instead of repeating it effectively, I will rely on the diff to keep it or re-write it if I have to replace the whole block.
-    # Since replace_file_content works on line ranges, I should be careful.
-    # Let's assume I'm replacing the whole function body or significant parts.
-    
+    info = None
+
     # Tentativa 1: Com cookies
     try:
         with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'cookiesfrombrowser': ('chrome',)}) as ydl:
             info = ydl.extract_info(url, download=False)
-            title = info.get('title')
     except Exception as e:
         try:
             print(i18n("Warning: Failed to extract info with cookies: {}").format(e))
@@ -54,17 +201,67 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
             print(i18n("Warning: Failed to extract info with cookies: [Encoding Error in Message]"))
 
     # Tentativa 2: Sem cookies
-    if not title:
+    if not info or not info.get('title'):
         try:
              with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
                 info = ydl.extract_info(url, download=False)
-                title = info.get('title')
         except Exception as e:
             try:
                 print(i18n("Error getting video info (without cookies): {}").format(e))
             except UnicodeEncodeError:
                 print(i18n("Error getting video info (without cookies): [Encoding Error in Message]"))
 
+    if info:
+        _INFO_CACHE[url] = info
+    return info
+
+def required_source_height(face_mode="auto", no_face_mode="padding"):
+    """Altura mínima da fonte para os layouts que o corte pode usar com esse face_mode."""
+    layouts = ["padding"]
+    if face_mode in ("auto", "1") or no_face_mode == "zoom":
+        layouts.append("one_face")
+    if face_mode in ("auto", "2"):
+        layouts.append("two_faces")
+    need = max(OUTPUT_WIDTH / (CROP_WIDTH_RATIO[layout] * UPSCALE_TOLERANCE) for layout in layouts)
+    return max(MIN_AUTO_HEIGHT, int(math.ceil(need)))
+
+def resolve_quality(quality, url=None, face_mode="auto", no_face_mode="padding"):
+    """
+    "auto" -> "res:N", com N a menor resolução disponível >= a exigida pelo layout
+    (a maior disponível se nenhuma chegar lá). Outras qualidades passam direto.
+    Resolução = menor dimensão, então vídeos verticais também funcionam.
+    """
+    if quality != "auto":
+        return quality
+    required = required_source_height(face_mode, no_face_mode)
+    info = get_video_info(url) if url else None
+    available = sorted({
+        min(f['width'], f['height'])
+        for f in ((info or {}).get('formats') or [])
+        if f.get('vcodec') not in (None, 'none') and f.get('width') and f.get('height')
+    }) or STANDARD_HEIGHTS
+    target = next((r for r in available if r >= required), available[-1])
+    print(i18n("Auto quality: face mode {} / no-face {} needs >= {}p, downloading {}p.").format(
+        face_mode, no_face_mode, required, target))
+    return f"res:{target}"
+
+def format_options(quality, video_only=False):
+    """Opções de formato do yt-dlp para uma qualidade do QUALITY_MAP ou "res:N" (resolve_quality)."""
+    if quality.startswith("res:"):
+        # format_sort res:N = maior resolução <= N (a menor acima se não houver)
+        return {'format': 'bestvideo/best' if video_only else 'bestvideo+bestaudio/best',
+                'format_sort': [quality]}
+    selected_format = QUALITY_MAP.get(quality, QUALITY_MAP['best'])
+    if video_only:
+        # Só a parte de vídeo (ex: bestvideo[height<=1080]); /best cobre sites sem streams separados
+        selected_format = selected_format.split('+')[0] + "/best"
+    return {'format': selected_format}
+
+def get_project_folder(url, base_root="VIRALS"):
+    """Extrai o título do vídeo e cria VIRALS/<título>."""
+    info = get_video_info(url)
+    title = info.get('title') if info else None
+
     # Fallback final
     if title:
         safe_title = sanitize_filename(title)
@@ -81,6 +278,12 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
     # 2. Criar estrutura de pastas
     project_folder = os.path.join(base_root, safe_title)
     os.makedirs(project_folder, exist_ok=True)
+    return project_folder
+
+def download(url, base_root="VIRALS", download_subs=True, quality="best"):
+    # 1. Extrair informações do vídeo para pegar o título
+    # 2. Criar estrutura de pastas
+    project_folder = get_project_folder(url, base_root)
     
     # Caminho final do vídeo
     output_filename = 'input' 
@@ -103,27 +306,18 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
             except:
                 pass
 
-    # Limpeza de temp
-    temp_path = f"{output_path_base}.temp.mp4"
-    if os.path.exists(temp_path):
-        try:
-            os.remove(temp_path)
-        except:
-            pass
+    # Streams parciais (.part/.ytdl) e já completos (input.fNNN.mp4) de uma execução
+    # interrompida ficam na pasta e são retomados; o input.temp.mp4 do merge é refeito.
+    if os.path.exists(f"{output_path_base}.temp.mp4"):
+        print(i18n("Resuming interrupted download..."))
 
     # Mapeamento de Qualidade
-    quality_map = {
-        "best": 'bestvideo+bestaudio/best',
-        "1080p": 'bestvideo[height<=1080]+bestaudio/best[height<=1080]',
-        "720p": 'bestvideo[height<=720]+bestaudio/best[height<=720]',
-        "480p": 'bestvideo[height<=480]+bestaudio/best[height<=480]'
-    }
-    selected_format = quality_map.get(quality, 'bestvideo+bestaudio/best')
-    print(i18n("Configuring download quality: {} -> {}").format(quality, selected_format))
+    quality_opts = format_options(quality)
+    print(i18n("Configuring download quality: {} -> {}").format(quality, quality_opts['format']))
 
     ydl_opts = {
-        'format': selected_format,
-        'overwrites': True,
+        **quality_opts,
+        'overwrites': False,
         'outtmpl': output_path_base, 
         'postprocessor_args': [
             '-movflags', 'faststart'
@@ -133,10 +327,8 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
         # Opções de Legenda
         'writesubtitles': download_subs,
         'writeautomaticsub': download_subs,
-        'subtitleslangs': ['pt.*', 'en.*', 'sp.*'], # Prioritize generic PT, EN, SP
-        'http_headers': {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        },
+        'subtitleslangs': SUBTITLE_LANGS,
+        'http_headers': HTTP_HEADERS,
         'skip_download': False,
         'quiet': False,
         'no_warnings': False,
@@ -158,7 +350,7 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
     
     # Tentativa 1: Com configuração original
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with open_ydl(ydl_opts) as ydl:
             ydl.download([url])
     except yt_dlp.utils.DownloadError as e:
         error_str = str(e)
@@ -177,7 +369,7 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
             ydl_opts['postprocessors'] = [p for p in ydl_opts.get('postprocessors', []) if 'Subtitle' not in p.get('key', '')]
             
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with open_ydl(ydl_opts) as ydl:
                     ydl.download([url])
             except Exception as e2:
                 print(i18n("Fatal error on second attempt: {}").format(e2))
@@ -192,6 +384,213 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
         print(i18n("Unexpected error: {}").format(e))
         raise
 
+    normalize_subtitles(project_folder)
+
+    return final_video_path, project_folder
+
+# --- Áudio primeiro (transcrição em paralelo com o download do vídeo) ---------------
+
+class BackgroundVideoDownload(threading.Thread):
+    """
+    Baixa só o stream de vídeo em segundo plano e junta com o áudio já baixado em input.mp4.
+    result() espera e devolve o caminho do input.mp4 (ou levanta o erro do download).
+    Thread daemon: um sys.exit no meio do pipeline não fica preso esperando o download.
+    """
+
+    def __init__(self, url, project_folder, audio_path, quality="best"):
+        super().__init__(daemon=True)
+        self.url = url
+        self.project_folder = project_folder
+        self.audio_path = audio_path
+        self.quality = quality
+        self.final_path = os.path.join(project_folder, "input.mp4")
+        self.error = None
+
+    def run(self):
+        try:
+            self._download_and_merge()
+        except BaseException as e:
+            self.error = e
+
+    def _download_and_merge(self):
+        # Só a parte de vídeo do formato escolhido; o áudio de um "/best" é ignorado no merge
+        ydl_opts = {
+            **format_options(self.quality, video_only=True),
+            'outtmpl': os.path.join(self.project_folder, 'input.video.%(ext)s'),
+            # Sem progress hook: o log da transcrição segue legível enquanto o vídeo baixa
+            'http_headers': HTTP_HEADERS,
+            'overwrites': False,
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'force_ipv4': True,
+        }
+        with open_ydl(ydl_opts) as ydl:
+            info = ydl.extract_info(self.url, download=True)
+            video_path = ydl.prepare_filename(info)
+
+        temp_path = os.path.join(self.project_folder, "input.temp.mp4")
+        # AAC (m4a) entra direto no mp4; outros codecs de áudio são convertidos
+        audio_codec = ["-c:a", "copy"] if self.audio_path.endswith(".m4a") else ["-c:a", "aac", "-b:a", "192k"]
+        command = [
+            "ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-hide_banner",
+            "-i", video_path, "-i", self.audio_path,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy", *audio_codec,
+            "-movflags", "faststart",
+            temp_path,
+        ]
+        subprocess.run(command, check=True, capture_output=True)
+        os.replace(temp_path, self.final_path)
+        try:
+            os.remove(video_path)
+        except OSError:
+            pass
+        print(i18n("[download] Video stream merged: {}").format(self.final_path), flush=True)
+
+    def result(self):
+        if self.is_alive():
+            print(i18n("Waiting for the background video download to finish..."), flush=True)
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.final_path
+
+def download_audio_first(url, base_root="VIRALS", download_subs=True, quality="best"):
+    """
+    Baixa legenda + áudio e dispara o vídeo em segundo plano.
+    Retorna (caminho do áudio, project_folder, BackgroundVideoDownload ou None).
+    Se o input.mp4 já existir, o job é None e o áudio é o input.m4a (se existir, ex: vindo
+    do cache de fontes, para o audio.f32 continuar válido) ou o próprio input.mp4.
+    """
+    if download_subs:
+        project_folder, _ = download_subtitles(url, base_root)
+    else:
+        project_folder = get_project_folder(url, base_root)
+
+    final_video_path = os.path.join(project_folder, "input.mp4")
+    if os.path.exists(final_video_path) and os.path.getsize(final_video_path) > 1024:
+        print(i18n("Video already exists at: {}").format(final_video_path))
+        audio_path = os.path.join(project_folder, "input.m4a")
+        return (audio_path if os.path.exists(audio_path) else final_video_path), project_folder, None
+
+    audio_path = download_audio(url, project_folder)
+    job = BackgroundVideoDownload(url, project_folder, audio_path, quality=quality)
+    job.start()
+    print(i18n("Audio ready. Video stream downloading in the background..."))
+    return audio_path, project_folder, job
+
+# --- Modo range-only (--range-download) --------------------------------------------
+# Legenda (ou só o áudio) primeiro; depois da seleção dos cortes, só as janelas escolhidas
+# (com padding) são baixadas via download_ranges do yt-dlp. Veja scripts/source_ranges.py.
+
+def download_subtitles(url, base_root="VIRALS"):
+    """
+    Baixa só a legenda do YouTube (sem vídeo) para input.srt.
+    Retorna (project_folder, caminho da legenda ou None).
+    """
+    project_folder = get_project_folder(url, base_root)
+    for name in ("input.srt", "input.vtt"):
+        path = os.path.join(project_folder, name)
+        if os.path.exists(path):
+            print(i18n("Subtitle already exists at: {}").format(path))
+            return project_folder, path
+
+    ydl_opts = {
+        'skip_download': True,
+        'outtmpl': os.path.join(project_folder, 'input'),
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': SUBTITLE_LANGS,
+        'postprocessors': [{'key': 'FFmpegSubtitlesConvertor', 'format': 'srt'}],
+        'http_headers': HTTP_HEADERS,
+        'quiet': False,
+        'no_warnings': False,
+        'force_ipv4': True,
+    }
+    print(i18n("Downloading subtitles only..."))
+    try:
+        with open_ydl(ydl_opts) as ydl:
+            ydl.download([url])
+    except Exception as e:
+        print(i18n("Warning: Error downloading subtitles ({}).").format(e))
+
+    normalize_subtitles(project_folder)
+    for name in ("input.srt", "input.vtt"):
+        path = os.path.join(project_folder, name)
+        if os.path.exists(path):
+            return project_folder, path
+    return project_folder, None
+
+def download_audio(url, project_folder):
+    """Baixa só a melhor trilha de áudio (input.m4a/.webm). Retorna o caminho."""
+    for ext in ("m4a", "webm", "opus", "mp3"):
+        path = os.path.join(project_folder, f"input.{ext}")
+        if os.path.exists(path) and os.path.getsize(path) > 1024:
+            print(i18n("Audio already exists at: {}").format(path))
+            return path
+
+    ydl_opts = {
+        'format': 'bestaudio[ext=m4a]/bestaudio',
+        'outtmpl': os.path.join(project_folder, 'input.%(ext)s'),
+        'progress_hooks': [progress_hook],
+        'http_headers': HTTP_HEADERS,
+        'quiet': False,
+        'no_warnings': False,
+        'force_ipv4': True,
+    }
+    print(i18n("Downloading audio only..."))
+    with open_ydl(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
+
+def download_ranges(url, project_folder, windows, padding=5.0, quality="best"):
+    """
+    Baixa só as janelas (start, end) em segundos, com `padding` de cada lado,
+    para project_folder/ranges/. Trechos já baixados são reaproveitados.
+    Retorna o manifesto [{"start", "end", "file"}].
+    """
+    from yt_dlp.utils import download_range_func
+    from scripts import source_ranges
+
+    planned = source_ranges.plan_ranges(windows, padding=padding)
+    entries = source_ranges.load_manifest(project_folder)
+    todo = [(s, e) for s, e in planned if source_ranges.find_range(project_folder, s, e, entries) is None]
+
+    total = sum(e - s for s, e in planned)
+    print(i18n("Range download: {} windows ({:.0f}s of video), {} to download.").format(len(planned), total, len(todo)))
+    if not todo:
+        return entries
+
+    ranges_dir = os.path.join(project_folder, source_ranges.RANGES_DIR)
+    os.makedirs(ranges_dir, exist_ok=True)
+    ydl_opts = {
+        **format_options(quality),
+        'download_ranges': download_range_func(None, todo),
+        # Corte exato no início do trecho: o offset no manifesto vale para o frame 0 do arquivo
+        'force_keyframes_at_cuts': True,
+        'outtmpl': os.path.join(ranges_dir, 'range_%(section_start)d-%(section_end)d.%(ext)s'),
+        'merge_output_format': 'mp4',
+        'progress_hooks': [progress_hook],
+        'http_headers': HTTP_HEADERS,
+        'overwrites': True,
+        'quiet': False,
+        'no_warnings': False,
+        'force_ipv4': True,
+    }
+    with open_ydl(ydl_opts) as ydl:
+        ydl.download([url])
+
+    for start, end in todo:
+        name = source_ranges.range_filename(start, end)
+        if os.path.exists(os.path.join(ranges_dir, name)):
+            entries.append({"start": start, "end": end, "file": name})
+        else:
+            print(i18n("Warning: range {:.1f}-{:.1f}s was not downloaded.").format(start, end))
+    source_ranges.save_manifest(project_folder, entries)
+    return entries
+
+def normalize_subtitles(project_folder):
     # RENOMEAR LEGENDA PARA PADRÃO (input.vtt ou input.srt)
     # Se for VTT, converte para SRT para garantir compatibilidade.
     try:
@@ -279,8 +678,10 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
                              last_text = final_line
                              counter += 1
                     
-                    with open(new_name, 'w', encoding='utf-8') as f_out:
+                    # Temporário + rename: input.srt pode ser hardlink do cache de fontes
+                    with open(new_name + '.tmp', 'w', encoding='utf-8') as f_out:
                         f_out.writelines(srt_content)
+                    os.replace(new_name + '.tmp', new_name)
                     
                     try:
                         print(i18n("Subtitle converted and cleaned: {}").format(new_name))
@@ -316,5 +717,3 @@ def download(url, base_root="VIRALS", download_subs=True, quality="best"):
 
     except Exception as e_ren:
         print(i18n("Error processing subtitles: {}").format(e_ren))
-
-    return final_video_path, project_folder
\ No newline at end of file
@@ -159,21 +159,27 @@ def generate_short_fallback(input_file, output_file, index, project_folder, fina
     
     finalize_video(input_file, output_file, index, fps, project_folder, final_folder)
 
+def has_audio_stream(input_file):
+    try:
+        out = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "a", "-show_entries", "stream=index",
+                              "-of", "csv=p=0", input_file], capture_output=True, text=True, check=True).stdout
+        return bool(out.strip())
+    except Exception:
+        return False
+
 def finalize_video(input_file, output_file, index, fps, project_folder, final_folder):
     """Mux audio and video."""
-    audio_file = os.path.join(project_folder, "cuts", f"output-audio-{index}.aac")
-    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", input_file, "-vn", "-acodec", "copy", audio_file], 
-                   check=False, capture_output=True)
-
-    if os.path.exists(audio_file) and os.path.getsize(audio_file) > 0:
+    # O áudio do corte (já AAC) é copiado direto do input, sem extrair para .aac nem re-encodar
+    if has_audio_stream(input_file):
         final_output = os.path.join(final_folder, f"final-output{str(index).zfill(3)}_processed.mp4")
         encoder_name, encoder_preset = get_best_encoder()
         command = [
             "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-stats",
             "-i", output_file,
-            "-i", audio_file,
+            "-i", input_file,
+            "-map", "0:v:0", "-map", "1:a:0",
             "-c:v", encoder_name, "-preset", encoder_preset, "-b:v", "5M",
-            "-c:a", "aac", "-b:a", "192k",
+            "-c:a", "copy",
             "-r", str(fps),
             final_output
         ]
@@ -181,7 +187,6 @@ def finalize_video(input_file, output_file, index, fps, project_folder, final_fo
             subprocess.run(command, check=True) #, capture_output=True)
             print(f"Final file generated: {final_output}")
             try:
-                os.remove(audio_file)
                 os.remove(output_file) 
             except:
                 pass
@@ -15,6 +15,10 @@ except ImportError:
     INSIGHTFACE_AVAILABLE = False
 
 app = None
+# Cliente do model server (scripts/model_server.py), quando estiver rodando
+remote = None
+# Servidor caiu durante o job: não tenta de novo, usa o modelo local até o fim
+remote_failed = False
 
 @contextmanager
 def suppress_stdout_stderr():
@@ -32,7 +36,17 @@ def suppress_stdout_stderr():
 
 def init_insightface():
     """Explicit initialization if needed outside import."""
-    global app
+    global app, remote
+    if app is None and remote is None and not remote_failed:
+        from scripts import model_server
+        remote = model_server.connect()
+        if remote is not None:
+            print("InsightFace: usando modelo já carregado no model server.")
+            return remote
+
+    if remote is not None:
+        return remote
+
     if not INSIGHTFACE_AVAILABLE:
         raise ImportError("InsightFace not installed. Please install it.")
     
@@ -62,10 +76,22 @@ def detect_faces_insightface(frame):
     Returns a list of dicts with 'bbox' and 'kps'.
     bbox is [x1, y1, x2, y2], kps is 5 keypoints (eyes, nose, mouth corners).
     """
-    global app
-    if app is None:
+    global app, remote, remote_failed
+    if app is None and remote is None:
         init_insightface()
 
+    if remote is not None:
+        try:
+            return remote.detect_faces(frame)
+        except (EOFError, OSError) as e:
+            # ConnectionError/BrokenPipe são OSError; EOFError = servidor fechou a conexão
+            print(f"InsightFace: model server indisponível ({e}). Carregando o modelo localmente...")
+            from scripts import model_server
+            model_server.disconnect()
+            remote = None
+            remote_failed = True
+            init_insightface()
+
     faces = app.get(frame)
     results = []
     for face in faces:
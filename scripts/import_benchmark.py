@@ -0,0 +1,82 @@
+import os
+import re
+import json
+import sys
+import subprocess
+import argparse
+
+# Benchmark de tempo de import.
+# Garante que importar o main_improved (e as etapas de legenda usadas por
+# --burn-only / workflow 3) continue leve: nada de torch, whisperx, cv2, mediapipe,
+# insightface ou yt_dlp até que uma etapa pesada rode de verdade.
+#
+#   python scripts/import_benchmark.py            # relatório + checagem
+#   python scripts/import_benchmark.py --budget 0.8 --top 15
+
+WORKING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["torch", "whisperx", "cv2", "mediapipe", "insightface", "yt_dlp", "onnxruntime", "llama_cpp"]
+
+# O que o --burn-only importa de fato, mais a seleção de segmentos (workflow 2),
+# que só deve carregar o backend de IA escolhido quando ele é criado
+LIGHT_TARGETS = [
+    "main_improved",
+    "scripts.adjust_subtitles",
+    "scripts.burn_subtitles",
+    "scripts.create_viral_segments",
+]
+
+CHECK_CODE = """
+import sys, json, importlib
+for name in {targets!r}:
+    importlib.import_module(name)
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+def parse_importtime(stderr):
+    """Lê a saída de -X importtime: lista de (cumulativo_us, self_us, módulo)."""
+    rows = []
+    for line in stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$", line)
+        if m:
+            rows.append((int(m.group(2)), int(m.group(1)), m.group(3).rstrip()))
+    return rows
+
+def run(targets, budget, top):
+    code = CHECK_CODE.format(targets=targets, heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=WORKING_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        print("Falha ao importar os módulos.")
+        return False
+
+    rows = parse_importtime(proc.stderr)
+    # Módulos de nível superior (sem indentação) somam o total
+    total_us = sum(cum for cum, _, name in rows if not name.startswith(" "))
+    loaded_heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"Tempo total de import: {total_us / 1e6:.3f}s (budget: {budget:.2f}s)")
+    print(f"Top {top} módulos (cumulativo):")
+    for cum, own, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cum / 1000:9.1f} ms  (self {own / 1000:7.1f} ms)  {name.strip()}")
+
+    ok = True
+    if loaded_heavy:
+        print(f"ERRO: dependências pesadas importadas cedo demais: {', '.join(loaded_heavy)}")
+        ok = False
+    if total_us / 1e6 > budget:
+        print("ERRO: tempo de import acima do budget.")
+        ok = False
+    if ok:
+        print("OK: import leve.")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time benchmark for ViralCutter")
+    parser.add_argument("--budget", type=float, default=1.0, help="Max seconds allowed for the light import path (default: 1.0)")
+    parser.add_argument("--top", type=int, default=10, help="How many slow modules to list")
+    args = parser.parse_args()
+    sys.exit(0 if run(LIGHT_TARGETS, args.budget, args.top) else 1)
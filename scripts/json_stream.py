@@ -0,0 +1,124 @@
+import re
+import ast
+import json
+
+# Parser incremental da resposta da IA.
+#
+# Recebe o texto em pedaços (tokens do stream) e devolve cada objeto do array
+# "segments" assim que o '}' dele fecha, sem esperar o resto da resposta.
+# Se a resposta for cortada no meio (timeout, max_tokens), os segmentos completos
+# já recebidos continuam valendo; só o objeto incompleto do final é descartado.
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+def _parse_object(text):
+    try:
+        return json.loads(text)
+    except Exception:
+        pass
+    try:
+        # Modelos locais às vezes devolvem dict no estilo Python (aspas simples, True/None)
+        return ast.literal_eval(text)
+    except Exception:
+        pass
+    try:
+        # Vírgula sobrando antes do '}'
+        return json.loads(re.sub(r",\s*}", "}", text))
+    except Exception:
+        return None
+
+class SegmentStreamParser:
+    def __init__(self, key="segments"):
+        self.key = key
+        self.buf = ""
+        self.pos = 0
+        self.depth = 0
+        self.quote = None
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.after_key = False
+        self.array_depth = None
+        self.object_start = None
+        self.segments = []
+
+    def feed(self, text):
+        """Adiciona texto e retorna a lista de segmentos que fecharam neste pedaço."""
+        self.buf += text
+        found = []
+        buf = self.buf
+        n = len(buf)
+        pos = self.pos
+        while pos < n:
+            c = buf[pos]
+            if self.quote:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == self.quote:
+                    self.quote = None
+                    self.last_string = buf[self.string_start:pos]
+                    self.after_key = False
+                pos += 1
+                continue
+
+            if c == "<" and self.array_depth is None:
+                # Bloco de raciocínio (DeepSeek R1 etc.): pode conter chaves/aspas soltas
+                if buf.startswith(THINK_OPEN, pos):
+                    end = buf.find(THINK_CLOSE, pos)
+                    if end == -1:
+                        break  # espera o fechamento chegar
+                    pos = end + len(THINK_CLOSE)
+                    continue
+                if THINK_OPEN.startswith(buf[pos:]):
+                    break  # "<thi" incompleto no fim do pedaço
+
+            # Aspas simples só dentro do JSON: fora dele são apóstrofos do texto ("Here's the JSON")
+            if c == '"' or (c == "'" and self.depth > 0):
+                self.quote = c
+                self.string_start = pos + 1
+            elif c == ":":
+                self.after_key = self.last_string == self.key
+            elif c == "{" or c == "[":
+                self.depth += 1
+                if c == "[" and self.after_key and self.array_depth is None:
+                    self.array_depth = self.depth
+                elif c == "{" and self.array_depth is not None and self.depth == self.array_depth + 1:
+                    self.object_start = pos
+                self.after_key = False
+            elif c == "}" or c == "]":
+                if c == "}" and self.object_start is not None and self.depth == self.array_depth + 1:
+                    obj = _parse_object(buf[self.object_start:pos + 1])
+                    if isinstance(obj, dict):
+                        found.append(obj)
+                    self.object_start = None
+                elif c == "]" and self.array_depth is not None and self.depth == self.array_depth:
+                    self.array_depth = None
+                self.depth = max(0, self.depth - 1)
+                self.after_key = False
+            elif not c.isspace():
+                self.last_string = None
+                self.after_key = False
+            pos += 1
+        self.pos = pos
+        self.segments.extend(found)
+        return found
+
+    @property
+    def truncated(self):
+        """True se o texto terminou com um segmento ou o array "segments" ainda abertos."""
+        return self.object_start is not None or self.array_depth is not None
+
+    def close(self):
+        """Fim do stream. Retorna todos os segmentos completos (o resto truncado é ignorado)."""
+        if self.object_start is not None:
+            print(f"[WARN] Resposta da IA truncada: último segmento incompleto descartado ({len(self.segments)} segmentos aproveitados).")
+        return self.segments
+
+def parse_segments(text):
+    """Conveniência: todos os segmentos completos de uma resposta já inteira."""
+    parser = SegmentStreamParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,35 @@
+import importlib
+import sys
+
+# Import sob demanda: o módulo real só é carregado no primeiro acesso a um atributo.
+# Usado para que fluxos leves (--burn-only, workflow 3) não paguem o import de
+# torch / whisperx / mediapipe / cv2 / yt_dlp.
+
+class LazyModule:
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = object.__getattribute__(self, "_module")
+        if module is None:
+            module = importlib.import_module(object.__getattribute__(self, "_name"))
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        name = object.__getattribute__(self, "_name")
+        state = "loaded" if object.__getattribute__(self, "_module") is not None else "not loaded"
+        return f"<lazy module '{name}' ({state})>"
+
+def lazy_module(name):
+    """Retorna o módulo se já estiver importado, senão um proxy que importa no primeiro uso."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
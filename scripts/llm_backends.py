@@ -0,0 +1,351 @@
+import os
+import re
+import json
+import time
+
+from scripts.llm_dispatch import RetryLater
+from scripts.json_stream import SegmentStreamParser
+
+# Backends de IA para a seleção de segmentos, com a mesma interface:
+#
+#   backend.complete(prompt) -> str        uma tentativa; RetryLater em rate limit
+#   backend.stream(prompt)   -> iter[str]  pedaços de texto conforme chegam
+#   backend.prepare(prompts)               opcional (ex: prefixo do llama.cpp)
+#
+# call_with_retry() aplica a mesma política de retry a todos. O backend "openai"
+# fala com qualquer servidor compatível (llama.cpp server, vLLM, LM Studio, Ollama...)
+# usando um httpx.Client compartilhado (keep-alive) por base_url.
+#
+# As bibliotecas de cada backend (google-generativeai, g4f, llama_cpp, httpx) só são
+# importadas quando o backend é criado, para não pesar no import do pipeline.
+
+LOCAL_SYSTEM_PROMPT = "You are a helpful assistant that outputs only JSON."
+
+def chat_messages(prompt):
+    return [
+        {"role": "system", "content": LOCAL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+class LLMBackend:
+    name = "base"
+    # Pode receber vários prompts em paralelo (llm_dispatch)?
+    concurrent = True
+    max_retries = 3
+
+    def complete(self, prompt):
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt):
+        yield self.complete(prompt)
+
+    def prepare(self, prompts):
+        pass
+
+def stream_response(backend, prompt, on_segment=None):
+    """
+    Consome backend.stream(prompt) alimentando o parser incremental.
+    on_segment(seg) é chamado para cada segmento assim que ele fecha.
+    Se o stream cair depois de já ter segmentos completos, devolve o parcial em vez de falhar.
+    Retorna (texto, segmentos, parcial); parcial=True quando o stream foi interrompido
+    ou terminou com o JSON cortado (ex: max_tokens).
+    """
+    parser = SegmentStreamParser()
+    parts = []
+    partial = False
+    try:
+        for text in backend.stream(prompt):
+            parts.append(text)
+            for seg in parser.feed(text):
+                if on_segment:
+                    on_segment(seg)
+    except Exception as e:
+        if not parser.segments:
+            raise
+        print(f"[WARN] Stream interrompido ({backend.name}: {e}). Usando {len(parser.segments)} segmentos já recebidos.")
+        partial = True
+    partial = partial or parser.truncated
+    return "".join(parts), parser.close(), partial
+
+def call_with_retry(backend, prompt, max_retries=None, on_segment=None, return_partial=False):
+    """
+    Retry uniforme (bloqueante) para chamadas sequenciais. Falha final vira "{}".
+    return_partial=True devolve (texto, parcial); falhas contam como parciais (não devem ir para o cache).
+    """
+    max_retries = max_retries or backend.max_retries
+    result = ("{}", True)
+    for attempt in range(max_retries):
+        try:
+            text, _, partial = stream_response(backend, prompt, on_segment=on_segment)
+            result = (text, partial)
+            break
+        except RetryLater as e:
+            if attempt < max_retries - 1:
+                print(f"[{backend.name}] {e}. Waiting {e.delay:.2f}s before retry {attempt+1}/{max_retries}...", flush=True)
+                time.sleep(e.delay)
+            else:
+                print(f"Falha após {max_retries} tentativas ({backend.name}).")
+        except ImportError:
+            raise
+        except Exception as e:
+            print(f"Erro na API ({backend.name}): {e}")
+            break
+    return result if return_partial else result[0]
+
+def rate_limited(error):
+    """RetryLater para erros de rate limit / quota (429), None para os demais."""
+    error_str = str(error)
+    if "429" in error_str or "Quota exceeded" in error_str:
+        wait_time = 30.0
+        match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
+        if match:
+            wait_time = float(match.group(1)) + 5.0
+        return RetryLater(wait_time, "[429] Quota Exceeded")
+    return None
+
+# --- Gemini ----------------------------------------------------------------------
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    max_retries = 5
+
+    def __init__(self, api_key, model_name='gemini-2.5-flash-lite-preview-09-2025'):
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            raise ImportError("A biblioteca 'google-generativeai' não está instalada. Instale com: pip install google-generativeai")
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def complete(self, prompt):
+        try:
+            return self.model.generate_content(prompt).text
+        except Exception as e:
+            retry = rate_limited(e)
+            if retry:
+                raise retry
+            raise
+
+    def stream(self, prompt):
+        try:
+            for part in self.model.generate_content(prompt, stream=True):
+                text = getattr(part, "text", "")
+                if text:
+                    yield text
+        except Exception as e:
+            retry = rate_limited(e)
+            if retry:
+                raise retry
+            raise
+
+# --- G4F -------------------------------------------------------------------------
+
+class G4FBackend(LLMBackend):
+    name = "g4f"
+    max_retries = 3
+
+    def __init__(self, model_name="gpt-4o-mini"):
+        try:
+            import g4f
+        except ImportError:
+            raise ImportError("A biblioteca 'g4f' não está instalada. Instale com: pip install g4f")
+        self.g4f = g4f
+        self.model_name = model_name
+
+    def complete(self, prompt):
+        try:
+            response = self.g4f.ChatCompletion.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except Exception as e:
+            # Só rate limit e falhas de transporte valem retry; modelo inválido, auth etc. sobem direto
+            retry = rate_limited(e)
+            if retry:
+                raise retry
+            if isinstance(e, (ConnectionError, TimeoutError)):
+                raise RetryLater(5.0, f"Erro na API do G4F: {e}")
+            raise
+
+        if isinstance(response, dict):
+            if 'error' in response:
+                raise RetryLater(5.0, f"API Error: {response['error']}")
+            if 'choices' in response and isinstance(response['choices'], list):
+                if len(response['choices']) > 0:
+                     content = response['choices'][0].get('message', {}).get('content', '')
+                     if content:
+                         return content
+            if not response:
+                 raise RetryLater(5.0, "Empty Dict response")
+
+            return json.dumps(response)
+
+        if not response:
+            raise RetryLater(5.0, "G4F retornou resposta vazia")
+
+        if isinstance(response, str):
+            return response
+
+        try:
+            return json.dumps(response, ensure_ascii=False)
+        except:
+            return str(response)
+
+# --- llama.cpp local (GGUF) --------------------------------------------------------
+
+class LlamaCppBackend(LLMBackend):
+    name = "local"
+    concurrent = False
+    max_retries = 1
+
+    def __init__(self, model_path, n_ctx=8192, max_tokens=4096, temperature=0.7):
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            raise ImportError("llama-cpp-python not installed. Please install it to use Local mode.")
+        print(f"[INFO] Loading Local Model: {os.path.basename(model_path)} (This may take a while)...")
+        self.llm = Llama(model_path=model_path, n_gpu_layers=-1, n_ctx=n_ctx, verbose=False)
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.prefix_state = None
+
+    def prepare(self, prompts):
+        """
+        Avalia uma vez o prefixo comum a todos os prompts (system + instruções do prompt.txt)
+        e salva o estado do llama.cpp. Antes de cada chunk o estado é restaurado e o
+        llama.cpp reaproveita esses tokens, avaliando só o que muda (o transcript).
+        """
+        if len(prompts) < 2:
+            return
+
+        prefix = os.path.commonprefix(prompts)
+        # Corta numa quebra de linha para o último token do prefixo não mudar com o chunk
+        cut = prefix.rfind("\n")
+        if cut <= 0:
+            return
+        prefix = prefix[:cut + 1]
+
+        try:
+            started = time.time()
+            self.llm.create_chat_completion(messages=chat_messages(prefix), max_tokens=1, temperature=0.0)
+            self.prefix_state = self.llm.save_state()
+            n_prefix = len(self.llm.tokenize(prefix.encode("utf-8"), add_bos=False))
+            print(f"[INFO] Prefixo do prompt (~{n_prefix} tokens) avaliado uma vez em {time.time() - started:.1f}s e reaproveitado em {len(prompts)} chunks.")
+        except Exception as e:
+            print(f"[WARN] Não foi possível preparar o cache de prefixo do llama.cpp: {e}")
+
+    def stream(self, prompt):
+        if self.prefix_state is not None:
+            # Volta ao KV logo após o prefixo: só o transcript do chunk é avaliado
+            self.llm.load_state(self.prefix_state)
+        for part in self.llm.create_chat_completion(
+            messages=chat_messages(prompt),
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=True,
+        ):
+            delta = part['choices'][0].get('delta', {})
+            if delta.get('content'):
+                yield delta['content']
+
+# --- OpenAI-compatible HTTP ---------------------------------------------------------
+
+_HTTP_CLIENTS = {}
+
+def get_http_client(base_url, timeout=600.0, max_connections=16):
+    """Um httpx.Client (pool keep-alive) por base_url, compartilhado no processo."""
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("A biblioteca 'httpx' não está instalada. Instale com: pip install httpx")
+    client = _HTTP_CLIENTS.get(base_url)
+    if client is None:
+        client = httpx.Client(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        _HTTP_CLIENTS[base_url] = client
+    return client
+
+class OpenAICompatibleBackend(LLMBackend):
+    name = "openai"
+    max_retries = 5
+
+    def __init__(self, base_url, model_name, api_key=None, timeout=600.0, max_tokens=4096, temperature=0.7, max_connections=16):
+        self.base_url = base_url.rstrip("/")
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.headers = {"Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+        self.client = get_http_client(self.base_url, timeout=timeout, max_connections=max_connections)
+
+    def _payload(self, prompt, stream):
+        return {
+            "model": self.model_name,
+            "messages": chat_messages(prompt),
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "stream": stream,
+        }
+
+    def _check(self, response):
+        if response.status_code in (429, 502, 503, 504):
+            retry_after = response.headers.get("retry-after")
+            try:
+                delay = float(retry_after) if retry_after else 5.0
+            except ValueError:
+                delay = 5.0
+            raise RetryLater(delay, f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            response.read()
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+    def stream(self, prompt):
+        import httpx
+        try:
+            with self.client.stream("POST", "/chat/completions", json=self._payload(prompt, True), headers=self.headers) as response:
+                self._check(response)
+                for line in response.iter_lines():
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    choices = event.get("choices") or []
+                    if choices:
+                        text = (choices[0].get("delta") or {}).get("content")
+                        if text:
+                            yield text
+        except (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+            raise RetryLater(5.0, f"{type(e).__name__}: {e}")
+
+# --- Fábrica -----------------------------------------------------------------------
+
+def get_backend(ai_mode, config=None, model_name=None, api_key=None, model_path=None, n_ctx=8192, max_tokens=4096):
+    """Cria o backend do ai_mode ('gemini', 'g4f', 'local', 'openai')."""
+    config = config or {}
+    if ai_mode == "gemini":
+        return GeminiBackend(api_key, model_name=model_name)
+    if ai_mode == "g4f":
+        return G4FBackend(model_name=model_name)
+    if ai_mode == "local":
+        return LlamaCppBackend(model_path, n_ctx=n_ctx, max_tokens=max_tokens)
+    if ai_mode == "openai":
+        cfg = config.get("openai", {})
+        return OpenAICompatibleBackend(
+            cfg.get("base_url", "http://127.0.0.1:8080/v1"),
+            model_name or cfg.get("model", "default"),
+            api_key=api_key or cfg.get("api_key") or None,
+            timeout=float(cfg.get("timeout", 600)),
+            max_tokens=int(cfg.get("max_output_tokens", max_tokens)),
+            max_connections=int(cfg.get("max_concurrency", 4)) * 2,
+        )
+    raise ValueError(f"Backend de IA desconhecido: {ai_mode}")
@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import hashlib
+
+# Cache persistente das respostas da IA (seleção de segmentos).
+#
+# cache/llm/<sha256>.json -> {"model": ..., "created": ..., "response": "..."}
+#
+# A chave é o hash do modelo + prompt completo, então o mesmo transcript/prompt/tema/modelo
+# nunca paga a chamada duas vezes, em qualquer projeto. O tamanho total é limitado;
+# ao passar do limite os arquivos menos usados recentemente (mtime) são removidos.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "llm")
+DEFAULT_MAX_MB = 50
+
+def cache_key(model_name, prompt, backend=""):
+    h = hashlib.sha256()
+    for part in (backend, model_name or "", prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{key}.json")
+
+def get(key, cache_dir=None):
+    """Resposta em cache ou None. Um hit atualiza o mtime (LRU)."""
+    path = _path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path, None)
+        return entry.get("response")
+    except Exception:
+        return None
+
+def put(key, response, model_name="", cache_dir=None, max_mb=DEFAULT_MAX_MB):
+    """Grava a resposta. Respostas vazias/falhas ("{}") não são guardadas."""
+    if not response or not str(response).strip() or str(response).strip() == "{}":
+        return
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(key, cache_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"model": model_name, "created": time.time(), "response": response}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    evict(max_mb * 1024 * 1024, cache_dir)
+
+def evict(max_bytes, cache_dir=None):
+    """Remove as entradas menos usadas até o cache caber em max_bytes."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+# Envio concorrente dos chunks para a IA, respeitando limites de
+# requisições por minuto (rpm) e tokens por minuto (tpm) com token buckets.
+# Um 429 só faz aquele chunk esperar (asyncio.sleep); os outros continuam.
+
+class RetryLater(Exception):
+    """Levante dentro da função de chamada para pedir nova tentativa após `delay` segundos."""
+
+    def __init__(self, delay, message=""):
+        super().__init__(message or f"retry in {delay:.1f}s")
+        self.delay = delay
+
+class TokenBucket:
+    """Bucket que reabastece `rate_per_minute` unidades por minuto, até `capacity`."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # Pedidos maiores que a capacidade passariam a esperar para sempre
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class RateLimiter:
+    """rpm e/ou tpm (None ou 0 = sem limite)."""
+
+    def __init__(self, rpm=None, tpm=None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    async def acquire(self, tokens=0):
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens and tokens:
+            await self.tokens.acquire(tokens)
+
+def estimate_tokens(text):
+    """Aproximação barata: ~4 caracteres por token."""
+    return max(1, len(text) // 4)
+
+async def dispatch(prompts, call, rpm=None, tpm=None, max_concurrency=4, max_retries=5, label="chunk"):
+    """
+    Executa call(prompt) -> str para todos os prompts, em paralelo (threads),
+    e devolve as respostas na mesma ordem dos prompts.
+    call pode levantar RetryLater(delay) para rate limit; outros erros viram "{}".
+    """
+    limiter = RateLimiter(rpm, tpm)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    results = [None] * len(prompts)
+
+    async def run_one(idx, prompt):
+        for attempt in range(max_retries):
+            await limiter.acquire(estimate_tokens(prompt))
+            async with semaphore:
+                try:
+                    print(f"Enviando {label} {idx + 1}/{len(prompts)}...", flush=True)
+                    results[idx] = await asyncio.to_thread(call, prompt)
+                    return
+                except RetryLater as e:
+                    delay = e.delay
+                except Exception as e:
+                    print(f"[WARN] Erro no {label} {idx + 1}: {e}")
+                    results[idx] = "{}"
+                    return
+            # Espera fora do semáforo: outros chunks seguem enquanto este aguarda
+            print(f"[429] {label} {idx + 1}: aguardando {delay:.1f}s (tentativa {attempt + 1}/{max_retries})", flush=True)
+            await asyncio.sleep(delay)
+        print(f"Falha após max retries no {label} {idx + 1}.")
+        results[idx] = "{}"
+
+    await asyncio.gather(*(run_one(i, p) for i, p in enumerate(prompts)))
+    return results
+
+def run_dispatch(prompts, call, **kwargs):
+    """Versão síncrona de dispatch()."""
+    return asyncio.run(dispatch(prompts, call, **kwargs))
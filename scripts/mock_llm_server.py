@@ -0,0 +1,130 @@
+import re
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor OpenAI-compatível falso, para testar o backend "openai" offline
+# (sem chave, sem GPU, sem internet). Responde /v1/models e /v1/chat/completions
+# (normal e stream SSE) com segmentos montados a partir das tags (XXs) do prompt.
+#
+#   python -m scripts.mock_llm_server --port 8080 --delay 0.5 --rate-limit 0.2
+#   python main_improved.py --ai-backend openai ...   (base_url padrão: http://127.0.0.1:8080/v1)
+
+TAG_PATTERN = re.compile(r"\((\d+)s\)\s*([^()]+)")
+
+def fake_segments(prompt, count=3):
+    """Segmentos plausíveis usando trechos reais do transcript do prompt."""
+    # Ignora os exemplos de tags das instruções do prompt.txt (entre aspas/crases)
+    pieces = [(int(t), text.strip()) for t, text in TAG_PATTERN.findall(prompt)
+              if len(text.split()) >= 3 and not any(c in text for c in '"`')]
+    segments = []
+    if not pieces:
+        return {"segments": segments}
+    step = max(1, len(pieces) // count)
+    for i in range(0, len(pieces), step):
+        first = pieces[i]
+        last = pieces[min(len(pieces) - 1, i + max(1, step - 1))]
+        segments.append({
+            "start_text": " ".join(first[1].split()[:8]),
+            "end_text": " ".join(last[1].split()[-8:]),
+            "start_time_ref": f"{first[0]}s",
+            "title": f"Mock segment {len(segments) + 1}",
+            "reasoning": "Generated by mock_llm_server",
+            "score": random.randint(70, 99),
+        })
+        if len(segments) >= count:
+            break
+    return {"segments": segments}
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    rate_limit = 0.0
+
+    def log_message(self, fmt, *args):
+        print(f"[MOCK] {self.address_string()} {fmt % args}")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid json"})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if random.random() < self.rate_limit:
+            self._send_json(429, {"error": "rate limited"}, headers={"Retry-After": "1"})
+            return
+
+        time.sleep(self.delay)
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        content = json.dumps(fake_segments(prompt), ensure_ascii=False, indent=2)
+        model = request.get("model", "mock")
+
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": "mock-1", "object": "chat.completion", "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            })
+            return
+
+        # SSE: manda a resposta em pedaços pequenos, como um servidor real
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_chunk(data):
+            line = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+        for i in range(0, len(content), 16):
+            event = {"id": "mock-1", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}]}
+            send_chunk(json.dumps(event))
+        send_chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+def serve(host="127.0.0.1", port=8080, delay=0.0, rate_limit=0.0):
+    MockHandler.delay = delay
+    MockHandler.rate_limit = rate_limit
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    print(f"[MOCK] OpenAI-compatible server em http://{host}:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server for offline tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.delay, args.rate_limit)
@@ -0,0 +1,280 @@
+import os
+import sys
+import gc
+import time
+import secrets
+import threading
+import argparse
+from multiprocessing.connection import Listener, Client
+
+# Servidor local que mantém os modelos "quentes" (Whisper, wav2vec2 de alinhamento,
+# InsightFace buffalo_l) entre execuções do main_improved.py.
+#
+# Protocolo: multiprocessing.connection (pickle) em 127.0.0.1, autenticado com a
+# chave em models/model_server.key (gerada pelo servidor ao subir).
+# Cada requisição é um dict {"op": ..., ...}; a resposta é {"ok": True, "result": ...}
+# ou {"ok": False, "error": "..."}.
+#
+# MediaPipe não é servido: os grafos carregam em milissegundos e guardam estado de
+# tracking por vídeo, então continuam locais no edit_video.
+
+WORKING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEY_FILE = os.path.join(WORKING_DIR, "models", "model_server.key")
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("VIRALCUTTER_MODEL_SERVER_PORT", "6419"))
+
+# --- Cliente ---------------------------------------------------------------------
+
+class ModelClient:
+    """Conexão com o servidor de modelos. Use connect()."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def call(self, op, **kwargs):
+        request = {"op": op}
+        request.update(kwargs)
+        with self.lock:
+            self.conn.send(request)
+            response = self.conn.recv()
+        if not response.get("ok"):
+            raise RuntimeError(f"Model server ({op}): {response.get('error')}")
+        return response.get("result")
+
+    def ping(self):
+        return self.call("ping")
+
+    # Caminhos vão absolutos: o servidor roda em outro processo, com outro cwd
+    def transcribe(self, audio_path, model_name, language=None, batch_size=None, chunk_size=10):
+        return self.call("transcribe", audio_path=os.path.abspath(audio_path), model_name=model_name,
+                         language=language, batch_size=batch_size, chunk_size=chunk_size)
+
+    def align(self, segments, audio_path, language):
+        return self.call("align", segments=segments, audio_path=os.path.abspath(audio_path), language=language)
+
+    def detect_faces(self, frame):
+        return self.call("detect", frame=frame)
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+_client = None
+
+def disconnect():
+    """Esquece a conexão atual (ex: servidor caiu no meio do job)."""
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
+
+def _read_key():
+    if not os.path.exists(KEY_FILE):
+        return None
+    with open(KEY_FILE, "rb") as f:
+        return f.read().strip() or None
+
+def connect(quiet=True):
+    """
+    Retorna um ModelClient se o servidor estiver rodando, senão None.
+    A conexão é reaproveitada dentro do mesmo processo.
+    """
+    global _client
+    if _client is not None:
+        return _client
+
+    if os.environ.get("VIRALCUTTER_NO_MODEL_SERVER"):
+        return None
+
+    key = _read_key()
+    if key is None:
+        return None
+
+    try:
+        conn = Client((HOST, PORT), authkey=key)
+        client = ModelClient(conn)
+        client.ping()
+    except Exception as e:
+        if not quiet:
+            print(f"Model server indisponível: {e}")
+        return None
+
+    print(f"Usando model server em {HOST}:{PORT} (modelos já carregados).")
+    _client = client
+    return _client
+
+def is_running():
+    return connect() is not None
+
+# --- Servidor --------------------------------------------------------------------
+
+class ModelHost:
+    """Guarda os modelos carregados. Uma requisição de GPU por vez (lock)."""
+
+    def __init__(self, device=None, compute_type=None):
+        import torch
+        from scripts.transcribe_video import apply_safe_globals_hack
+
+        apply_safe_globals_hack()
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        # Em CPU, compute_type/threads/batch vêm do perfil calibrado (models/cpu_profile.json)
+        self.compute_type = compute_type or ("float16" if self.device == "cuda" else None)
+        self.batch_sizes = {}
+        self.whisper = {}
+        self.align_models = {}
+        self.face_app = None
+        self.audio_cache = (None, None, None)  # (path, mtime, audio)
+        self.lock = threading.Lock()
+
+    def _audio(self, path):
+        from scripts import audio_cache
+        mtime = os.path.getmtime(path)
+        cached_path, cached_mtime, audio = self.audio_cache
+        if cached_path != path or cached_mtime != mtime:
+            audio = audio_cache.load_audio(path)
+            self.audio_cache = (path, mtime, audio)
+        return audio
+
+    def _whisper(self, model_name):
+        import whisperx
+        if model_name not in self.whisper:
+            compute_type = self.compute_type
+            model_kwargs = {}
+            batch_size = 16
+            if self.device == "cpu":
+                from scripts.transcribe_video import saved_cpu_profile
+                profile = saved_cpu_profile(model_name)
+                compute_type = compute_type or profile["compute_type"]
+                model_kwargs["threads"] = profile["threads"]
+                batch_size = profile["batch_size"]
+            print(f"[server] Carregando modelo {model_name} ({compute_type}, batch {batch_size})...")
+            self.whisper[model_name] = whisperx.load_model(
+                model_name, self.device, compute_type=compute_type, asr_options={"hotwords": None}, **model_kwargs
+            )
+            self.batch_sizes[model_name] = batch_size
+        return self.whisper[model_name]
+
+    def _align_model(self, language):
+        import whisperx
+        if language not in self.align_models:
+            print(f"[server] Carregando modelo de alinhamento ({language})...")
+            self.align_models[language] = whisperx.load_align_model(language_code=language, device=self.device)
+        return self.align_models[language]
+
+    def op_ping(self, request):
+        return {"device": self.device, "pid": os.getpid(),
+                "whisper": list(self.whisper), "align": list(self.align_models),
+                "insightface": self.face_app is not None}
+
+    def op_transcribe(self, request):
+        model = self._whisper(request["model_name"])
+        audio = self._audio(request["audio_path"])
+        batch_size = request.get("batch_size") or self.batch_sizes.get(request["model_name"], 16)
+        return model.transcribe(audio, batch_size=batch_size,
+                                chunk_size=request.get("chunk_size", 10),
+                                language=request.get("language"))
+
+    def op_align(self, request):
+        import whisperx
+        model_a, metadata = self._align_model(request["language"])
+        audio = self._audio(request["audio_path"])
+        result = whisperx.align(request["segments"], model_a, metadata, audio, self.device,
+                                return_char_alignments=False)
+        result["language"] = request["language"]
+        return result
+
+    def op_detect(self, request):
+        from scripts import face_detection_insightface as fdi
+        if self.face_app is None:
+            print("[server] Inicializando InsightFace...")
+            self.face_app = fdi.init_insightface()
+        return fdi.detect_faces_insightface(request["frame"])
+
+    def op_release(self, request):
+        """Libera os modelos (ex: antes de rodar algo que precisa de toda a VRAM)."""
+        self.whisper.clear()
+        self.align_models.clear()
+        self.audio_cache = (None, None, None)
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        return True
+
+    def handle(self, request):
+        handler = getattr(self, "op_" + str(request.get("op")), None)
+        if handler is None:
+            raise ValueError(f"Operação desconhecida: {request.get('op')}")
+        with self.lock:
+            return handler(request)
+
+def _serve_connection(host, conn):
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                break
+            start = time.time()
+            try:
+                response = {"ok": True, "result": host.handle(request)}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            conn.send(response)
+            if request.get("op") != "ping":
+                print(f"[server] {request.get('op')} em {time.time() - start:.2f}s")
+    finally:
+        conn.close()
+
+def serve(preload_model=None, preload_faces=False):
+    # O próprio servidor nunca deve tentar se conectar a si mesmo
+    os.environ["VIRALCUTTER_NO_MODEL_SERVER"] = "1"
+    key = secrets.token_hex(32).encode()
+    os.makedirs(os.path.dirname(KEY_FILE), exist_ok=True)
+    with open(KEY_FILE, "wb") as f:
+        f.write(key)
+    try:
+        os.chmod(KEY_FILE, 0o600)
+    except OSError:
+        pass
+
+    host = ModelHost()
+    if preload_model:
+        host._whisper(preload_model)
+    if preload_faces:
+        import numpy as np
+        try:
+            host.op_detect({"frame": np.zeros((64, 64, 3), dtype=np.uint8)})
+        except Exception as e:
+            print(f"[server] InsightFace indisponível: {e}")
+
+    listener = Listener((HOST, PORT), authkey=key)
+    print(f"Model server ouvindo em {HOST}:{PORT} (device: {host.device}). Ctrl+C para parar.")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Conexão com chave errada, etc.
+                print(f"[server] Conexão recusada: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(host, conn), daemon=True).start()
+    except KeyboardInterrupt:
+        print("Model server encerrado.")
+    finally:
+        listener.close()
+        try:
+            os.remove(KEY_FILE)
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    sys.path.insert(0, WORKING_DIR)
+    parser = argparse.ArgumentParser(description="ViralCutter warm model server")
+    parser.add_argument("--model", default=None, help="Whisper model to preload (e.g. large-v3)")
+    parser.add_argument("--faces", action="store_true", help="Preload InsightFace buffalo_l")
+    args = parser.parse_args()
+    serve(preload_model=args.model, preload_faces=args.faces)
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Etapas do pipeline como um DAG com entradas/saídas declaradas.
+#
+# VIRALS/<projeto>/pipeline.json
+#   {"cut": {"status": "done", "key": "...", "inputs": {"cuts": "<hash>", ...},
+#            "params": {...}, "finished": ts, "seconds": 12.3}, ...}
+#
+# Uma etapa depende da última etapa declarada antes dela que escreve um dos caminhos
+# que ela lê. Ela é pulada quando o hash de conteúdo das entradas + parâmetros é o
+# mesmo da última execução e as saídas ainda existem; etapas sem dependência entre si
+# rodam em paralelo. O hash das entradas é gravado depois da execução, então uma etapa
+# que altera a própria entrada (tradução em subs/, alinhamento no transcript) não
+# roda de novo à toa.
+#
+# Projeto sem registro de uma etapa (criado antes do manifesto) com as saídas já
+# presentes e nada antes dela rodando agora: a etapa é adotada como feita, sem rodar.
+# Não adota quando uma entrada só é escrita por etapas desativadas (re-render, ex:
+# workflow 3 sobre cortes/legendas já existentes): aí a etapa roda.
+# Etapa interrompida fica como "running"/"failed" e sempre roda de novo.
+
+MANIFEST = "pipeline.json"
+# Bytes lidos do começo e do fim de arquivos grandes (vídeos) para o hash
+HASH_SAMPLE = 1024 * 1024
+
+class UnknownStageError(ValueError):
+    """Nome de etapa desconhecido em force (--rerun)."""
+    def __init__(self, unknown, valid):
+        self.unknown = sorted(unknown)
+        self.valid = list(valid)
+        super().__init__(f"Etapas desconhecidas: {', '.join(self.unknown)}")
+
+class Stage:
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, enabled=True):
+        """
+        func(changed) recebe a lista de entradas que mudaram desde a última execução
+        ("params" se os parâmetros mudaram; todas se nunca rodou).
+        inputs/outputs: caminhos (arquivos ou pastas) relativos ao projeto.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.enabled = enabled
+        self.deps = []
+        self.rerender = False
+
+def hash_path(path):
+    """Hash do conteúdo de um arquivo (amostrado se grande) ou de uma pasta inteira. None se não existe."""
+    if os.path.isdir(path):
+        h = hashlib.sha256(b"dir")
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".tmp"):
+                    continue
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).replace(os.sep, "/").encode("utf-8"))
+                h.update((hash_path(full) or "").encode("ascii"))
+        return h.hexdigest()[:32]
+    if not os.path.isfile(path):
+        return None
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        if size <= 2 * HASH_SAMPLE:
+            h.update(f.read())
+        else:
+            h.update(f.read(HASH_SAMPLE))
+            f.seek(size - HASH_SAMPLE)
+            h.update(f.read(HASH_SAMPLE))
+    return h.hexdigest()[:32]
+
+def load_manifest(project_folder):
+    path = os.path.join(project_folder, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_manifest(project_folder, manifest):
+    path = os.path.join(project_folder, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(path + ".tmp", path)
+
+def _params_json(params):
+    return json.loads(json.dumps(params, sort_keys=True, default=str))
+
+def _stage_key(input_hashes, params):
+    payload = json.dumps({"inputs": input_hashes, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+def resolve_dependencies(stages):
+    """
+    Liga cada etapa à última etapa ativa declarada antes dela que escreve uma das suas entradas.
+    stage.rerender = True quando alguma entrada só tem escritores desativados nesta execução.
+    """
+    active = [s for s in stages if s.enabled]
+    for i, stage in enumerate(active):
+        stage.deps = []
+        for path in stage.inputs:
+            writer = next((s for s in reversed(active[:i]) if path in s.outputs), None)
+            if writer is not None and writer not in stage.deps:
+                stage.deps.append(writer)
+        before = stages[:stages.index(stage)]
+        stage.rerender = any(
+            not any(s.enabled for s in before if path in s.outputs)
+            and any(path in s.outputs for s in before)
+            for path in stage.inputs
+        )
+    return active
+
+def run(stages, project_folder, max_workers=4, force=()):
+    """
+    Executa as etapas ativas respeitando as dependências, em até max_workers threads.
+    force: nomes de etapas para rodar mesmo sem mudança ("all" = todas). Nome desconhecido
+    levanta UnknownStageError (ValueError) antes de rodar qualquer etapa.
+    Retorna {nome: "ran" | "skipped" | "adopted" | "disabled"}. Se uma etapa falha,
+    as que dependem dela não rodam e o erro é relançado no fim.
+    """
+    force = set(force or ())
+    unknown = force - {s.name for s in stages} - {"all"}
+    if unknown:
+        raise UnknownStageError(unknown, [s.name for s in stages])
+    active = resolve_dependencies(stages)
+    manifest = load_manifest(project_folder)
+    lock = threading.Lock()
+    results = {s.name: "disabled" for s in stages if not s.enabled}
+
+    def record(name, entry):
+        with lock:
+            if entry is None:
+                manifest.pop(name, None)
+            else:
+                manifest[name] = entry
+            save_manifest(project_folder, manifest)
+
+    def execute(stage):
+        paths = {p: os.path.join(project_folder, p) for p in stage.inputs}
+        params = _params_json(stage.params)
+        previous = manifest.get(stage.name)
+        outputs_ok = all(os.path.exists(os.path.join(project_folder, p)) for p in stage.outputs)
+        input_hashes = {p: hash_path(full) for p, full in paths.items()}
+
+        upstream_ran = any(results.get(d.name) == "ran" for d in stage.deps)
+        if (previous is None and outputs_ok and stage.outputs and not upstream_ran and not stage.rerender
+                and stage.name not in force and "all" not in force):
+            print(f"[PIPELINE] {stage.name}: saídas já existem, adotando sem rodar.")
+            record(stage.name, {"status": "done", "key": _stage_key(input_hashes, params),
+                                "inputs": input_hashes, "params": params, "finished": time.time(), "adopted": True})
+            return "adopted"
+
+        if previous and previous.get("status") == "done":
+            changed = [p for p in stage.inputs if previous.get("inputs", {}).get(p) != input_hashes[p]]
+            if previous.get("params") != params:
+                changed.append("params")
+        else:
+            changed = list(stage.inputs) + ["params"]
+
+        forced = stage.name in force or "all" in force
+        if not changed and outputs_ok and not forced:
+            print(f"[PIPELINE] {stage.name}: entradas sem mudança, pulando.")
+            return "skipped"
+
+        reason = "forçado" if forced and not changed else ", ".join(changed) or "saídas ausentes"
+        print(f"[PIPELINE] {stage.name}: rodando ({reason})")
+        record(stage.name, {"status": "running", "started": time.time()})
+        start = time.time()
+        try:
+            stage.func(changed)
+        except BaseException:
+            record(stage.name, {"status": "failed", "finished": time.time()})
+            raise
+        # Hash depois da execução: a etapa pode ter alterado a própria entrada
+        input_hashes = {p: hash_path(full) for p, full in paths.items()}
+        record(stage.name, {"status": "done", "key": _stage_key(input_hashes, params),
+                            "inputs": input_hashes, "params": params,
+                            "finished": time.time(), "seconds": round(time.time() - start, 2)})
+        return "ran"
+
+    pending = list(active)
+    running = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            if error is None:
+                for stage in list(pending):
+                    if all(results.get(d.name) in ("ran", "skipped", "adopted") for d in stage.deps):
+                        pending.remove(stage)
+                        running[pool.submit(execute, stage)] = stage
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name] = future.result()
+                except BaseException as e:
+                    results[stage.name] = "failed"
+                    if error is None:
+                        error = e
+                    print(f"[PIPELINE] {stage.name}: falhou ({e}).")
+
+    for stage in pending:
+        results[stage.name] = "blocked"
+    if error is not None:
+        raise error
+    return results
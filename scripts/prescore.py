@@ -0,0 +1,153 @@
+import re
+import numpy as np
+
+from scripts import audio_cache
+
+# Pré-ranking local de janelas do transcript, antes da IA.
+#
+# Janelas com a duração dos cortes (min_duration..max_duration) recebem uma nota
+# barata a partir de sinais locais: ritmo de fala, perguntas/exclamações, risos e
+# aplausos, palavras dos temas e picos de energia do áudio (se o audio.f32 existir).
+# Só as top-K janelas (com contexto) seguem para a IA; process_segments continua
+# recebendo o transcript completo, então o contrato não muda.
+
+REACTION_PATTERN = re.compile(
+    r"\[(laughter|laughs|applause|risos|aplausos|music)\]|\((laughter|laughs|applause|risos|aplausos)\)|\b(ha){2,}\b|\b(ka){3,}\b|\b(rs){2,}\b",
+    re.IGNORECASE,
+)
+
+WEIGHTS = {
+    "speech_rate": 1.0,
+    "questions": 0.8,
+    "exclamations": 0.6,
+    "reactions": 1.2,
+    "themes": 1.5,
+    "energy": 1.0,
+}
+
+def _zscore(values):
+    values = np.asarray(values, dtype=np.float64)
+    std = values.std()
+    if std < 1e-9:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+def candidate_windows(segments, min_duration, max_duration):
+    """
+    Uma janela por segmento inicial: segmentos consecutivos até passar da duração alvo
+    (meio do intervalo min..max). Retorna lista de (first, last) com last exclusivo.
+    """
+    target = (min_duration + max_duration) / 2.0
+    windows = []
+    last = 0
+    n = len(segments)
+    for first in range(n):
+        last = max(last, first + 1)
+        while last < n and segments[last - 1]["end"] - segments[first]["start"] < target:
+            last += 1
+        windows.append((first, last))
+    return windows
+
+def _energy_profile(project_folder, hop_seconds=0.5):
+    """RMS por bloco de hop_seconds a partir do cache de áudio, ou None."""
+    if not project_folder:
+        return None
+    audio = audio_cache.open_audio(project_folder)
+    if audio is None or len(audio) == 0:
+        return None
+    hop = int(hop_seconds * audio_cache.SAMPLE_RATE)
+    n = len(audio) // hop
+    rms = np.empty(n, dtype=np.float32)
+    block = 2000
+    for i in range(0, n, block):
+        j = min(n, i + block)
+        chunk = np.asarray(audio[i * hop:j * hop], dtype=np.float32).reshape(j - i, hop)
+        rms[i:j] = np.sqrt(np.mean(chunk ** 2, axis=1))
+    return rms, hop_seconds
+
+def score_windows(segments, windows, themes=None, project_folder=None):
+    """Nota combinada (z-scores ponderados) de cada janela."""
+    theme_words = []
+    if themes:
+        theme_words = [w.strip().lower() for w in re.split(r"[,;]", str(themes)) if w.strip()]
+
+    # Somas acumuladas por segmento: cada janela sai em O(1)
+    n = len(segments)
+    words = np.zeros(n + 1)
+    questions = np.zeros(n + 1)
+    exclamations = np.zeros(n + 1)
+    reactions = np.zeros(n + 1)
+    theme_hits = np.zeros(n + 1)
+    for i, seg in enumerate(segments):
+        text = seg.get("text", "")
+        lower = text.lower()
+        words[i + 1] = words[i] + len(text.split())
+        questions[i + 1] = questions[i] + text.count("?")
+        exclamations[i + 1] = exclamations[i] + text.count("!")
+        reactions[i + 1] = reactions[i] + len(REACTION_PATTERN.findall(text))
+        theme_hits[i + 1] = theme_hits[i] + sum(lower.count(w) for w in theme_words)
+
+    energy = _energy_profile(project_folder)
+
+    features = {name: [] for name in WEIGHTS}
+    for first, last in windows:
+        start, end = segments[first]["start"], segments[last - 1]["end"]
+        duration = max(1.0, end - start)
+        features["speech_rate"].append((words[last] - words[first]) / duration)
+        features["questions"].append(questions[last] - questions[first])
+        features["exclamations"].append(exclamations[last] - exclamations[first])
+        features["reactions"].append(reactions[last] - reactions[first])
+        features["themes"].append(theme_hits[last] - theme_hits[first])
+        if energy is not None:
+            rms, hop = energy
+            block = rms[int(start / hop):max(int(start / hop) + 1, int(end / hop))]
+            # Picos relativos: quanto a janela tem de trechos bem acima da própria média
+            features["energy"].append(float(np.percentile(block, 95) / (block.mean() + 1e-6)) if len(block) else 0.0)
+        else:
+            features["energy"].append(0.0)
+
+    score = np.zeros(len(windows))
+    for name, weight in WEIGHTS.items():
+        score += weight * _zscore(features[name])
+    return score
+
+def select_windows(segments, min_duration, max_duration, top_k, themes=None, project_folder=None, context_seconds=20.0):
+    """
+    Top-K janelas sem sobreposição, expandidas com context_seconds de cada lado e unidas.
+    Retorna lista ordenada de (first, last) de segmentos a enviar para a IA.
+    """
+    if not segments:
+        return []
+    windows = candidate_windows(segments, min_duration, max_duration)
+    scores = score_windows(segments, windows, themes=themes, project_folder=project_folder)
+
+    chosen = []
+    taken = np.zeros(len(segments), dtype=bool)
+    for idx in np.argsort(-scores):
+        first, last = windows[idx]
+        if taken[first:last].any():
+            continue
+        taken[first:last] = True
+        chosen.append((first, last))
+        if len(chosen) >= top_k:
+            break
+
+    # Contexto antes/depois para a IA achar um bom início e fim
+    starts = [seg["start"] for seg in segments]
+    expanded = []
+    for first, last in chosen:
+        t0 = segments[first]["start"] - context_seconds
+        t1 = segments[last - 1]["end"] + context_seconds
+        while first > 0 and starts[first - 1] >= t0:
+            first -= 1
+        while last < len(segments) and starts[last] <= t1:
+            last += 1
+        expanded.append((first, last))
+
+    merged = []
+    for first, last in sorted(expanded):
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
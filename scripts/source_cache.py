@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+
+from scripts import transcript_store, audio_cache
+
+# Cache global de fontes, compartilhado entre projetos.
+#
+# cache/sources/<chave>/
+#   entry.json     -> url, título, modelo da transcrição, content_hash, last_used
+#   input.mp4, input.m4a, input.srt   (o que existir)
+#   (input.srt pode ser a legenda baixada ou um --export-transcript da transcrição;
+#    por isso só volta para projetos que usam o mesmo modelo da transcrição do cache)
+#   transcript/    -> transcript store
+#   audio.f32 + audio.json -> cache de áudio decodificado
+#
+# Chave: "<extractor>-<id do vídeo>" para URLs (youtube-dQw4w9WgXcQ) ou "sha256-<hash>"
+# do conteúdo para vídeos locais/uploads. Os arquivos entram e saem do cache por
+# hardlink (cópia se o disco não suportar), então o mesmo vídeo em N projetos
+# ocupa espaço uma vez e não é baixado nem transcrito de novo.
+#
+# As escritas do pipeline nos arquivos que entram no cache (store, audio.f32/audio.json,
+# exports do transcript, downloads) gravam num temporário e fazem rename, então um
+# projeto nunca altera o arquivo compartilhado no cache.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "sources")
+ENTRY_FILE = "entry.json"
+DEFAULT_MAX_GB = 50
+
+MEDIA_FILES = ["input.mp4", "input.m4a", "input.webm"]
+SUBTITLE_FILES = ["input.srt", "input.vtt"]
+AUDIO_FILES = [audio_cache.AUDIO_FILE, audio_cache.META_FILE]
+# Bytes lidos do começo e do fim do arquivo para o hash de conteúdo
+HASH_SAMPLE = 4 * 1024 * 1024
+
+def url_key(info):
+    """Chave a partir do info do yt-dlp (extractor + id)."""
+    if not info or not info.get("id"):
+        return None
+    extractor = (info.get("extractor_key") or info.get("extractor") or "web").lower()
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{extractor}-{info['id']}")
+
+def content_hash(path):
+    """Hash de tamanho + primeiros/últimos 4 MB: rápido mesmo para vídeos de horas."""
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        h.update(f.read(HASH_SAMPLE))
+        if size > HASH_SAMPLE:
+            f.seek(max(HASH_SAMPLE, size - HASH_SAMPLE))
+            h.update(f.read(HASH_SAMPLE))
+    return h.hexdigest()[:32]
+
+def file_key(path):
+    return f"sha256-{content_hash(path)}"
+
+def _entry_dir(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, key)
+
+def _read_entry(key, cache_dir=None):
+    path = os.path.join(_entry_dir(key, cache_dir), ENTRY_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _write_entry(key, entry, cache_dir=None):
+    path = os.path.join(_entry_dir(key, cache_dir), ENTRY_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+def find_by_content(digest, cache_dir=None):
+    """Entrada (chave) cujo vídeo tem esse hash de conteúdo, ex: upload de um vídeo já baixado por URL."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return None
+    if os.path.isdir(_entry_dir(f"sha256-{digest}", cache_dir)):
+        return f"sha256-{digest}"
+    for key in os.listdir(cache_dir):
+        entry = _read_entry(key, cache_dir)
+        if entry and entry.get("content_hash") == digest:
+            return key
+    return None
+
+def _link(src, dst):
+    """Hardlink src -> dst (substitui dst). Cópia se hardlink não for possível."""
+    tmp = dst + ".link.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+def _link_tree(src_dir, dst_dir):
+    tmp_dir = dst_dir + ".link.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    for name in os.listdir(src_dir):
+        _link(os.path.join(src_dir, name), os.path.join(tmp_dir, name))
+    if os.path.exists(dst_dir):
+        shutil.rmtree(dst_dir)
+    os.replace(tmp_dir, dst_dir)
+
+def restore(key, project_folder, model=None, cache_dir=None):
+    """
+    Traz para o projeto o que o cache tem dessa fonte (mídia, legenda, áudio e,
+    se foi feito com o mesmo modelo Whisper, a transcrição). Arquivos que o projeto
+    já tem não são tocados. Retorna a lista do que foi restaurado.
+    """
+    if not key:
+        return []
+    entry = _read_entry(key, cache_dir)
+    if entry is None:
+        return []
+    src = _entry_dir(key, cache_dir)
+    os.makedirs(project_folder, exist_ok=True)
+    restored = []
+
+    # Legenda de outro modelo pode ser o export da transcrição dele: seria lida como
+    # legenda do YouTube e pularia o ASR do modelo pedido
+    same_model = not model or entry.get("transcript_model") in (None, model)
+    names = MEDIA_FILES + AUDIO_FILES + (SUBTITLE_FILES if same_model else [])
+    for name in names:
+        if os.path.exists(os.path.join(src, name)) and not os.path.exists(os.path.join(project_folder, name)):
+            _link(os.path.join(src, name), os.path.join(project_folder, name))
+            restored.append(name)
+
+    cached_store = os.path.join(src, transcript_store.STORE_DIRNAME)
+    if same_model and os.path.exists(os.path.join(cached_store, "meta.json")) and not transcript_store.has_store(project_folder):
+        _link_tree(cached_store, transcript_store.store_path(project_folder))
+        restored.append(transcript_store.STORE_DIRNAME)
+
+    if restored:
+        entry["last_used"] = time.time()
+        _write_entry(key, entry, cache_dir)
+        print(f"[SOURCE CACHE] {key}: restaurado {', '.join(restored)}")
+    return restored
+
+def store(key, project_folder, model=None, url=None, title=None, cache_dir=None, max_gb=DEFAULT_MAX_GB):
+    """
+    Guarda (por hardlink) mídia, legenda, áudio decodificado e transcrição do projeto
+    na entrada `key` e aplica o limite de disco (LRU).
+    """
+    if not key:
+        return
+    dst = _entry_dir(key, cache_dir)
+    os.makedirs(dst, exist_ok=True)
+    entry = _read_entry(key, cache_dir) or {"key": key, "created": time.time()}
+
+    # Transcrição de outro modelo substitui a do cache: a legenda guardada pode ser
+    # o export da anterior, então só fica se o projeto tiver a sua
+    new_model = model and entry.get("transcript_model") not in (None, model)
+    if new_model and transcript_store.has_store(project_folder):
+        for name in SUBTITLE_FILES:
+            cached = os.path.join(dst, name)
+            if os.path.exists(cached) and not os.path.exists(os.path.join(project_folder, name)):
+                os.remove(cached)
+
+    for name in MEDIA_FILES + SUBTITLE_FILES + AUDIO_FILES:
+        path = os.path.join(project_folder, name)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            cached = os.path.join(dst, name)
+            if not (os.path.exists(cached) and os.path.samefile(path, cached)):
+                _link(path, cached)
+
+    if transcript_store.has_store(project_folder):
+        _link_tree(transcript_store.store_path(project_folder), os.path.join(dst, transcript_store.STORE_DIRNAME))
+        if model:
+            entry["transcript_model"] = model
+
+    video = os.path.join(project_folder, "input.mp4")
+    if os.path.exists(video) and "content_hash" not in entry:
+        entry["content_hash"] = content_hash(video)
+    if url:
+        entry["url"] = url
+    if title:
+        entry["title"] = title
+    entry["last_used"] = time.time()
+    _write_entry(key, entry, cache_dir)
+    evict(max_gb * 1024 ** 3, cache_dir, keep=key)
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def evict(max_bytes, cache_dir=None, keep=None):
+    """
+    Remove as entradas usadas há mais tempo até o cache caber em max_bytes.
+    Projetos que já têm hardlinks continuam com os arquivos; só o cache os esquece.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    total = 0
+    for key in os.listdir(cache_dir):
+        path = _entry_dir(key, cache_dir)
+        if not os.path.isdir(path):
+            continue
+        entry = _read_entry(key, cache_dir) or {}
+        size = _dir_size(path)
+        entries.append((entry.get("last_used", 0), size, key, path))
+        total += size
+
+    removed = 0
+    for _, size, key, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+        print(f"[SOURCE CACHE] Removido {key} ({size / 1024 ** 2:.0f} MB) para caber no limite.")
+    return removed
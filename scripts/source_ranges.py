@@ -0,0 +1,76 @@
+import os
+import json
+
+# Trechos do vídeo original baixados separadamente (modo --range-download).
+#
+# VIRALS/<projeto>/ranges/range_<inicio>-<fim>.mp4
+# VIRALS/<projeto>/ranges/ranges.json -> [{"start": s, "end": e, "file": "range_....mp4"}, ...]
+#
+# Os tempos são os da linha do tempo do vídeo completo; quem corta ou alinha
+# procura o trecho que cobre a janela e desconta o "start" dele.
+
+RANGES_DIR = "ranges"
+MANIFEST = "ranges.json"
+
+def plan_ranges(windows, padding=5.0, gap=10.0):
+    """Janelas (start, end) com padding, unidas quando ficam a menos de `gap` segundos."""
+    merged = []
+    for start, end in sorted((max(0.0, s - padding), e + padding) for s, e in windows):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(float(s), float(e)) for s, e in merged]
+
+def range_filename(start, end, ext="mp4"):
+    # Mesmo nome que o outtmpl "range_%(section_start)d-%(section_end)d" do yt-dlp
+    return f"range_{int(start)}-{int(end)}.{ext}"
+
+def load_manifest(project_folder):
+    path = os.path.join(project_folder, RANGES_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+def save_manifest(project_folder, entries):
+    ranges_dir = os.path.join(project_folder, RANGES_DIR)
+    os.makedirs(ranges_dir, exist_ok=True)
+    path = os.path.join(ranges_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(sorted(entries, key=lambda r: r["start"]), f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def has_ranges(project_folder):
+    return bool(load_manifest(project_folder))
+
+def find_range(project_folder, start, end, entries=None):
+    """(caminho, offset) do trecho baixado que cobre [start, end], ou None."""
+    entries = load_manifest(project_folder) if entries is None else entries
+    for entry in entries:
+        if entry["start"] <= start + 0.01 and end <= entry["end"] + 0.01:
+            path = os.path.join(project_folder, RANGES_DIR, entry["file"])
+            if os.path.exists(path):
+                return path, entry["start"]
+    return None
+
+def overlapping_range(project_folder, start, end, entries=None):
+    """
+    (caminho, início, fim) do trecho baixado que mais se sobrepõe a [start, end], ou None.
+    Para segmentos do transcript: o padding das janelas faz o primeiro segmento começar
+    antes do trecho, então "cobrir por inteiro" (find_range) seria exigente demais.
+    """
+    entries = load_manifest(project_folder) if entries is None else entries
+    best, best_overlap = None, 0.0
+    for entry in entries:
+        overlap = min(end, entry["end"]) - max(start, entry["start"])
+        # Segmento de duração zero conta se estiver dentro do trecho
+        if overlap < 0 or (overlap == 0 and end > start):
+            continue
+        path = os.path.join(project_folder, RANGES_DIR, entry["file"])
+        if (best is None or overlap > best_overlap) and os.path.exists(path):
+            best, best_overlap = (path, entry["start"], entry["end"]), overlap
+    return best
@@ -1,25 +1,144 @@
 import os
+import gc
 import subprocess
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def transcribe(project_folder="tmp"):
-    def generate_whisperx(input_file, output_folder, model='large-v3'):
-        output_file = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(input_file))[0]}.srt")
-        json_file = os.path.join(output_folder, f"{os.path.splitext(os.path.basename(input_file))[0]}.json")  # Define the JSON output file
+from scripts import cut_files
 
-        # Skip processing if the JSON file already exists
-        if os.path.exists(json_file):
-            print(f"Arquivo já existe, pulando: {json_file}")
-            return
+SAMPLE_RATE = 16000
+# Silêncio entre cortes no áudio concatenado: o VAD do WhisperX quebra os chunks aí
+BATCH_GAP = 1.5
+# Limite de áudio concatenado por passada do ASR (segundos)
+BATCH_MAX_SECONDS = 1800
+# Mesmo modelo de alinhamento do caminho pelo CLI (--align_model)
+ALIGN_MODEL = "WAV2VEC2_ASR_LARGE_LV60K_960H"
+
+def _cut_outputs(input_file, output_folder):
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_folder, f"{base}.srt"), os.path.join(output_folder, f"{base}.json")
+
+def _batches(items, max_seconds):
+    """Agrupa (arquivo, áudio) em lotes de até max_seconds de áudio."""
+    batch, total = [], 0.0
+    for item in items:
+        seconds = len(item[1]) / SAMPLE_RATE
+        if batch and total + seconds > max_seconds:
+            yield batch
+            batch, total = [], 0.0
+        batch.append(item)
+        total += seconds + BATCH_GAP
+    if batch:
+        yield batch
+
+def _nearest_cut(offsets, mid):
+    """Índice do corte (start, end) mais próximo de `mid` (0 de distância se estiver dentro)."""
+    return min(range(len(offsets)), key=lambda i: max(offsets[i][0] - mid, mid - offsets[i][1], 0.0))
+
+def split_batch_segments(segments, offsets):
+    """
+    Devolve cada segmento do áudio concatenado ao corte mais próximo do seu ponto médio
+    (um segmento que caiu no silêncio entre dois cortes não é descartado), com os tempos
+    recortados ao corte e relativos ao início dele. Retorna uma lista de segmentos por corte.
+    """
+    per_cut = [[] for _ in offsets]
+    for seg in segments:
+        i = _nearest_cut(offsets, (seg["start"] + seg["end"]) / 2)
+        start, end = offsets[i]
+        seg_start = min(max(seg["start"], start), end) - start
+        seg_end = min(max(seg["end"], start), end) - start
+        per_cut[i].append({
+            "start": seg_start,
+            "end": max(seg_start, seg_end),
+            "text": seg["text"],
+        })
+    return per_cut
+
+def transcribe_batched(files, output_folder, model='large-v3'):
+    """
+    Transcreve vários cortes no mesmo processo: modelos carregados uma vez,
+    áudio dos cortes concatenado (com silêncio entre eles) em uma passada do ASR,
+    depois alinhamento por corte e um JSON/SRT por corte.
+    """
+    import numpy as np
+    import whisperx
+    from scripts import transcribe_video
+
+    transcribe_video.apply_safe_globals_hack()
+    device = "cuda" if transcribe_video.torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if device == "cuda" else "float32"
+    batch_size = 10
+    model_kwargs = {}
+    if device == "cpu":
+        profile = transcribe_video.get_cpu_profile(files[0], model)
+        compute_type, batch_size = profile["compute_type"], profile["batch_size"]
+        model_kwargs["threads"] = profile["threads"]
+
+    print(f"Carregando modelo {model} (uma vez para {len(files)} cortes)...")
+    asr = whisperx.load_model(model, device, compute_type=compute_type,
+                              asr_options={"hotwords": None},
+                              vad_options={"vad_onset": 0.4, "vad_offset": 0.3}, **model_kwargs)
+    align_models = {}
+
+    items = []
+    for input_file in files:
+        try:
+            items.append((input_file, whisperx.load_audio(input_file)))
+        except Exception as e:
+            print(f"Erro ao ler áudio de {input_file}: {e}")
+
+    gap = np.zeros(int(BATCH_GAP * SAMPLE_RATE), dtype=np.float32)
+    for batch in _batches(items, BATCH_MAX_SECONDS):
+        # Offsets de cada corte no áudio concatenado
+        offsets, pieces, cursor = [], [], 0.0
+        for input_file, audio in batch:
+            duration = len(audio) / SAMPLE_RATE
+            offsets.append((cursor, cursor + duration))
+            pieces.extend([audio, gap])
+            cursor += duration + BATCH_GAP
+        joined = np.concatenate(pieces[:-1])
+
+        print(f"Transcrevendo {len(batch)} cortes ({cursor:.0f}s de áudio) em uma passada...")
+        result = asr.transcribe(joined, batch_size=batch_size, chunk_size=10)
+        language = result["language"]
+
+        per_cut = split_batch_segments(result["segments"], offsets)
+
+        if language not in align_models:
+            align_models[language] = whisperx.load_align_model(language_code=language, device=device, model_name=ALIGN_MODEL)
+        model_a, metadata = align_models[language]
+
+        for (input_file, audio), segments in zip(batch, per_cut):
+            srt_file, json_file = _cut_outputs(input_file, output_folder)
+            data = {"segments": segments, "language": language}
+            if segments:
+                try:
+                    data = whisperx.align(segments, model_a, metadata, audio, device, return_char_alignments=False)
+                    data["language"] = language
+                    data.pop("word_segments", None)
+                except Exception as e:
+                    print(f"Erro no alinhamento de {input_file}: {e}. Salvando sem palavras.")
+            cut_files.write_cut(json_file, data)
+            cut_files.write_srt_segments(data["segments"], srt_file)
+            print(f"Transcrição concluída. Arquivo salvo em: {srt_file} e {json_file}")
+
+    del asr
+    align_models.clear()
+    gc.collect()
+    if device == "cuda":
+        transcribe_video.torch.cuda.empty_cache()
+
+def transcribe(project_folder="tmp", model='large-v3', batched=True):
+    def generate_whisperx(input_file, output_folder, model='large-v3'):
+        output_file, json_file = _cut_outputs(input_file, output_folder)
 
         command = [
             "whisperx",
             input_file,
             "--model", model,
             "--task", "transcribe",
-            "--align_model", "WAV2VEC2_ASR_LARGE_LV60K_960H",
+            "--align_model", ALIGN_MODEL,
             "--chunk_size", "10",
             "--vad_onset", "0.4",
             "--vad_offset", "0.3",
@@ -31,15 +150,15 @@ def transcribe(project_folder="tmp"):
         ]
 
         print(f"Transcrevendo: {input_file}...")
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
+        result = subprocess.run(command, text=True, capture_output=True)
         print(f"Comando executado: {command}")
-        
+
         if result.returncode != 0:
             print("Erro durante a transcrição:")
             print(result.stderr)
         else:
             print(f"Transcrição concluída. Arquivo salvo em: {output_file} e {json_file}")
-            # print(result.stdout) 
+            # print(result.stdout)
 
     # Define o diretório de entrada e o diretório de saída
     input_folder = os.path.join(project_folder, 'final')
@@ -50,9 +169,26 @@ def transcribe(project_folder="tmp"):
         print(f"Pasta de entrada não encontrada: {input_folder}")
         return
 
-    # Itera sobre todos os arquivos na pasta de entrada
-    for filename in os.listdir(input_folder):
+    # Cortes .mp4 que ainda não têm JSON
+    pending = []
+    for filename in sorted(os.listdir(input_folder)):
         if filename.endswith('.mp4'):  # Filtra apenas arquivos .mp4
             input_file = os.path.join(input_folder, filename)
-            generate_whisperx(input_file, output_folder)
+            json_file = _cut_outputs(input_file, output_folder)[1]
+            if os.path.exists(json_file):
+                print(f"Arquivo já existe, pulando: {json_file}")
+                continue
+            pending.append(input_file)
+
+    if not pending:
+        return
+
+    if batched:
+        try:
+            transcribe_batched(pending, output_folder, model=model)
+            return
+        except ImportError as e:
+            print(f"WhisperX indisponível no processo ({e}). Usando o CLI por arquivo.")
 
+    for input_file in pending:
+        generate_whisperx(input_file, output_folder, model=model)
@@ -1,12 +1,20 @@
 import os
 import sys
-import torch
 import time
-import whisperx
 import gc
 import re
 import glob
+import json
+import subprocess
+import numpy as np
+from bisect import bisect_right
 from i18n.i18n import I18nAuto
+from scripts import transcript_store, model_server, audio_cache, source_ranges
+from scripts.lazy_import import lazy_module
+
+# torch / whisperx só são importados quando uma transcrição realmente roda
+torch = lazy_module("torch")
+whisperx = lazy_module("whisperx")
 
 i18n = I18nAuto()
 
@@ -173,13 +181,59 @@ def parse_vtt(vtt_path):
         return None
     return segments
 
-def transcribe(input_file, model_name='large-v3', project_folder='tmp'):
+def load_provided_subtitles(folder):
+    """
+    Procura legendas baixadas (input.srt ou input.vtt) para o modo Alignment Only.
+    Retorna a lista de segmentos ou None.
+    """
+    if os.path.exists(os.path.join(folder, "input.srt")):
+        sub_path = os.path.join(folder, "input.srt")
+    elif os.path.exists(os.path.join(folder, "input.vtt")):
+        sub_path = os.path.join(folder, "input.vtt")
+    else:
+        return None
+
+    print(f"Usando legenda fornecida: {sub_path}")
+    if sub_path.endswith('.srt'):
+        parsed = parse_srt(sub_path)
+    else:
+        parsed = parse_vtt(sub_path)
+
+    return parsed if parsed else None
+
+def store_provided_subtitles(project_folder):
+    """
+    Grava o transcript store direto da legenda baixada, sem áudio e sem modelo
+    (modo --range-download). Palavras ficam para o alinhamento lazy das janelas.
+    Retorna False se não houver legenda.
+    """
+    if transcript_store.has_store(project_folder):
+        return True
+    parsed = load_provided_subtitles(project_folder)
+    if not parsed:
+        return False
+    # Mesmo idioma forçado do modo alinhamento rápido em transcribe()
+    transcript_store.write_store(
+        {"segments": parsed, "language": "en"},
+        project_folder,
+        extra_meta={"alignment": "none", "aligned_windows": []},
+    )
+    return True
+
+def transcribe(input_file, model_name='large-v3', project_folder='tmp', lazy_align=False, streaming=False, stream_window=600, recalibrate_cpu=False, skip_silence=False):
+    """
+    Transcreve input_file e grava o transcript store do projeto.
+    lazy_align=True: pula o alinhamento por palavra (só timing de segmento).
+    Depois use align_windows() apenas nas janelas escolhidas para os cortes.
+    streaming=True: processa o áudio em janelas de ~stream_window segundos
+    (memória constante, retomável). Veja transcribe_streaming().
+    Em CPU, compute_type / batch_size / threads vêm do perfil calibrado da máquina
+    (models/cpu_profile.json); recalibrate_cpu=True refaz a calibração.
+    skip_silence=True: VAD por energia remove silêncio/música longos antes do ASR
+    e os timestamps são remapeados para a linha do tempo original.
+    Retorna o caminho do transcript store (SRT/TSV/JSON saem via transcript_store.export()).
+    """
     print(i18n(f"Iniciando transcrição de {input_file}..."))
-    
-    # Diagnóstico de Ambiente
-    print(f"DEBUG: Python: {sys.executable}")
-    print(f"DEBUG: Torch: {torch.__version__}")
-    
     start_time = time.time()
     
     if project_folder is None:
@@ -194,59 +248,63 @@ def transcribe(input_file, model_name='large-v3', project_folder='tmp'):
     srt_file = os.path.join(output_folder, f"{base_name}.srt")
     tsv_file = os.path.join(output_folder, f"{base_name}.tsv")
     json_file = os.path.join(output_folder, f"{base_name}.json")
+    store_dir = transcript_store.store_path(output_folder)
 
-    # Verifica se os arquivos já existem
+    # Verifica se a transcrição já existe (store compacto ou arquivos legados)
+    if transcript_store.has_store(output_folder):
+        print(f"Transcript store já existe. Pulando a transcrição.")
+        return store_dir
     if os.path.exists(srt_file) and os.path.exists(tsv_file) and os.path.exists(json_file):
         print(f"Os arquivos SRT, TSV e JSON já existem. Pulando a transcrição.")
-        return srt_file, tsv_file
+        # Projeto antigo: converte o input.json para o store
+        transcript_store.load_result(output_folder, base_name)
+        return store_dir
+
+    # Diagnóstico de Ambiente (depois dos early returns: evita importar o torch à toa)
+    print(f"DEBUG: Python: {sys.executable}")
+    print(f"DEBUG: Torch: {torch.__version__}")
+
+    # Model server primeiro: com ele rodando, o Whisper local nem é carregado
+    # (nem para calibrar a CPU; o servidor usa o perfil salvo da máquina)
+    server = None if streaming else model_server.connect()
+    if server is not None and skip_silence:
+        # O servidor transcreve o arquivo inteiro; o VAD só existe no caminho local
+        print("--skip-silence ativo: transcrevendo localmente em vez de usar o model server.")
+        server = None
 
     # Device Setup
     device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"DEBUG: Usando dispositivo: {device}")
-    compute_type = "float16" if device == "cuda" else "float32"
+
+    if streaming:
+        transcribe_streaming(input_file, model_name, output_folder, device,
+                             window_seconds=stream_window, lazy_align=lazy_align,
+                             skip_silence=skip_silence, recalibrate_cpu=recalibrate_cpu)
+        return store_dir
 
     try:
         apply_safe_globals_hack()
         
-        # 1. Carregar Áudio (sempre necessário)
-        print(f"Carregando áudio: {input_file}")
-        audio = whisperx.load_audio(input_file)
+        # 1. Áudio: carregado só quando for transcrever ou alinhar
+        audio = None
         
         # 2. Verificar se existem legendas baixadas para Alignment Only
-        # Procurar por *.srt E *.vtt na pasta que comecem com input (ou o nome base)
-        if os.path.exists(os.path.join(output_folder, "input.srt")):
-            potential_subs = [os.path.join(output_folder, "input.srt")]
-        elif os.path.exists(os.path.join(output_folder, "input.vtt")):
-            potential_subs = [os.path.join(output_folder, "input.vtt")]
-        else:
-            potential_subs = []
-        
         start_segments = None
         alignment_only = False
         
         # Default blind guess if we have no info
         detected_language = "en" 
 
-        if potential_subs:
-            sub_path = potential_subs[0]
-            print(f"Usando legenda fornecida: {sub_path}")
+        parsed = load_provided_subtitles(output_folder)
+        if parsed:
+            start_segments = parsed
+            alignment_only = True
             
-            if sub_path.endswith('.srt'):
-                parsed = parse_srt(sub_path)
-            elif sub_path.endswith('.vtt'):
-                parsed = parse_vtt(sub_path)
-            else:
-                parsed = None
-
-            if parsed and len(parsed) > 0:
-                start_segments = parsed
-                alignment_only = True
-                
-                # Forçar EN conforme solicitado pelo usuário para alinhamento
-                detected_language = 'en'
-                print(f"Idioma forçado para alinhamento: {detected_language}")
-                
-                print("--- MODO ALINHAMENTO RÁPIDO ATIVADO ---")
+            # Forçar EN conforme solicitado pelo usuário para alinhamento
+            detected_language = 'en'
+            print(f"Idioma forçado para alinhamento: {detected_language}")
+            
+            print("--- MODO ALINHAMENTO RÁPIDO ATIVADO ---")
         
         result = None
         
@@ -259,19 +317,36 @@ def transcribe(input_file, model_name='large-v3', project_folder='tmp'):
         else:
             # 3. Transcrever (Caminho Normal)
             print("Nenhuma legenda válida encontrada. Realizando transcrição completa (WhisperX)...")
+            if server is not None:
+                asr_start = time.time()
+                result = server.transcribe(input_file, model_name, batch_size=None, chunk_size=10)
+                print_rtf(time.time() - asr_start, get_media_duration(input_file))
+                detected_language = result["language"]
+                start_segments = result["segments"]
+        if result is None and not alignment_only:
+            print(f"Carregando áudio: {input_file}")
+            audio = audio_cache.load_audio(input_file, output_folder)
+            # Perfil de CPU (e calibração na primeira vez) só quando o ASR local roda de fato
+            compute_type, batch_size, model_kwargs = asr_settings(input_file, model_name, device, recalibrate=recalibrate_cpu)
             print(f"Carregando modelo {model_name}...")
             model = whisperx.load_model(
                 model_name, 
                 device, 
                 compute_type=compute_type,
-                asr_options={"hotwords": None}
+                asr_options={"hotwords": None},
+                **model_kwargs
             )
 
-            result = model.transcribe(
-                audio, 
-                batch_size=16, 
-                chunk_size=10
-            )
+            asr_start = time.time()
+            if skip_silence:
+                result = transcribe_speech_only(model, audio, batch_size=batch_size, chunk_size=10)
+            else:
+                result = model.transcribe(
+                    audio, 
+                    batch_size=batch_size, 
+                    chunk_size=10
+                )
+            print_rtf(time.time() - asr_start, len(audio) / SAMPLE_RATE)
             
             detected_language = result["language"]
             start_segments = result["segments"]
@@ -282,59 +357,52 @@ def transcribe(input_file, model_name='large-v3', project_folder='tmp'):
                 gc.collect()
                 torch.cuda.empty_cache()
 
-        # 4. Alinhar (Sempre executado, seja com subs parsed ou transcritos)
-        print(f"Alinhando transcrição (Idioma: {detected_language}) para obter timestamps precisos...")
-        # Usa o modelo específico solicitado pelo usuário: WAV2VEC2_ASR_LARGE_LV60K_960H
-        # Mas o whisperx.load_align_model escolhe automaticamente baseado na linguagem.
-        # Se for inglês, ele usa wav2vec2-large-960h-lv60-self geralmente.
-        # Não podemos forçar facilmente o modelo exato sem hackear o whisperx, mas o padrão é bom.
+        # 4. Alinhar (seja com subs parsed ou transcritos), exceto no modo lazy
+        store_meta = None
+        if lazy_align:
+            print("Alinhamento lazy: salvando timing por segmento. Palavras serão alinhadas só nas janelas dos cortes.")
+            result = {"segments": start_segments, "language": detected_language}
+            store_meta = {"alignment": "none", "aligned_windows": []}
+        else:
+            print(f"Alinhando transcrição (Idioma: {detected_language}) para obter timestamps precisos...")
+            # Usa o modelo específico solicitado pelo usuário: WAV2VEC2_ASR_LARGE_LV60K_960H
+            # Mas o whisperx.load_align_model escolhe automaticamente baseado na linguagem.
+            # Se for inglês, ele usa wav2vec2-large-960h-lv60-self geralmente.
+            # Não podemos forçar facilmente o modelo exato sem hackear o whisperx, mas o padrão é bom.
         
-        try:
-            model_a, metadata = whisperx.load_align_model(language_code=detected_language, device=device)
-            
-            aligned_result = whisperx.align(start_segments, model_a, metadata, audio, device, return_char_alignments=False)
-            
-            # aligned_result agora contém "segments" com word timestamps
-            result = aligned_result
-            result["language"] = detected_language
-            
-            if device == "cuda":
-                 del model_a
-                 torch.cuda.empty_cache()
+            try:
+                if server is not None:
+                    result = server.align(start_segments, input_file, detected_language)
+                else:
+                    if audio is None:
+                        print(f"Carregando áudio: {input_file}")
+                        audio = audio_cache.load_audio(input_file, output_folder)
+                    model_a, metadata = whisperx.load_align_model(language_code=detected_language, device=device)
+                
+                    aligned_result = whisperx.align(start_segments, model_a, metadata, audio, device, return_char_alignments=False)
+                
+                    # aligned_result agora contém "segments" com word timestamps
+                    result = aligned_result
+                    result["language"] = detected_language
+                
+                    if device == "cuda":
+                         del model_a
+                         torch.cuda.empty_cache()
                  
-        except Exception as e:
-            print(f"Erro durante alinhamento: {e}. ")
-            if alignment_only:
-                 print("Falha crítica no alinhamento de legendas externas. Abortando usage de legendas externas.")
-                 # Opcional: Fallback para transcrição normal se falhar? Seria complexo aqui pois já limpamos memória.
-                 # Vamos apenas salvar o que temos (timestamps da legenda original podem não bater com áudio perfeitamente se não alinhar)
-                 result = {"segments": start_segments, "language": detected_language}
-            else:
-                 print("Continuando com transcrição bruta.")
+            except Exception as e:
+                print(f"Erro durante alinhamento: {e}. ")
+                if alignment_only:
+                     print("Falha crítica no alinhamento de legendas externas. Abortando usage de legendas externas.")
+                     # Opcional: Fallback para transcrição normal se falhar? Seria complexo aqui pois já limpamos memória.
+                     # Vamos apenas salvar o que temos (timestamps da legenda original podem não bater com áudio perfeitamente se não alinhar)
+                     result = {"segments": start_segments, "language": detected_language}
+                else:
+                     print("Continuando com transcrição bruta.")
 
         # 5. Salvar Resultados
+        # Apenas o store compacto é gravado; SRT/TSV/JSON saem sob demanda via transcript_store.export()
         print("Salvando resultados...")
-        from whisperx.utils import get_writer
-        
-        save_options = {
-            "highlight_words": False,
-            "max_line_count": None,
-            "max_line_width": None
-        }
-        
-        # Se veio do alignment_only, result é {'segments': [...], ...}
-        # Se o alinhamento falhou, result tem segments originais.
-        
-        # WhisperX writers esperam um dicionário result com chaves 'segments', 'language'.
-        
-        writer_srt = get_writer("srt", output_folder)
-        writer_srt(result, input_file, save_options)
-        
-        writer_tsv = get_writer("tsv", output_folder)
-        writer_tsv(result, input_file, save_options)
-        
-        writer_json = get_writer("json", output_folder)
-        writer_json(result, input_file, save_options)
+        transcript_store.write_store(result, output_folder, extra_meta=store_meta)
         
         end_time = time.time()
         elapsed = end_time - start_time
@@ -346,7 +414,616 @@ def transcribe(input_file, model_name='large-v3', project_folder='tmp'):
         traceback.print_exc()
         raise
 
-    if not os.path.exists(srt_file):
-        print(f"AVISO: Arquivo SRT {srt_file} não encontrado após execução.")
-    
-    return srt_file, tsv_file
+    return store_dir
+
+def merge_windows(windows, gap=0.0):
+    """Ordena e une janelas (start, end) que se sobrepõem ou distam menos que gap."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(w) for w in merged]
+
+def align_windows(input_file, project_folder, windows, padding=3.0):
+    """
+    Alinhamento lazy: roda o alinhamento forçado (wav2vec2) apenas nos segmentos
+    do transcript que cruzam as janelas (start, end) dos cortes, com padding.
+    Os segmentos alinhados substituem os originais no transcript store.
+    Janelas já alinhadas anteriormente são puladas.
+    Sem input_file (modo --range-download), cada segmento é alinhado com o trecho
+    baixado em ranges/ que mais se sobrepõe a ele, recortado aos limites do trecho.
+    Sem store ou sem áudio levanta FileNotFoundError.
+    """
+    store = transcript_store.open_store(project_folder)
+    if store is None:
+        # Levanta em vez de retornar: o pipeline marcaria a etapa como feita sem alinhar nada
+        raise FileNotFoundError("Transcript store não encontrado. Não é possível alinhar janelas.")
+    if store.alignment == "full":
+        return
+
+    padded = merge_windows([(max(0.0, s - padding), e + padding) for s, e in windows])
+    done = [tuple(w) for w in store.aligned_windows]
+    todo = [w for w in padded if not any(d[0] <= w[0] and w[1] <= d[1] for d in done)]
+    if not todo:
+        print("Janelas dos cortes já estão alinhadas.")
+        return
+
+    total_audio = float(store.ends.max()) if len(store) else 0.0
+    total_window = sum(e - s for s, e in todo)
+    print(f"Alinhamento lazy: {len(todo)} janelas ({total_window:.0f}s de {total_audio:.0f}s de áudio)...")
+
+    # Segmentos a alinhar (índices no store), sem repetir os que já têm palavras
+    to_align = set()
+    for start, end in todo:
+        first, last = store.find_range(start, end)
+        for idx in range(first, last):
+            if int(store.segments[idx]["n_words"]) == 0:
+                to_align.add(idx)
+
+    language = store.language or "en"
+    segments = list(store.iter_segments())
+    start_time = time.time()
+
+    range_entries = None
+    audio = None
+    if input_file and os.path.exists(input_file):
+        print(f"Carregando áudio: {input_file}")
+        audio = audio_cache.load_audio(input_file, project_folder)
+    else:
+        range_entries = source_ranges.load_manifest(project_folder)
+        if not range_entries:
+            store.close()
+            raise FileNotFoundError("Áudio do projeto não encontrado. Não é possível alinhar janelas.")
+        print(f"Alinhando a partir de {len(range_entries)} trechos baixados.")
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    apply_safe_globals_hack()
+    model_a, metadata = whisperx.load_align_model(language_code=language, device=device)
+
+    new_segments = []
+    run = []
+    range_audio = {}
+
+    def align_group(group, source, offset=0.0, bounds=None):
+        # Com trechos, o segmento é recortado aos limites do trecho (o áudio fora dele não existe)
+        lo, hi = bounds if bounds else (float("-inf"), float("inf"))
+        plain = [{"start": max(seg["start"], lo) - offset, "end": min(seg["end"], hi) - offset, "text": seg["text"]}
+                 for seg in group]
+        try:
+            aligned = whisperx.align(plain, model_a, metadata, source, device, return_char_alignments=False)
+            new_segments.extend(_shift_segments(aligned["segments"], offset) if offset else aligned["segments"])
+        except Exception as e:
+            print(f"Erro durante alinhamento da janela {group[0]['start']:.1f}-{group[-1]['end']:.1f}s: {e}")
+            new_segments.extend(group)
+
+    def align_range_group(group, found):
+        if found is None:
+            print(f"Nenhum trecho baixado cobre {group[0]['start']:.1f}-{group[-1]['end']:.1f}s. Mantendo sem alinhamento.")
+            new_segments.extend(group)
+            return
+        path, range_start, range_end = found
+        if path not in range_audio:
+            range_audio.clear()  # um trecho decodificado por vez
+            range_audio[path] = whisperx.load_audio(path)
+        align_group(group, range_audio[path], range_start, (range_start, range_end))
+
+    def flush_run():
+        if not run:
+            return
+        if range_entries is None:
+            align_group(run, audio)
+            run.clear()
+            return
+        # Uma janela pode atravessar dois trechos: cada segmento vai para o que mais o cobre
+        group, group_range = [], None
+        for seg in run:
+            found = source_ranges.overlapping_range(project_folder, seg["start"], seg["end"], range_entries)
+            if group and found != group_range:
+                align_range_group(group, group_range)
+                group = []
+            group_range = found
+            group.append(seg)
+        align_range_group(group, group_range)
+        run.clear()
+
+    # Agrupa segmentos consecutivos para alinhar cada janela de uma vez
+    for idx, seg in enumerate(segments):
+        if idx in to_align:
+            run.append(seg)
+        else:
+            flush_run()
+            new_segments.append(seg)
+    flush_run()
+
+    if device == "cuda":
+        del model_a
+        torch.cuda.empty_cache()
+
+    # Solta os mmaps antes de trocar o store (no Windows, arquivo mapeado não pode ser movido)
+    store.close()
+    transcript_store.write_store(
+        {"segments": new_segments, "language": language},
+        project_folder,
+        extra_meta={"alignment": "partial", "aligned_windows": [list(w) for w in merge_windows(done + todo)]},
+    )
+
+    elapsed = time.time() - start_time
+    print(f"Alinhamento lazy concluído em {int(elapsed//60)}m {int(elapsed%60)}s.")
+
+# --- Transcrição em streaming (memória constante) ------------------------------
+
+SAMPLE_RATE = 16000
+STREAM_JOURNAL = "transcript_stream.jsonl"
+
+def get_media_duration(input_file):
+    """Duração em segundos via ffprobe (0.0 se não for possível ler)."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", input_file],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return float(out)
+    except Exception as e:
+        print(f"Erro ao ler duração com ffprobe: {e}")
+        return 0.0
+
+def load_audio_window(input_file, start, duration, sr=SAMPLE_RATE):
+    """
+    Decodifica apenas [start, start+duration] do arquivo para float32 mono 16 kHz,
+    no mesmo formato de whisperx.load_audio().
+    """
+    project_folder = os.path.dirname(input_file) or "."
+    cached = audio_cache.open_audio(project_folder, input_file)
+    if cached is None and os.path.exists(os.path.join(project_folder, audio_cache.AUDIO_FILE)):
+        # Cache de outra fonte (áudio primeiro, cache de fontes, arquivo trocado): decodifica de novo
+        cached = audio_cache.load_audio(input_file, project_folder)
+    if cached is not None:
+        # Cópia só da janela (o memmap é somente leitura)
+        return np.array(audio_cache.audio_slice(cached, start, start + duration))
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-hide_banner",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+        "-i", input_file,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-",
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+def find_quiet_point(input_file, target, search=10.0, frame=0.1):
+    """
+    VAD simples por energia: procura o trecho mais silencioso em target ± search
+    para não cortar a janela no meio de uma palavra.
+    """
+    start = max(0.0, target - search)
+    try:
+        audio = load_audio_window(input_file, start, 2 * search)
+    except Exception:
+        return target
+    hop = int(frame * SAMPLE_RATE)
+    if len(audio) < hop * 2:
+        return target
+    n_frames = len(audio) // hop
+    energy = np.sqrt(np.mean(audio[:n_frames * hop].reshape(n_frames, hop) ** 2, axis=1))
+    quietest = int(np.argmin(energy))
+    return start + (quietest + 0.5) * frame
+
+def _shift_segments(segments, offset):
+    """Desloca timestamps (segmentos e palavras) da janela para o tempo do arquivo."""
+    shifted = []
+    for seg in segments:
+        seg = dict(seg)
+        for key in ("start", "end"):
+            if seg.get(key) is not None:
+                seg[key] = round(seg[key] + offset, 3)
+        if "words" in seg:
+            words = []
+            for word in seg["words"]:
+                word = dict(word)
+                for key in ("start", "end"):
+                    if word.get(key) is not None:
+                        word[key] = round(word[key] + offset, 3)
+                words.append(word)
+            seg["words"] = words
+        seg.pop("chars", None)
+        shifted.append(seg)
+    return shifted
+
+def stream_journal_header(input_file, model_name, window_seconds, lazy_align, skip_silence, provided):
+    """Configuração que gerou o journal; uma retomada só reaproveita janelas feitas com a mesma."""
+    return {
+        "input": os.path.basename(input_file),
+        "input_size": os.path.getsize(input_file),
+        "model": model_name,
+        "window_seconds": window_seconds,
+        "lazy_align": bool(lazy_align),
+        "skip_silence": bool(skip_silence),
+        "provided_subtitles": bool(provided),
+    }
+
+def read_stream_journal(journal_path, header=None):
+    """
+    Lê as janelas já concluídas do journal (ignora uma última linha truncada por crash).
+    Com header, um journal gravado com outra configuração é descartado (lista vazia).
+    """
+    entries = []
+    if not os.path.exists(journal_path):
+        return entries
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print("Journal com linha incompleta (provável crash). Retomando da última janela completa.")
+                break
+            if "header" in entry:
+                if header is not None and entry["header"] != header:
+                    print("Journal de streaming feito com outra configuração (modelo/janela/VAD). Recomeçando do zero.")
+                    return []
+                header = None
+                continue
+            if header is not None:
+                # Journal antigo, sem cabeçalho: não dá para saber com que modelo foi feito
+                print("Journal de streaming sem cabeçalho de configuração. Recomeçando do zero.")
+                return []
+            entries.append(entry)
+    return entries
+
+def transcribe_streaming(input_file, model_name, output_folder, device, window_seconds=600, lazy_align=False, skip_silence=False, recalibrate_cpu=False):
+    """
+    Transcreve (e alinha) o arquivo em janelas limitadas por silêncio.
+    Só uma janela de áudio fica na memória por vez; cada janela concluída é
+    anexada ao journal transcript_stream.jsonl, permitindo retomar após crash.
+    No final o journal vira o transcript store.
+    """
+    start_clock = time.time()
+    apply_safe_globals_hack()
+
+    total = get_media_duration(input_file)
+    if total <= 0:
+        raise RuntimeError(f"Não foi possível determinar a duração de {input_file}")
+
+    # Decodifica uma vez para audio.f32 (em disco); as janelas são lidas via mmap
+    try:
+        audio_cache.ensure_audio(input_file, output_folder)
+    except Exception as e:
+        print(f"Cache de áudio indisponível ({e}). Decodificando cada janela com ffmpeg.")
+
+    provided = load_provided_subtitles(output_folder)
+
+    journal_path = os.path.join(output_folder, STREAM_JOURNAL)
+    header = stream_journal_header(input_file, model_name, window_seconds, lazy_align, skip_silence, provided)
+    done = read_stream_journal(journal_path, header)
+    position = done[-1]["end"] if done else 0.0
+    language = done[0].get("language") if done else None
+    if done:
+        print(f"Retomando streaming em {position:.1f}s ({len(done)} janelas já concluídas).")
+
+    if provided:
+        print("--- MODO ALINHAMENTO RÁPIDO ATIVADO (streaming) ---")
+        language = language or "en"
+
+    model = None
+    align_models = {}
+    window_index = len(done)
+
+    # Reescreve o journal só com as janelas completas antes de anexar novas
+    with open(journal_path, "w", encoding="utf-8") as journal:
+        journal.write(json.dumps({"header": header}, ensure_ascii=False) + "\n")
+        for entry in done:
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    while position < total - 0.05:
+        end = total
+        if position + window_seconds < total:
+            end = find_quiet_point(input_file, position + window_seconds)
+            if end <= position + 1.0:
+                end = position + window_seconds
+
+        print(f"[stream] Janela {window_index + 1}: {position:.1f}s - {end:.1f}s de {total:.1f}s")
+        audio = load_audio_window(input_file, position, end - position)
+
+        if provided:
+            segments = [
+                {"start": max(0.0, s["start"] - position), "end": min(end, s["end"]) - position, "text": s["text"]}
+                for s in provided if s["start"] >= position and s["start"] < end
+            ]
+        else:
+            if model is None:
+                compute_type, batch_size, model_kwargs = asr_settings(input_file, model_name, device, recalibrate=recalibrate_cpu)
+                print(f"Carregando modelo {model_name}...")
+                model = whisperx.load_model(model_name, device, compute_type=compute_type, asr_options={"hotwords": None}, **model_kwargs)
+            if skip_silence:
+                transcribed = transcribe_speech_only(model, audio, batch_size=batch_size, chunk_size=10, language=language)
+            else:
+                transcribed = model.transcribe(audio, batch_size=batch_size, chunk_size=10, language=language)
+            language = language or transcribed["language"]
+            segments = transcribed["segments"]
+
+        if segments and not lazy_align:
+            try:
+                if language not in align_models:
+                    align_models[language] = whisperx.load_align_model(language_code=language, device=device)
+                model_a, metadata = align_models[language]
+                segments = whisperx.align(segments, model_a, metadata, audio, device, return_char_alignments=False)["segments"]
+            except Exception as e:
+                print(f"Erro durante alinhamento da janela: {e}. Continuando com transcrição bruta.")
+
+        entry = {
+            "window": window_index,
+            "start": position,
+            "end": end,
+            "language": language,
+            "segments": _shift_segments(segments, position),
+        }
+        with open(journal_path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        del audio
+        gc.collect()
+        position = end
+        window_index += 1
+
+    if device == "cuda":
+        del model
+        align_models.clear()
+        gc.collect()
+        torch.cuda.empty_cache()
+
+    # Monta o store final a partir do journal
+    all_segments = []
+    for entry in read_stream_journal(journal_path):
+        all_segments.extend(entry["segments"])
+    store_meta = {"alignment": "none", "aligned_windows": []} if lazy_align else None
+    transcript_store.write_store({"segments": all_segments, "language": language or "en"}, output_folder, extra_meta=store_meta)
+
+    try:
+        os.remove(journal_path)
+    except OSError:
+        pass
+
+    elapsed = time.time() - start_clock
+    print(f"Processamento (streaming) concluído em {int(elapsed//60)}m {int(elapsed%60)}s.")
+    print_rtf(elapsed, total)
+
+# --- Perfil de CPU (compute_type / batch / threads calibrados por máquina) -----
+
+CPU_PROFILE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "cpu_profile.json")
+CALIBRATION_SECONDS = 30
+CALIBRATION_BATCHES = (4, 8, 16)
+# Trecho da amostra usado no aquecimento (não cronometrado) de cada modelo
+CALIBRATION_WARMUP_SECONDS = 10
+
+def print_rtf(elapsed, audio_seconds):
+    """Real-time factor: segundos de processamento por segundo de áudio (< 1 = mais rápido que tempo real)."""
+    if audio_seconds and audio_seconds > 0:
+        print(f"ASR: {elapsed:.1f}s para {audio_seconds:.1f}s de áudio (RTF {elapsed / audio_seconds:.3f})")
+
+def _machine_key(model_name):
+    import platform
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|{model_name}"
+
+def _load_cpu_profiles():
+    if not os.path.exists(CPU_PROFILE_FILE):
+        return {}
+    try:
+        with open(CPU_PROFILE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def calibrate_cpu(input_file, model_name):
+    """
+    Benchmark curto (~30s de áudio do próprio vídeo) com int8/float32, alguns
+    batch sizes e contagens de threads. Retorna o perfil mais rápido.
+    """
+    total = get_media_duration(input_file)
+    sample_start = min(60.0, total / 3) if total > CALIBRATION_SECONDS else 0.0
+    sample = load_audio_window(input_file, sample_start, CALIBRATION_SECONDS)
+    sample_seconds = len(sample) / SAMPLE_RATE
+    if sample_seconds < 5:
+        return None
+
+    cores = os.cpu_count() or 4
+    candidates = [("int8", cores), ("float32", cores)]
+    if cores >= 4:
+        candidates.insert(1, ("int8", cores // 2))
+
+    print(f"Calibrando perfil de CPU para {model_name} ({sample_seconds:.0f}s de amostra)...")
+    best = None
+    language = None
+    for compute_type, threads in candidates:
+        try:
+            model = whisperx.load_model(model_name, "cpu", compute_type=compute_type,
+                                        asr_options={"hotwords": None}, threads=threads)
+        except Exception as e:
+            print(f"  {compute_type}/{threads} threads: indisponível ({e})")
+            continue
+
+        # Aquecimento fora do cronômetro: a primeira chamada paga a detecção de idioma
+        # e a inicialização do modelo, o que penalizaria só a primeira configuração
+        try:
+            warmup = model.transcribe(sample[:int(CALIBRATION_WARMUP_SECONDS * SAMPLE_RATE)],
+                                      batch_size=CALIBRATION_BATCHES[0], chunk_size=10, language=language)
+            language = language or warmup.get("language")
+        except Exception as e:
+            print(f"  {compute_type}/{threads} threads: erro no aquecimento ({e})")
+            del model
+            gc.collect()
+            continue
+
+        for batch_size in CALIBRATION_BATCHES:
+            started = time.time()
+            try:
+                model.transcribe(sample, batch_size=batch_size, chunk_size=10, language=language)
+            except Exception as e:
+                print(f"  {compute_type}/{threads}t/batch {batch_size}: erro ({e})")
+                continue
+            elapsed = time.time() - started
+            rtf = elapsed / sample_seconds
+            print(f"  {compute_type}/{threads}t/batch {batch_size}: RTF {rtf:.3f}")
+            if best is None or rtf < best["rtf"]:
+                best = {"compute_type": compute_type, "threads": threads, "batch_size": batch_size, "rtf": round(rtf, 4)}
+
+        del model
+        gc.collect()
+
+    return best
+
+def default_cpu_profile():
+    return {"compute_type": "int8", "threads": os.cpu_count() or 4, "batch_size": 8}
+
+def saved_cpu_profile(model_name):
+    """Perfil já calibrado desta máquina/modelo (sem calibrar), ou o padrão."""
+    return _load_cpu_profiles().get(_machine_key(model_name)) or default_cpu_profile()
+
+def get_cpu_profile(input_file, model_name, recalibrate=False):
+    """Perfil salvo para esta máquina/modelo; calibra na primeira vez."""
+    default = default_cpu_profile()
+    profiles = _load_cpu_profiles()
+    key = _machine_key(model_name)
+    if not recalibrate and key in profiles:
+        return profiles[key]
+
+    try:
+        profile = calibrate_cpu(input_file, model_name)
+    except Exception as e:
+        print(f"Calibração de CPU falhou ({e}). Usando padrão {default}.")
+        return default
+    if profile is None:
+        return default
+
+    profile["calibrated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    profiles[key] = profile
+    try:
+        os.makedirs(os.path.dirname(CPU_PROFILE_FILE), exist_ok=True)
+        with open(CPU_PROFILE_FILE, "w", encoding="utf-8") as f:
+            json.dump(profiles, f, indent=2)
+        print(f"Perfil de CPU salvo em {CPU_PROFILE_FILE}: {profile}")
+    except OSError as e:
+        print(f"Não foi possível salvar o perfil de CPU: {e}")
+    return profile
+
+def asr_settings(input_file, model_name, device, recalibrate=False):
+    """
+    (compute_type, batch_size, model_kwargs) para carregar o Whisper localmente.
+    Em CPU vêm do perfil da máquina, que é calibrado aqui na primeira vez.
+    """
+    if device != "cpu":
+        return "float16", 16, {}
+    profile = get_cpu_profile(input_file, model_name, recalibrate=recalibrate)
+    torch.set_num_threads(profile["threads"])
+    print(f"Perfil de CPU: {profile['compute_type']}, batch {profile['batch_size']}, {profile['threads']} threads")
+    return profile["compute_type"], profile["batch_size"], {"threads": profile["threads"]}
+
+# --- VAD por energia: pula silêncio antes do ASR ---------------------------------
+
+VAD_FRAME = 0.03          # segundos por frame de energia
+VAD_MIN_SILENCE = 2.0     # só remove silêncios mais longos que isso
+VAD_PAD = 0.3             # margem mantida em volta da fala
+VAD_JOIN_GAP = 0.5        # silêncio inserido entre trechos (evita palavras "coladas")
+
+def detect_speech_spans(audio, sr=SAMPLE_RATE, frame=VAD_FRAME, min_silence=VAD_MIN_SILENCE, pad=VAD_PAD):
+    """
+    Lista de (start, end) em segundos com fala provável.
+    Limiar adaptativo: um pouco acima do piso de ruído (percentil 10 da energia em dB).
+    """
+    hop = int(frame * sr)
+    n_frames = len(audio) // hop
+    if n_frames == 0:
+        return [(0.0, len(audio) / sr)]
+
+    energy = np.empty(n_frames, dtype=np.float32)
+    # Em blocos para não materializar o áudio inteiro de uma vez (memmap)
+    block = 10000
+    for i in range(0, n_frames, block):
+        j = min(n_frames, i + block)
+        chunk = np.asarray(audio[i * hop:j * hop], dtype=np.float32).reshape(j - i, hop)
+        energy[i:j] = np.sqrt(np.mean(chunk ** 2, axis=1))
+
+    db = 20 * np.log10(energy + 1e-10)
+    noise_floor = np.percentile(db, 10)
+    threshold = max(noise_floor + 12.0, -55.0)
+    voiced = db > threshold
+
+    # Junta frames com fala separados por silêncios curtos
+    spans = []
+    min_gap = int(min_silence / frame)
+    start = None
+    last_voiced = None
+    for idx in np.flatnonzero(voiced):
+        if start is None:
+            start = idx
+        elif idx - last_voiced > min_gap:
+            spans.append((start, last_voiced + 1))
+            start = idx
+        last_voiced = idx
+    if start is not None:
+        spans.append((start, last_voiced + 1))
+
+    total = len(audio) / sr
+    result = []
+    for s, e in spans:
+        s_time = max(0.0, float(s * frame - pad))
+        e_time = min(total, float(e * frame + pad))
+        if result and s_time <= result[-1][1]:
+            result[-1] = (result[-1][0], e_time)
+        else:
+            result.append((s_time, e_time))
+    return result
+
+def _speech_timeline(spans, gap=VAD_JOIN_GAP):
+    """Para cada trecho: (início no áudio concatenado, início original, duração)."""
+    mapping = []
+    cursor = 0.0
+    for start, end in spans:
+        mapping.append((cursor, start, end - start))
+        cursor += (end - start) + gap
+    return mapping
+
+def remap_time(t, mapping, starts):
+    """
+    Converte um tempo do áudio concatenado para o tempo original.
+    starts: [m[0] for m in mapping], calculado uma vez por quem chama.
+    """
+    if t is None or not mapping:
+        return t
+    i = max(0, bisect_right(starts, t) - 1)
+    concat_start, orig_start, length = mapping[i]
+    # Tempos caindo no gap inserido grudam no fim do trecho
+    return round(orig_start + min(max(0.0, t - concat_start), length), 3)
+
+def transcribe_speech_only(model, audio, sr=SAMPLE_RATE, **transcribe_kwargs):
+    """
+    Roda o ASR só nos trechos com fala e devolve o resultado com timestamps
+    na linha do tempo original.
+    """
+    total = len(audio) / sr
+    spans = detect_speech_spans(audio, sr)
+    speech = sum(e - s for s, e in spans)
+    if not spans or speech > 0.95 * total:
+        return model.transcribe(audio, **transcribe_kwargs)
+
+    print(f"VAD: {speech:.0f}s de fala em {total:.0f}s de áudio ({len(spans)} trechos). Pulando {total - speech:.0f}s.")
+    gap = np.zeros(int(VAD_JOIN_GAP * sr), dtype=np.float32)
+    pieces = []
+    for start, end in spans:
+        pieces.append(np.asarray(audio[int(start * sr):int(end * sr)], dtype=np.float32))
+        pieces.append(gap)
+    speech_audio = np.concatenate(pieces[:-1]) if pieces else np.zeros(0, dtype=np.float32)
+
+    result = model.transcribe(speech_audio, **transcribe_kwargs)
+    mapping = _speech_timeline(spans)
+    starts = [m[0] for m in mapping]
+    for seg in result.get("segments", []):
+        seg["start"] = remap_time(seg.get("start"), mapping, starts)
+        seg["end"] = remap_time(seg.get("end"), mapping, starts)
+    return result
@@ -0,0 +1,333 @@
+import os
+import glob
+import json
+import time
+import shutil
+import numpy as np
+
+from scripts.cut_files import write_srt_segments
+
+# Armazenamento canônico e compacto da transcrição do projeto.
+#
+# VIRALS/<projeto>/transcript/
+#   meta.json            -> idioma, versão, se tem alinhamento por palavra
+#   segments.npy         -> start, end, first_word, n_words, text, speaker (colunar)
+#   words.npy            -> start, end, score, segment, text (colunar)
+#   strings.bin          -> tabela de strings UTF-8 concatenadas
+#   strings_offsets.npy  -> offsets (int64) de cada string em strings.bin
+#
+# Tudo é aberto com mmap, então abrir um transcript de 3h não copia nada para a RAM.
+# input.srt / input.tsv / input.json só são gerados sob demanda via export().
+
+STORE_DIRNAME = "transcript"
+STORE_VERSION = 1
+
+SEGMENT_DTYPE = np.dtype([
+    ("start", "f8"), ("end", "f8"),
+    ("first_word", "i8"), ("n_words", "i4"),
+    ("text", "i8"), ("speaker", "i8"),
+])
+
+WORD_DTYPE = np.dtype([
+    ("start", "f8"), ("end", "f8"), ("score", "f4"),
+    ("segment", "i4"), ("text", "i8"),
+])
+
+def store_path(project_folder):
+    return os.path.join(project_folder, STORE_DIRNAME)
+
+def _recover_swap(project_folder):
+    """Crash entre as duas renomeações do write_store: o store antigo volta para o lugar."""
+    final_dir = store_path(project_folder)
+    if os.path.exists(final_dir):
+        return
+    old_dirs = sorted(glob.glob(final_dir + ".old-*"))
+    if old_dirs:
+        try:
+            os.replace(old_dirs[-1], final_dir)
+        except OSError:
+            pass
+
+def has_store(project_folder):
+    _recover_swap(project_folder)
+    return os.path.exists(os.path.join(store_path(project_folder), "meta.json"))
+
+def _num(value):
+    """None/ausente vira NaN (palavras sem timestamp do WhisperX, ex: números)."""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def write_store(result, project_folder, extra_meta=None):
+    """
+    Grava um resultado no formato WhisperX ({'segments': [...], 'language': ...})
+    no store colunar do projeto. Substitui o store anterior.
+    extra_meta: campos adicionais para meta.json (ex: 'alignment', 'aligned_windows').
+    """
+    segments_in = result.get("segments", []) or []
+
+    strings = []
+    string_ids = {}
+
+    def intern(text):
+        text = text or ""
+        idx = string_ids.get(text)
+        if idx is None:
+            idx = len(strings)
+            string_ids[text] = idx
+            strings.append(text)
+        return idx
+
+    n_words = sum(len(seg.get("words", []) or []) for seg in segments_in)
+    segments = np.zeros(len(segments_in), dtype=SEGMENT_DTYPE)
+    words = np.zeros(n_words, dtype=WORD_DTYPE)
+
+    w = 0
+    has_words = False
+    for s_idx, seg in enumerate(segments_in):
+        seg_words = seg.get("words", []) or []
+        segments[s_idx] = (
+            _num(seg.get("start")), _num(seg.get("end")),
+            w, len(seg_words),
+            intern(seg.get("text", "")),
+            intern(seg["speaker"]) if seg.get("speaker") is not None else -1,
+        )
+        for word in seg_words:
+            has_words = True
+            words[w] = (
+                _num(word.get("start")), _num(word.get("end")), _num(word.get("score")),
+                s_idx, intern(word.get("word", "")),
+            )
+            w += 1
+
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    if blobs:
+        offsets[1:] = np.cumsum([len(b) for b in blobs])
+
+    final_dir = store_path(project_folder)
+    tmp_dir = final_dir + ".tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "segments.npy"), segments)
+    np.save(os.path.join(tmp_dir, "words.npy"), words)
+    np.save(os.path.join(tmp_dir, "strings_offsets.npy"), offsets)
+    with open(os.path.join(tmp_dir, "strings.bin"), "wb") as f:
+        for b in blobs:
+            f.write(b)
+
+    meta = {
+        "version": STORE_VERSION,
+        "language": result.get("language"),
+        "word_aligned": has_words,
+        "segments": int(len(segments)),
+        "words": int(len(words)),
+        "alignment": "full" if has_words else "none",
+    }
+    if extra_meta:
+        meta.update(extra_meta)
+    # meta.json por último: é ele que marca o store como completo
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Troca por renomeação: o store antigo sai do caminho antes do novo entrar, então um
+    # crash no meio nunca deixa o projeto sem store (_recover_swap). Apagar o antigo é o
+    # último passo e pode falhar no Windows se ele ainda estiver mapeado; sobra como
+    # .old-* e é limpo na próxima escrita.
+    for stale in glob.glob(final_dir + ".old-*"):
+        shutil.rmtree(stale, ignore_errors=True)
+    old_dir = None
+    if os.path.exists(final_dir):
+        old_dir = f"{final_dir}.old-{time.time_ns()}"
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Transcript store salvo em: {final_dir} ({meta['segments']} segmentos, {meta['words']} palavras)")
+    return final_dir
+
+
+class TranscriptStore:
+    """Leitura (mmap) do store colunar. Use open_store()."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.language = self.meta.get("language")
+        self.word_aligned = self.meta.get("word_aligned", False)
+        # 'full', 'partial' (só janelas em aligned_windows) ou 'none' (só timing de segmento)
+        self.alignment = self.meta.get("alignment", "full" if self.word_aligned else "none")
+        self.aligned_windows = self.meta.get("aligned_windows", [])
+
+        self.segments = np.load(os.path.join(folder, "segments.npy"), mmap_mode="r")
+        self.words = np.load(os.path.join(folder, "words.npy"), mmap_mode="r")
+        self._offsets = np.load(os.path.join(folder, "strings_offsets.npy"), mmap_mode="r")
+        strings_path = os.path.join(folder, "strings.bin")
+        if os.path.getsize(strings_path) > 0:
+            self._blob = np.memmap(strings_path, dtype=np.uint8, mode="r")
+        else:
+            self._blob = np.zeros(0, dtype=np.uint8)
+        self._max_ends = None
+
+    def close(self):
+        """Solta os mmaps. Necessário antes de regravar o store no Windows."""
+        self.segments = self.segments[:0].copy()
+        self.words = self.words[:0].copy()
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._blob = np.zeros(0, dtype=np.uint8)
+        self._max_ends = None
+
+    def __len__(self):
+        return len(self.segments)
+
+    def string(self, idx):
+        if idx < 0:
+            return None
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    @property
+    def starts(self):
+        return self.segments["start"]
+
+    @property
+    def ends(self):
+        return self.segments["end"]
+
+    @property
+    def max_ends(self):
+        """Maior fim acumulado: permite busca binária de sobreposição mesmo com segmentos sobrepostos."""
+        if self._max_ends is None:
+            ends = np.nan_to_num(np.asarray(self.ends), nan=-np.inf)
+            self._max_ends = np.maximum.accumulate(ends) if len(ends) else ends
+        return self._max_ends
+
+    def find_range(self, start_time, end_time):
+        """Índices [first, last) dos segmentos que cruzam [start_time, end_time]."""
+        first = int(np.searchsorted(self.max_ends, start_time, side="right"))
+        last = int(np.searchsorted(self.starts, end_time, side="left"))
+        return first, max(first, last)
+
+    def _word_dict(self, row):
+        word = {"word": self.string(int(row["text"]))}
+        if not np.isnan(row["start"]):
+            word["start"] = float(row["start"])
+        if not np.isnan(row["end"]):
+            word["end"] = float(row["end"])
+        if not np.isnan(row["score"]):
+            word["score"] = round(float(row["score"]), 3)
+        return word
+
+    def segment(self, idx, with_words=True):
+        row = self.segments[idx]
+        seg = {
+            "start": float(row["start"]),
+            "end": float(row["end"]),
+            "text": self.string(int(row["text"])),
+        }
+        speaker = int(row["speaker"])
+        if speaker >= 0:
+            seg["speaker"] = self.string(speaker)
+        if with_words and self.word_aligned:
+            first, count = int(row["first_word"]), int(row["n_words"])
+            seg["words"] = [self._word_dict(w) for w in self.words[first:first + count]]
+        return seg
+
+    def iter_segments(self, first=0, last=None, with_words=True):
+        last = len(self) if last is None else last
+        for idx in range(first, last):
+            yield self.segment(idx, with_words=with_words)
+
+    def segments_between(self, start_time, end_time, with_words=True):
+        first, last = self.find_range(start_time, end_time)
+        return list(self.iter_segments(first, last, with_words=with_words))
+
+    def to_result(self, with_words=True):
+        """Reconstrói o dicionário no formato WhisperX."""
+        return {"segments": list(self.iter_segments(with_words=with_words)), "language": self.language}
+
+
+def open_store(project_folder):
+    """Abre o store do projeto ou retorna None se ainda não existir."""
+    if not has_store(project_folder):
+        return None
+    try:
+        return TranscriptStore(store_path(project_folder))
+    except Exception as e:
+        print(f"[WARN] Transcript store ilegível ({e}). Usando arquivos legados.")
+        return None
+
+def load_result(project_folder, base_name="input"):
+    """
+    Retorna o transcript no formato WhisperX, vindo do store ou do input.json legado.
+    Projetos antigos (só com input.json) são convertidos para o store na primeira leitura.
+    """
+    store = open_store(project_folder)
+    if store is not None:
+        return store.to_result()
+
+    legacy_json = os.path.join(project_folder, f"{base_name}.json")
+    if os.path.exists(legacy_json):
+        with open(legacy_json, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        try:
+            write_store(result, project_folder)
+        except Exception as e:
+            print(f"[WARN] Não foi possível converter {legacy_json} para o store: {e}")
+        return result
+    return None
+
+def open_or_migrate(project_folder, base_name="input"):
+    """Como open_store(), mas migra um input.json legado se for preciso."""
+    store = open_store(project_folder)
+    if store is None and load_result(project_folder, base_name) is not None:
+        store = open_store(project_folder)
+    return store
+
+# --- Exportação sob demanda ------------------------------------------------------
+
+def _write_srt(store, path):
+    write_srt_segments(store.iter_segments(with_words=False), path)
+
+def _write_tsv(store, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("start\tend\ttext\n")
+        for seg in store.iter_segments(with_words=False):
+            text = seg["text"].strip().replace("\t", " ")
+            f.write(f"{round(1000 * seg['start'])}\t{round(1000 * seg['end'])}\t{text}\n")
+
+def _write_json(store, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(store.to_result(), f, ensure_ascii=False)
+
+EXPORTERS = {"srt": _write_srt, "tsv": _write_tsv, "json": _write_json}
+
+def export(project_folder, fmt, base_name="input", force=False):
+    """
+    Gera input.<fmt> a partir do store, apenas se faltar ou estiver desatualizado.
+    Retorna o caminho do arquivo (ou None se não houver store).
+    """
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+    store = open_store(project_folder)
+    if store is None:
+        return None
+
+    out_path = os.path.join(project_folder, f"{base_name}.{fmt}")
+    meta_path = os.path.join(store.folder, "meta.json")
+    if not force and os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(meta_path):
+        return out_path
+
+    # Temporário + rename: input.srt pode ser hardlink do cache de fontes (source_cache)
+    # e escrever nele direto alteraria o arquivo de todos os projetos
+    EXPORTERS[fmt](store, out_path + ".tmp")
+    os.replace(out_path + ".tmp", out_path)
+    print(f"Exportado: {out_path}")
+    return out_path
@@ -4,6 +4,7 @@ import asyncio
 from pathlib import Path
 import tqdm.asyncio
 from deep_translator import GoogleTranslator
+from scripts import cut_files
 
 # Lista de idiomas alvo
 target_languages = ['en']
@@ -156,8 +157,7 @@ def adjust_segments(segments):
     return segments
 
 async def translate_json_file(json_file_path: Path, translated_json_path: Path, target_lang):
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+    data = cut_files.read_cut(json_file_path)
 
     segments = data['segments']
     texts_to_translate = [segment['text'] for segment in segments if segment['text']]
@@ -217,8 +217,7 @@ async def translate_json_file(json_file_path: Path, translated_json_path: Path,
     data['segments'] = segments
 
     os.makedirs(translated_json_path.parent, exist_ok=True)
-    with open(translated_json_path, 'w', encoding='utf-8') as file:
-        json.dump(data, file, ensure_ascii=False, indent=2)
+    cut_files.write_cut(translated_json_path, data)
 
     print('\r                         ', end='\r')
 
@@ -304,13 +303,10 @@ async def translate_project_subs(project_folder: str, target_lang: str):
         # effectively replacing the file read by the next step
         print(f"Translating {source_file.name} -> {json_file.name} ({target_lang})...")
         try:
-            await translate_json_file(source_file, json_file, target_lang)
+            data = await translate_json_file(source_file, json_file, target_lang)
             
-            # Apply language specific substitutions if any
+            # Apply language specific substitutions if any (on the data already in memory)
             if target_lang in substituicoes_por_idioma:
-                 with open(json_file, 'r', encoding='utf-8') as f:
-                     data = json.load(f)
-                 
                  modified = False
                  for segment in data.get('segments', []):
                     # Text
@@ -328,8 +324,7 @@ async def translate_project_subs(project_folder: str, target_lang: str):
                             modified = True
                  
                  if modified:
-                     with open(json_file, 'w', encoding='utf-8') as f:
-                         json.dump(data, f, ensure_ascii=False, indent=2)
+                     cut_files.write_cut(json_file, data)
 
         except Exception as e:
             print(f"Error translating {json_file.name}: {e}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos são importados como no main_improved: "from scripts import ..."
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,33 @@
+from scripts import chunking
+
+def words(text):
+    return len(text.split())
+
+def make_segments(n, seconds=10.0, words_per_segment=10):
+    return [{"start": i * seconds, "end": (i + 1) * seconds, "text": " ".join(["w"] * words_per_segment)}
+            for i in range(n)]
+
+def test_pack_segments_fills_budget_with_whole_segments():
+    ranges = chunking.pack_segments(make_segments(5), words, budget=25, overlap_seconds=0, tag_tokens=0)
+    assert ranges == [(0, 2), (2, 4), (4, 5)]
+
+def test_pack_segments_overlaps_by_time():
+    ranges = chunking.pack_segments(make_segments(6), words, budget=35, overlap_seconds=15, tag_tokens=0)
+    # Cada chunk recomeça no segmento que inicia até 15s antes do fim do anterior
+    assert ranges == [(0, 3), (2, 5), (4, 6)]
+
+def test_pack_segments_always_advances_on_oversized_segment():
+    ranges = chunking.pack_segments(make_segments(3, words_per_segment=50), words, budget=10, tag_tokens=0)
+    assert ranges == [(0, 1), (1, 2), (2, 3)]
+
+def test_pack_segments_counts_tag_tokens():
+    # 10 palavras + 4 da tag de tempo: só cabe um segmento em 20 tokens
+    ranges = chunking.pack_segments(make_segments(2), words, budget=20, overlap_seconds=0)
+    assert ranges == [(0, 1), (1, 2)]
+
+def test_pack_segments_empty():
+    assert chunking.pack_segments([], words, budget=100) == []
+
+def test_token_budget_respects_char_cap_and_floor():
+    assert chunking.token_budget("local", 0, {"context_tokens": 8192, "max_output_tokens": 4096}, char_cap=4000) == 1000
+    assert chunking.token_budget("local", 10000) == 256
@@ -0,0 +1,35 @@
+from scripts.json_stream import SegmentStreamParser, parse_segments
+
+RESPONSE = (
+    '<think>{"segments": "rascunho"}</think>Here\'s the JSON: '
+    '{"segments": [{"title": "a", "start_time": 1}, {"title": "b", "note": "x}y"}]}'
+)
+
+def test_segments_are_emitted_as_they_close():
+    parser = SegmentStreamParser()
+    emitted = []
+    for c in RESPONSE:
+        emitted.extend(seg["title"] for seg in parser.feed(c))
+    assert emitted == ["a", "b"]
+    assert not parser.truncated
+    assert [seg["title"] for seg in parser.close()] == ["a", "b"]
+
+def test_first_segment_is_available_before_the_stream_ends():
+    parser = SegmentStreamParser()
+    assert parser.feed('{"segments": [{"title": "a"}') == [{"title": "a"}]
+    assert parser.feed(', {"title": "b"') == []
+
+def test_truncated_response_keeps_complete_segments():
+    parser = SegmentStreamParser()
+    parser.feed('{"segments": [{"title": "a"}, {"title": "b')
+    assert parser.truncated
+    assert parser.close() == [{"title": "a"}]
+
+def test_array_still_open_counts_as_truncated():
+    parser = SegmentStreamParser()
+    parser.feed('{"segments": [{"title": "a"}')
+    assert parser.truncated
+
+def test_python_style_dicts_and_trailing_commas():
+    assert parse_segments("{'segments': [{'title': 'a', 'ok': True}]}") == [{"title": "a", "ok": True}]
+    assert parse_segments('{"segments": [{"title": "a",}]}') == [{"title": "a"}]
@@ -0,0 +1,59 @@
+import sys
+import types
+
+import pytest
+
+from scripts import llm_backends
+from scripts.llm_dispatch import RetryLater
+
+class FakeBackend(llm_backends.LLMBackend):
+    name = "fake"
+
+    def __init__(self, parts, error=None):
+        self.parts = parts
+        self.error = error
+
+    def stream(self, prompt):
+        yield from self.parts
+        if self.error:
+            raise self.error
+
+def test_interrupted_stream_returns_partial_segments():
+    backend = FakeBackend(['{"segments": [{"title": "a"}, ', '{"title": "b'], error=ConnectionError("reset"))
+    text, segments, partial = llm_backends.stream_response(backend, "prompt")
+    assert segments == [{"title": "a"}]
+    assert partial
+    assert text.startswith('{"segments"')
+
+def test_interrupted_stream_without_segments_raises():
+    with pytest.raises(ConnectionError):
+        llm_backends.stream_response(FakeBackend(['{"segm'], error=ConnectionError("reset")), "prompt")
+
+def test_complete_stream_is_not_partial():
+    _, segments, partial = llm_backends.stream_response(FakeBackend(['{"segments": [{"title": "a"}]}']), "prompt")
+    assert segments == [{"title": "a"}] and not partial
+
+def test_failed_call_is_reported_as_partial():
+    assert llm_backends.call_with_retry(FakeBackend([], error=ValueError("bad")), "p", return_partial=True) == ("{}", True)
+
+def fake_g4f(monkeypatch, error):
+    def create(**kwargs):
+        raise error
+    module = types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(create=create))
+    monkeypatch.setitem(sys.modules, "g4f", module)
+    return llm_backends.G4FBackend()
+
+def test_g4f_rate_limit_is_retried(monkeypatch):
+    backend = fake_g4f(monkeypatch, RuntimeError("429 Too Many Requests"))
+    with pytest.raises(RetryLater):
+        backend.complete("p")
+
+def test_g4f_transport_error_is_retried(monkeypatch):
+    backend = fake_g4f(monkeypatch, ConnectionError("reset"))
+    with pytest.raises(RetryLater):
+        backend.complete("p")
+
+def test_g4f_other_errors_are_not_retried(monkeypatch):
+    backend = fake_g4f(monkeypatch, ValueError("Model not found: gpt-x"))
+    with pytest.raises(ValueError):
+        backend.complete("p")
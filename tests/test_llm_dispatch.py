@@ -0,0 +1,35 @@
+from scripts.llm_dispatch import RetryLater, run_dispatch
+
+def test_results_come_back_in_prompt_order():
+    prompts = [f"p{i}" for i in range(6)]
+    assert run_dispatch(prompts, lambda p: p.upper(), max_concurrency=3) == [p.upper() for p in prompts]
+
+def test_retry_later_requeues_only_that_chunk():
+    calls = {}
+
+    def call(prompt):
+        calls[prompt] = calls.get(prompt, 0) + 1
+        if prompt == "b" and calls[prompt] == 1:
+            raise RetryLater(0.01, "429")
+        return prompt
+
+    assert run_dispatch(["a", "b", "c"], call) == ["a", "b", "c"]
+    assert calls == {"a": 1, "b": 2, "c": 1}
+
+def test_failed_chunk_maps_to_empty_json():
+    def call(prompt):
+        if prompt == "bad":
+            raise RuntimeError("boom")
+        return prompt
+
+    assert run_dispatch(["ok", "bad"], call) == ["ok", "{}"]
+
+def test_retries_exhausted_maps_to_empty_json():
+    calls = []
+
+    def call(prompt):
+        calls.append(prompt)
+        raise RetryLater(0.01)
+
+    assert run_dispatch(["x"], call, max_retries=2) == ["{}"]
+    assert len(calls) == 2
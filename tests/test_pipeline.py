@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from scripts import pipeline
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def make_stages(folder, calls, fail=None, params=None):
+    """src.txt -> a (a.txt) -> b (b.txt); c (c.txt) não depende de ninguém."""
+    def stage_func(name, source, target):
+        def func(changed):
+            calls.append(name)
+            if name == fail:
+                raise RuntimeError(f"{name} falhou")
+            content = read(os.path.join(folder, source)).upper() if source else "c"
+            write(os.path.join(folder, target), content)
+        return func
+
+    return [
+        pipeline.Stage("a", stage_func("a", "src.txt", "a.txt"), inputs=["src.txt"], outputs=["a.txt"], params=params),
+        pipeline.Stage("b", stage_func("b", "a.txt", "b.txt"), inputs=["a.txt"], outputs=["b.txt"]),
+        pipeline.Stage("c", stage_func("c", None, "c.txt"), outputs=["c.txt"]),
+    ]
+
+@pytest.fixture
+def project(tmp_path):
+    write(tmp_path / "src.txt", "hello")
+    return str(tmp_path)
+
+def test_second_run_skips_unchanged_stages(project):
+    calls = []
+    assert pipeline.run(make_stages(project, calls), project) == {"a": "ran", "b": "ran", "c": "ran"}
+    assert read(os.path.join(project, "b.txt")) == "HELLO"
+
+    calls.clear()
+    assert pipeline.run(make_stages(project, calls), project) == {"a": "skipped", "b": "skipped", "c": "skipped"}
+    assert calls == []
+
+def test_changed_input_reruns_stage_and_dependents(project):
+    pipeline.run(make_stages(project, []), project)
+    write(os.path.join(project, "src.txt"), "bye")
+
+    calls = []
+    results = pipeline.run(make_stages(project, calls), project)
+    assert results == {"a": "ran", "b": "ran", "c": "skipped"}
+    assert read(os.path.join(project, "b.txt")) == "BYE"
+
+def test_changed_params_rerun_stage(project):
+    pipeline.run(make_stages(project, [], params={"x": 1}), project)
+    calls = []
+    pipeline.run(make_stages(project, calls, params={"x": 2}), project)
+    # a roda de novo, mas a.txt não muda: b continua pulado
+    assert calls == ["a"]
+
+def test_missing_output_reruns_stage(project):
+    pipeline.run(make_stages(project, []), project)
+    os.remove(os.path.join(project, "c.txt"))
+    calls = []
+    pipeline.run(make_stages(project, calls), project)
+    assert calls == ["c"]
+
+def test_force_reruns_named_stage(project):
+    pipeline.run(make_stages(project, []), project)
+    calls = []
+    assert pipeline.run(make_stages(project, calls), project, force={"b"})["b"] == "ran"
+    assert calls == ["b"]
+
+def test_unknown_force_name_fails_before_running(project):
+    calls = []
+    with pytest.raises(pipeline.UnknownStageError) as info:
+        pipeline.run(make_stages(project, calls), project, force={"b", "nope"})
+    assert info.value.unknown == ["nope"]
+    assert info.value.valid == ["a", "b", "c"]
+    assert calls == []
+
+def test_failed_stage_blocks_dependents_and_reruns_next_time(project):
+    calls = []
+    with pytest.raises(RuntimeError):
+        pipeline.run(make_stages(project, calls, fail="a"), project, max_workers=1)
+    assert "b" not in calls
+    assert pipeline.load_manifest(project)["a"]["status"] == "failed"
+
+    calls = []
+    results = pipeline.run(make_stages(project, calls), project)
+    assert results["a"] == "ran" and results["b"] == "ran"
+
+def test_existing_outputs_without_manifest_are_adopted(project):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        write(os.path.join(project, name), "old")
+    calls = []
+    assert pipeline.run(make_stages(project, calls), project) == {"a": "adopted", "b": "adopted", "c": "adopted"}
+    assert calls == []
+
+def test_disabled_writer_makes_stage_rerender(project):
+    write(os.path.join(project, "a.txt"), "manual")
+    write(os.path.join(project, "b.txt"), "old")
+    stages = make_stages(project, [])
+    stages[0].enabled = False
+    results = pipeline.run(stages, project)
+    # a.txt só é escrito por uma etapa desativada: b não é adotada, roda
+    assert results["a"] == "disabled" and results["b"] == "ran"
+    assert read(os.path.join(project, "b.txt")) == "MANUAL"
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from scripts import prescore
+
+def make_segments(n, hot=(), seconds=5.0):
+    segments = []
+    for i in range(n):
+        text = "uma frase qualquer sobre o assunto"
+        if i in hot:
+            text = "Sério? Que incrível! [laughter]"
+        segments.append({"start": i * seconds, "end": (i + 1) * seconds, "text": text})
+    return segments
+
+def test_candidate_windows_reach_target_duration():
+    windows = prescore.candidate_windows(make_segments(10), 15, 25)
+    # Alvo de 20s com segmentos de 5s: 4 segmentos por janela, menos no fim
+    assert windows[0] == (0, 4)
+    assert windows[-1] == (9, 10)
+
+def test_score_windows_ranks_reactive_window_first():
+    segments = make_segments(30, hot=range(20, 24))
+    windows = prescore.candidate_windows(segments, 15, 25)
+    scores = prescore.score_windows(segments, windows)
+    assert windows[int(scores.argmax())] == (20, 24)
+
+def test_select_windows_returns_top_k_with_context():
+    segments = make_segments(60, hot=set(range(10, 14)) | set(range(40, 44)))
+    selected = prescore.select_windows(segments, 15, 25, top_k=2, context_seconds=10.0)
+    assert len(selected) == 2
+    assert selected[0][0] <= 8 and selected[0][1] >= 14
+    assert selected[1][0] <= 38 and selected[1][1] >= 44
+    # Bem menos que o transcript inteiro vai para a IA
+    assert sum(last - first for first, last in selected) < len(segments) // 2
+
+def test_select_windows_merges_overlapping_context():
+    segments = make_segments(30, hot=set(range(10, 14)) | set(range(15, 19)))
+    assert len(prescore.select_windows(segments, 15, 25, top_k=2, context_seconds=10.0)) == 1
+
+def test_select_windows_empty():
+    assert prescore.select_windows([], 15, 25, top_k=3) == []
@@ -0,0 +1,143 @@
+import copy
+import random
+import re
+
+from scripts.create_viral_segments import build_search_index, find_text, process_segments
+
+WORDS = ("a gente falou sobre isso ontem mas ninguém acreditou que o vídeo ia "
+         "viralizar tão rápido quando o canal postou a reação completa").split()
+
+def old_process_segments(raw_segments, transcript_segments, min_duration, max_duration):
+    """Varredura linear anterior ao índice (referência para os testes)."""
+    def norm(text):
+        return re.sub(r'[^\w\s]', '', text.lower().strip())
+
+    processed = []
+    for seg in sorted(raw_segments, key=lambda x: int(x.get('score', 0)), reverse=True):
+        ref = int(re.search(r'\d+', seg['start_time_ref']).group())
+        start_idx, min_diff = 0, 999999
+        for i, s in enumerate(transcript_segments):
+            diff = abs(s['start'] - ref)
+            if diff < min_diff:
+                min_diff, start_idx = diff, i
+            if s['start'] > ref + 10:
+                break
+        start_idx = max(0, start_idx - 5)
+
+        target = norm(seg.get('start_text', ''))
+        start, match_idx = -1, -1
+        for i in range(start_idx, min(len(transcript_segments), start_idx + 50)):
+            s_text = norm(transcript_segments[i]['text'])
+            if target and (target in s_text or s_text in target):
+                start, match_idx = transcript_segments[i]['start'], i
+                break
+        if start == -1:
+            start, match_idx = transcript_segments[start_idx]['start'], start_idx
+
+        target = norm(seg.get('end_text', ''))
+        end = -1
+        for i in range(match_idx, min(len(transcript_segments), match_idx + 200)):
+            s_text = norm(transcript_segments[i]['text'])
+            if target and (target in s_text or s_text in target):
+                end = transcript_segments[i]['end']
+                break
+        if end == -1:
+            end = start + min_duration
+        end = min(max(end, start + min_duration), start + max_duration)
+        processed.append({"title": seg['title'], "start_time": start, "end_time": end, "score": seg['score']})
+
+    unique = []
+    for candidate in sorted(processed, key=lambda x: int(x['score']), reverse=True):
+        s1, e1 = candidate['start_time'], candidate['end_time']
+        if not any(min(e1, e['end_time']) - max(s1, e['start_time']) > 5 for e in unique):
+            unique.append(candidate)
+    return [(s['title'], s['start_time'], s['end_time']) for s in unique]
+
+def new_result(raw_segments, transcript_segments, min_duration, max_duration):
+    result = process_segments(copy.deepcopy(raw_segments), transcript_segments, min_duration, max_duration)
+    return [(s['title'], s['start_time'], s['end_time']) for s in result['segments']]
+
+def make_transcript(rng, n):
+    segments, t = [], 0.0
+    for _ in range(n):
+        duration = rng.uniform(1.5, 6.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))).capitalize() + "."
+        segments.append({"start": round(t, 2), "end": round(t + duration, 2), "text": text})
+        t += duration + rng.uniform(0.0, 0.8)
+    return segments
+
+def make_raw(rng, transcript, n):
+    raw = []
+    for k in range(n):
+        i = rng.randrange(len(transcript))
+        j = min(len(transcript) - 1, i + rng.randint(2, 15))
+        start_words = transcript[i]['text'].split()
+        end_words = transcript[j]['text'].split()
+        raw.append({
+            "title": f"corte {k}",
+            "start_time_ref": f"({int(transcript[i]['start'] + rng.uniform(-8, 8))}s)",
+            "start_text": " ".join(start_words[:rng.randint(2, len(start_words))]),
+            "end_text": " ".join(end_words[-rng.randint(2, len(end_words)):]),
+            "score": rng.randint(50, 100),
+        })
+    return raw
+
+def test_index_matches_linear_scan_on_sample_transcripts():
+    for seed in range(20):
+        rng = random.Random(seed)
+        transcript = make_transcript(rng, rng.randint(40, 400))
+        raw = make_raw(rng, transcript, rng.randint(5, 30))
+        assert new_result(raw, transcript, 15, 60) == old_process_segments(raw, transcript, 15, 60), seed
+
+def test_dedup_matches_linear_scan_with_nested_and_touching_cuts():
+    transcript = [{"start": float(i * 5), "end": float(i * 5 + 5), "text": f"frase número {i}"} for i in range(100)]
+    raw = []
+    # Cortes longos, aninhados, encostados e cruzando por exatamente 5s
+    for k, (a, b) in enumerate([(0, 20), (2, 4), (4, 7), (10, 30), (19, 21), (40, 43), (43, 50), (12, 14)]):
+        raw.append({"title": f"corte {k}", "start_time_ref": f"({a * 5}s)", "start_text": f"frase número {a}",
+                    "end_text": f"frase número {b}", "score": 100 - k})
+    assert new_result(raw, transcript, 10, 120) == old_process_segments(raw, transcript, 10, 120)
+
+def fuzzy_transcript():
+    return [
+        {"start": 0.0, "end": 4.0, "text": "Bom dia a todos."},
+        {"start": 4.0, "end": 9.0, "text": "Hoje a gente vai falar sobre o experimento."},
+        {"start": 9.0, "end": 13.0, "text": "You see."},
+        {"start": 13.0, "end": 20.0, "text": "Ninguém acreditou que ia funcionar assim."},
+        {"start": 20.0, "end": 30.0, "text": "E no final deu tudo certo."},
+    ]
+
+def test_fuzzy_match_tolerates_small_wording_differences():
+    transcript = fuzzy_transcript()
+    # "experimento" -> "experimentos": sem containment, mas quase todos os trigramas batem
+    raw = [{"title": "t", "start_time_ref": "(0s)", "start_text": "hoje a gente vai falar sobre os experimentos",
+            "end_text": "ninguem acreditou que ia funcionar assim", "score": 90}]
+
+    assert new_result(raw, transcript, 5, 60) == [("t", 4.0, 20.0)]
+    # A varredura antiga caía no fallback (início da janela + duração mínima)
+    assert old_process_segments(raw, transcript, 5, 60) == [("t", 0.0, 5.0)]
+
+def test_fuzzy_match_below_threshold_keeps_old_fallback():
+    transcript = fuzzy_transcript()
+    raw = [{"title": "t", "start_time_ref": "(0s)", "start_text": "uma frase completamente diferente daqui",
+            "end_text": "outra coisa que nunca foi dita", "score": 90}]
+
+    assert new_result(raw, transcript, 5, 60) == old_process_segments(raw, transcript, 5, 60) == [("t", 0.0, 5.0)]
+
+def test_fuzzy_threshold_is_inclusive():
+    # Alvo com 10 trigramas distintos; os segmentos não contêm nem estão contidos nele
+    index = build_search_index([{"start": 0.0, "end": 1.0, "text": "abcdefg x"},
+                                {"start": 1.0, "end": 2.0, "text": "abcdefgh x"}])
+    target = "abcdefghij"
+
+    assert find_text(index, target, 0, 1) == -1  # 6/10 dos trigramas
+    assert find_text(index, target, 0, 2) == 1   # 7/10: exatamente no limiar
+
+def test_fuzzy_match_skips_segments_much_shorter_than_target():
+    index = build_search_index([{"start": 0.0, "end": 1.0, "text": "abcdz"},
+                                {"start": 1.0, "end": 2.0, "text": "abcdzzz"}])
+    target = "abcdefghijkl"
+
+    # Mesmos 3 trigramas em comum, mas o primeiro tem menos da metade do tamanho do alvo
+    assert find_text(index, target, 0, 1, min_score=0.2) == -1
+    assert find_text(index, target, 0, 2, min_score=0.2) == 1
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from scripts import source_cache, transcript_store
+
+def make_project(folder, video=b"video" * 100, subtitle=None, model=None):
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "input.mp4").write_bytes(video)
+    if subtitle is not None:
+        (folder / "input.srt").write_text(subtitle, encoding="utf-8")
+    if model is not None:
+        transcript_store.write_store({"segments": [{"start": 0.0, "end": 2.0, "text": f"fala do {model}"}],
+                                      "language": "pt"}, str(folder))
+    return str(folder)
+
+def test_url_key_uses_extractor_and_id():
+    assert source_cache.url_key({"extractor_key": "Youtube", "id": "dQw4w9WgXcQ"}) == "youtube-dQw4w9WgXcQ"
+    assert source_cache.url_key({"extractor": "generic", "id": "a/b?c"}) == "generic-a_b_c"
+    assert source_cache.url_key({"title": "sem id"}) is None
+
+def test_content_hash_depends_on_size_head_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(source_cache, "HASH_SAMPLE", 8)
+    a, b, c = tmp_path / "a.mp4", tmp_path / "b.mp4", tmp_path / "c.mp4"
+    a.write_bytes(b"0123456789" * 10)
+    b.write_bytes(b"0123456789" * 10)
+    c.write_bytes(b"0123456789" * 9 + b"012345678X")
+
+    assert source_cache.content_hash(str(a)) == source_cache.content_hash(str(b))
+    assert source_cache.content_hash(str(a)) != source_cache.content_hash(str(c))
+
+def test_store_and_restore_share_files_by_hardlink(tmp_path):
+    cache = str(tmp_path / "cache")
+    first = make_project(tmp_path / "p1", subtitle="1\n00:00:00,000 --> 00:00:01,000\noi\n", model="large-v3")
+    source_cache.store("youtube-x", first, model="large-v3", cache_dir=cache)
+
+    second = str(tmp_path / "p2")
+    restored = source_cache.restore("youtube-x", second, model="large-v3", cache_dir=cache)
+
+    assert set(restored) == {"input.mp4", "input.srt", transcript_store.STORE_DIRNAME}
+    assert os.path.samefile(os.path.join(first, "input.mp4"), os.path.join(second, "input.mp4"))
+    assert transcript_store.load_result(second)["segments"][0]["text"] == "fala do large-v3"
+
+def test_restore_does_not_touch_existing_project_files(tmp_path):
+    cache = str(tmp_path / "cache")
+    source_cache.store("youtube-x", make_project(tmp_path / "p1"), cache_dir=cache)
+    second = make_project(tmp_path / "p2", video=b"outro")
+
+    assert source_cache.restore("youtube-x", second, cache_dir=cache) == []
+    assert (tmp_path / "p2" / "input.mp4").read_bytes() == b"outro"
+
+def test_project_writes_do_not_change_the_cache(tmp_path):
+    cache = str(tmp_path / "cache")
+    first = make_project(tmp_path / "p1", subtitle="legenda do youtube", model="large-v3")
+    source_cache.store("youtube-x", first, model="large-v3", cache_dir=cache)
+    second = str(tmp_path / "p2")
+    source_cache.restore("youtube-x", second, model="large-v3", cache_dir=cache)
+
+    # Export da transcrição por cima do input.srt e novo store no segundo projeto
+    transcript_store.export(second, "srt", force=True)
+    transcript_store.write_store({"segments": [{"start": 0.0, "end": 1.0, "text": "editado"}], "language": "pt"}, second)
+
+    assert (tmp_path / "p1" / "input.srt").read_text(encoding="utf-8") == "legenda do youtube"
+    assert transcript_store.load_result(first)["segments"][0]["text"] == "fala do large-v3"
+
+def test_subtitle_of_another_model_is_not_restored(tmp_path):
+    cache = str(tmp_path / "cache")
+    first = make_project(tmp_path / "p1", model="large-v3")
+    transcript_store.export(first, "srt", force=True)  # input.srt = transcrição do large-v3
+    source_cache.store("youtube-x", first, model="large-v3", cache_dir=cache)
+
+    second = str(tmp_path / "p2")
+    restored = source_cache.restore("youtube-x", second, model="medium", cache_dir=cache)
+
+    assert restored == ["input.mp4"]
+    assert not os.path.exists(os.path.join(second, "input.srt"))
+
+def test_new_model_drops_the_stale_cached_subtitle(tmp_path):
+    cache = str(tmp_path / "cache")
+    first = make_project(tmp_path / "p1", model="large-v3")
+    transcript_store.export(first, "srt", force=True)
+    source_cache.store("youtube-x", first, model="large-v3", cache_dir=cache)
+    second = make_project(tmp_path / "p2", model="medium")
+    source_cache.store("youtube-x", second, model="medium", cache_dir=cache)
+
+    third = str(tmp_path / "p3")
+    restored = source_cache.restore("youtube-x", third, model="medium", cache_dir=cache)
+
+    assert "input.srt" not in restored
+    assert transcript_store.load_result(third)["segments"][0]["text"] == "fala do medium"
+
+def test_evict_removes_least_recently_used_first(tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    clock = iter(range(100, 200))
+    monkeypatch.setattr(source_cache.time, "time", lambda: next(clock))
+    for key in ("a", "b", "c"):
+        source_cache.store(key, make_project(tmp_path / key, video=b"x" * 1000), cache_dir=cache)
+    # "a" volta a ser usado: "b" passa a ser o mais antigo
+    source_cache.restore("a", str(tmp_path / "a2"), cache_dir=cache)
+
+    one_entry = source_cache._dir_size(os.path.join(cache, "c"))
+    removed = source_cache.evict(2 * one_entry + 500, cache_dir=cache)
+
+    assert removed == 1
+    assert sorted(os.listdir(cache)) == ["a", "c"]
+
+def test_evict_keeps_the_current_entry_and_project_links(tmp_path):
+    cache = str(tmp_path / "cache")
+    project = make_project(tmp_path / "p1")
+    source_cache.store("youtube-x", project, cache_dir=cache)
+
+    assert source_cache.evict(0, cache_dir=cache, keep="youtube-x") == 0
+    assert source_cache.evict(0, cache_dir=cache) == 1
+    assert os.listdir(cache) == []
+    assert (tmp_path / "p1" / "input.mp4").read_bytes() == b"video" * 100
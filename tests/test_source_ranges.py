@@ -0,0 +1,40 @@
+from scripts import source_ranges
+
+def test_plan_ranges_pads_and_clamps_at_zero():
+    assert source_ranges.plan_ranges([(2.0, 20.0)], padding=5.0) == [(0.0, 25.0)]
+
+def test_plan_ranges_merges_close_windows():
+    windows = [(100.0, 130.0), (30.0, 60.0), (138.0, 150.0)]
+    # 30-60 fica sozinha; 100-130 e 138-150 ficam a menos de `gap` depois do padding
+    assert source_ranges.plan_ranges(windows, padding=2.0, gap=10.0) == [(28.0, 62.0), (98.0, 152.0)]
+
+def test_plan_ranges_keeps_distant_windows_apart():
+    assert source_ranges.plan_ranges([(0.0, 10.0), (100.0, 110.0)], padding=0.0, gap=5.0) == [(0.0, 10.0), (100.0, 110.0)]
+
+def _ranges(tmp_path, spans):
+    ranges_dir = tmp_path / source_ranges.RANGES_DIR
+    ranges_dir.mkdir(exist_ok=True)
+    entries = []
+    for start, end in spans:
+        name = source_ranges.range_filename(start, end)
+        (ranges_dir / name).write_bytes(b"")
+        entries.append({"start": start, "end": end, "file": name})
+    return entries
+
+def test_overlapping_range_accepts_segment_starting_in_the_padding(tmp_path):
+    entries = _ranges(tmp_path, [(95.0, 160.0)])
+    # Começa antes do trecho: find_range não acha, mas a maior parte está dentro
+    assert source_ranges.find_range(str(tmp_path), 93.0, 93.0, entries) is None
+    path, start, end = source_ranges.overlapping_range(str(tmp_path), 93.0, 99.0, entries)
+    assert (path.endswith("range_95-160.mp4"), start, end) == (True, 95.0, 160.0)
+
+def test_overlapping_range_picks_the_range_with_most_overlap(tmp_path):
+    entries = _ranges(tmp_path, [(0.0, 62.0), (60.0, 120.0)])
+    assert source_ranges.overlapping_range(str(tmp_path), 55.0, 61.0, entries)[1] == 0.0
+    assert source_ranges.overlapping_range(str(tmp_path), 59.0, 65.0, entries)[1] == 60.0
+
+def test_overlapping_range_ignores_missing_files_and_gaps(tmp_path):
+    entries = _ranges(tmp_path, [(0.0, 30.0)]) + [{"start": 40.0, "end": 80.0, "file": "range_40-80.mp4"}]
+    assert source_ranges.overlapping_range(str(tmp_path), 30.0, 35.0, entries) is None
+    assert source_ranges.overlapping_range(str(tmp_path), 45.0, 50.0, entries) is None
+    assert source_ranges.overlapping_range(str(tmp_path), 10.0, 10.0, entries)[1] == 0.0
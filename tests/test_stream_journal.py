@@ -0,0 +1,47 @@
+import json
+
+from scripts.transcribe_video import read_stream_journal, stream_journal_header
+
+def _write_journal(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+
+def _header(tmp_path, model="large-v3", **kwargs):
+    media = tmp_path / "input.mp4"
+    if not media.exists():
+        media.write_bytes(b"\0" * 100)
+    settings = {"window_seconds": 600, "lazy_align": False, "skip_silence": False, "provided": None}
+    settings.update(kwargs)
+    return stream_journal_header(str(media), model, **settings)
+
+def test_same_settings_resume_completed_windows(tmp_path):
+    journal = tmp_path / "transcript_stream.jsonl"
+    header = _header(tmp_path)
+    _write_journal(journal, [{"header": header}, {"window": 0, "start": 0, "end": 600, "segments": []}])
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"window": 1, "sta')  # linha truncada por crash
+
+    entries = read_stream_journal(str(journal), header)
+
+    assert [e["window"] for e in entries] == [0]
+
+def test_other_model_or_settings_discard_the_journal(tmp_path):
+    journal = tmp_path / "transcript_stream.jsonl"
+    _write_journal(journal, [{"header": _header(tmp_path)}, {"window": 0, "start": 0, "end": 600, "segments": []}])
+
+    assert read_stream_journal(str(journal), _header(tmp_path, model="medium")) == []
+    assert read_stream_journal(str(journal), _header(tmp_path, window_seconds=300)) == []
+    assert read_stream_journal(str(journal), _header(tmp_path, skip_silence=True)) == []
+
+def test_journal_without_header_is_not_resumed(tmp_path):
+    journal = tmp_path / "transcript_stream.jsonl"
+    _write_journal(journal, [{"window": 0, "start": 0, "end": 600, "segments": []}])
+
+    assert read_stream_journal(str(journal), _header(tmp_path)) == []
+
+def test_reading_without_header_skips_the_header_line(tmp_path):
+    journal = tmp_path / "transcript_stream.jsonl"
+    _write_journal(journal, [{"header": _header(tmp_path)}, {"window": 0, "start": 0, "end": 600, "segments": []}])
+
+    assert [e["window"] for e in read_stream_journal(str(journal))] == [0]
@@ -0,0 +1,31 @@
+from scripts.transcribe_cuts import split_batch_segments
+
+def test_segments_land_in_their_cut_with_local_times():
+    # Três cortes concatenados: 0-10s, 11.5-31.5s, 33-38s (gaps de 1.5s)
+    offsets = [(0.0, 10.0), (11.5, 31.5), (33.0, 38.0)]
+    segments = [
+        {"start": 1.0, "end": 4.0, "text": "a"},
+        {"start": 12.0, "end": 15.0, "text": "b"},
+        {"start": 30.0, "end": 31.5, "text": "c"},
+        {"start": 34.0, "end": 36.0, "text": "d"},
+    ]
+    per_cut = split_batch_segments(segments, offsets)
+
+    assert [[s["text"] for s in cut] for cut in per_cut] == [["a"], ["b", "c"], ["d"]]
+    assert per_cut[1][0]["start"] == 0.5 and per_cut[1][0]["end"] == 3.5
+    assert per_cut[2][0]["start"] == 1.0 and per_cut[2][0]["end"] == 3.0
+
+def test_segment_in_gap_goes_to_nearest_cut_and_is_clamped():
+    offsets = [(0.0, 10.0), (11.5, 20.0)]
+    # Ponto médio 10.6: no silêncio, mais perto do primeiro corte
+    per_cut = split_batch_segments([{"start": 9.5, "end": 11.7, "text": "x"}], offsets)
+
+    assert per_cut[1] == []
+    assert per_cut[0] == [{"start": 9.5, "end": 10.0, "text": "x"}]
+
+def test_segment_spanning_two_cuts_is_not_duplicated():
+    offsets = [(0.0, 10.0), (11.5, 20.0)]
+    per_cut = split_batch_segments([{"start": 8.0, "end": 16.0, "text": "y"}], offsets)
+
+    assert sum(len(cut) for cut in per_cut) == 1
+    assert per_cut[1] == [{"start": 0.0, "end": 4.5, "text": "y"}]
@@ -53,6 +53,7 @@ if not os.path.exists(MODELS_DIR):
 
 # Global variables
 current_process = None
+model_server_process = None
 
 # Helpers
 def convert_color_to_ass(hex_color, alpha="00"):
@@ -128,6 +129,34 @@ def kill_process():
             return i18n("Error terminating process: {}").format(e)
     return i18n("No process running.")
 
+def start_model_server(model):
+    """Sobe o scripts/model_server.py em background (modelos ficam carregados entre jobs)."""
+    global model_server_process
+    if model_server_process and model_server_process.poll() is None:
+        return i18n("Model server already running (PID {}).").format(model_server_process.pid)
+    cmd = [sys.executable, os.path.join(WORKING_DIR, "scripts", "model_server.py"), "--faces"]
+    if model:
+        cmd.extend(["--model", model])
+    env = os.environ.copy()
+    env["PYTHONUNBUFFERED"] = "1"
+    model_server_process = subprocess.Popen(cmd, cwd=WORKING_DIR, env=env)
+    return i18n("Model server starting (PID {}). Models load in the background.").format(model_server_process.pid)
+
+def stop_model_server():
+    global model_server_process
+    if model_server_process and model_server_process.poll() is None:
+        model_server_process.terminate()
+        try:
+            model_server_process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            model_server_process.kill()
+        model_server_process = None
+        key_file = os.path.join(MODELS_DIR, "model_server.key")
+        if os.path.exists(key_file):
+            os.remove(key_file)
+        return i18n("Model server stopped.")
+    return i18n("Model server is not running.")
+
 GEMINI_MODELS = [
     'gemini-3-pro-preview',
     'gemini-2.5-flash',
@@ -399,7 +428,7 @@ with gr.Blocks(title=i18n("ViralCutter WebUI"), theme=gr.themes.Default(primary_
                     video_upload = gr.File(label=i18n("Upload Video"), file_count="single", file_types=["video"], visible=False)
                     
                     with gr.Row():
-                        video_quality_input = gr.Dropdown(choices=["best", "1080p", "720p", "480p"], label=i18n("Video Quality"), value="best")
+                        video_quality_input = gr.Dropdown(choices=["auto", "best", "1080p", "720p", "480p"], label=i18n("Video Quality"), value="auto")
                         translate_input = gr.Dropdown(choices=["None", "pt", "en", "es", "fr", "de", "it", "ru", "ja", "ko", "zh-CN"], label=i18n("Translate Subtitles To"), value="None")
                         use_youtube_subs_input = gr.Checkbox(label=i18n("Use YouTube Subs"), value=True, info=i18n("Download and use official subtitles if available. (Recommended, it speeds up the process)"))
 
@@ -426,38 +455,40 @@ with gr.Blocks(title=i18n("ViralCutter WebUI"), theme=gr.themes.Default(primary_
                         max_dur_input = gr.Number(label=i18n("Max Duration (s)"), value=90)
                 with gr.Column(scale=1):
                     with gr.Row():
-                        ai_backend_input = gr.Dropdown(choices=[(i18n("Gemini"), "gemini"), (i18n("G4F"), "g4f"), (i18n("Local (GGUF)"), "local"), (i18n("Manual"), "manual")], label=i18n("AI Backend"), value="gemini", scale=2)
+                        ai_backend_input = gr.Dropdown(choices=[(i18n("Gemini"), "gemini"), (i18n("G4F"), "g4f"), (i18n("Local (GGUF)"), "local"), (i18n("OpenAI-compatible"), "openai"), (i18n("Manual"), "manual")], label=i18n("AI Backend"), value="gemini", scale=2)
                         api_key_input = gr.Textbox(label=i18n("Gemini API Key"), type="password", scale=3)
                     
                     # New Dynamic Inputs
                     with gr.Row():
                         ai_model_input = gr.Dropdown(choices=GEMINI_MODELS, label=i18n("AI Model"), value=GEMINI_MODELS[1], allow_custom_value=True, visible=True, scale=5)
                         refresh_models_btn = gr.Button("🔄", size="sm", visible=False, scale=0, min_width=50) # Only local
-                        chunk_size_input = gr.Number(label=i18n("Chunk Size"), value=70000, precision=0, scale=2)
+                        chunk_size_input = gr.Number(label=i18n("Chunk Size"), value=0, precision=0, scale=2)  # 0 = automático (orçamento de tokens do modelo)
                     
                     # Update listeners with logic to hide/show API key
                     def update_ai_ui(backend):
-                        show_api = (backend == "gemini")
+                        show_api = (backend in ("gemini", "openai"))
                         show_refresh = (backend == "local")
                         
                         # Definições padrão para evitar que fiquem vazios
                         new_choices = []
                         new_val = ""
-                        new_chunk = 70000
+                        # Chunk size 0: o tamanho sai do contexto do modelo (context_tokens)
+                        new_chunk = 0
                         
                         if backend == "gemini":
                             new_choices = GEMINI_MODELS
                             new_val = GEMINI_MODELS[1]
-                            new_chunk = 70000
                         elif backend == "g4f":
                             new_choices = G4F_MODELS
                             new_val = G4F_MODELS[5]
-                            new_chunk = 70000
                         elif backend == "local":
                             models = get_local_models()
                             new_choices = models if models else [i18n("No models found")]
                             new_val = new_choices[0]
-                            new_chunk = 30000
+                        elif backend == "openai":
+                            # Servidor local/remoto (llama.cpp server, vLLM, Ollama...): modelo e URL vêm do api_config.json
+                            new_choices = ["default"]
+                            new_val = "default"
                         else: # Manual
                              pass
 
@@ -593,6 +624,12 @@ with gr.Blocks(title=i18n("ViralCutter WebUI"), theme=gr.themes.Default(primary_
                  start_btn = gr.Button(i18n("Start Processing"), variant="primary")
                  stop_btn = gr.Button(i18n("Stop"), variant="stop", visible=False)
              stop_btn.click(kill_process, outputs=[])
+             with gr.Row():
+                 server_start_btn = gr.Button(i18n("🔥 Start Model Server"), size="sm")
+                 server_stop_btn = gr.Button(i18n("Stop Model Server"), size="sm")
+                 server_status = gr.Markdown()
+             server_start_btn.click(start_model_server, inputs=[model_input], outputs=server_status)
+             server_stop_btn.click(stop_model_server, outputs=server_status)
              logs_output = gr.Textbox(label=i18n("Logs"), lines=10, autoscroll=True, elem_id="logs_output")
              
              # Force scroll to bottom via JS
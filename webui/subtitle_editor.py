@@ -7,6 +7,7 @@ import sys
 # Import scripts for direct processing
 import scripts.adjust_subtitles as adjust
 import scripts.burn_subtitles as burn
+from scripts import cut_files
 import main_improved 
 
 # Helper to format seconds to HH:MM:SS,mmm
@@ -40,8 +41,7 @@ def load_transcription_for_editor(json_path):
         return []
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = cut_files.read_cut(json_path)
         
         segments = data.get('segments', [])
         editor_data = [] # List of [Start, End, Text]
@@ -68,8 +68,7 @@ def save_editor_changes(json_path, new_data):
         return "Error: Original file not found."
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            original_json = json.load(f)
+        original_json = cut_files.read_cut(json_path)
         
         original_segments = original_json.get('segments', [])
         
@@ -145,8 +144,7 @@ def save_editor_changes(json_path, new_data):
         original_json["segments"] = updated_segments
         
         # Save Text back to file
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(original_json, f, indent=4, ensure_ascii=False)
+        cut_files.write_cut(json_path, original_json, indent=4)
             
         return "Success: Subtitles updated."
         